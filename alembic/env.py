@@ -33,6 +33,14 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def database_url() -> str:
+    """The database to migrate: `alembic -x url=...` if given, else sqlalchemy.url.
+
+    apply_migrations.py passes each shard's URL this way.
+    """
+    return context.get_x_argument(as_dictionary=True).get("url", config.get_main_option("sqlalchemy.url"))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -45,7 +53,7 @@ def run_migrations_offline() -> None:
     script output.
 
     """
-    url = config.get_main_option("sqlalchemy.url")
+    url = database_url()
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -66,7 +74,7 @@ def run_migrations_online() -> None:
     """
     # Create a sync engine specifically for alembic
     from sqlalchemy import create_engine
-    connectable = create_engine(config.get_main_option("sqlalchemy.url"))
+    connectable = create_engine(database_url())
 
     with connectable.connect() as connection:
         context.configure(
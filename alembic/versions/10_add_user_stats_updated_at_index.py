@@ -0,0 +1,26 @@
+"""add user stats updated_at index
+
+Revision ID: 10
+Revises: 9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '10'
+down_revision: Union[str, None] = '9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Most recently active users first, for the startup cache warm-up
+    op.create_index('ix_user_stats_updated_at', 'user_stats', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_stats_updated_at', table_name='user_stats')
@@ -0,0 +1,28 @@
+"""add keyset pagination indexes
+
+Revision ID: 4
+Revises: 3
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4'
+down_revision: Union[str, None] = '3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite indexes backing cursor pagination of per-user lists
+    op.create_index('ix_badges_user_id_date_achieved_id', 'badges', ['user_id', 'date_achieved', 'id'])
+    op.create_index('ix_learning_goals_user_id_id', 'learning_goals', ['user_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_learning_goals_user_id_id', table_name='learning_goals')
+    op.drop_index('ix_badges_user_id_date_achieved_id', table_name='badges')
@@ -0,0 +1,44 @@
+"""add user_stats counters
+
+Revision ID: 5
+Revises: 4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5'
+down_revision: Union[str, None] = '4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Denormalized per-user badge/goal counters
+    op.create_table('user_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('badge_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('goal_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['auth_users.id']),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    
+    # Backfill the counters from the existing rows
+    op.execute("""
+        INSERT INTO user_stats (user_id, badge_count, goal_count, updated_at)
+        SELECT auth_users.id,
+               (SELECT COUNT(*) FROM badges WHERE badges.user_id = auth_users.id),
+               (SELECT COUNT(*) FROM learning_goals WHERE learning_goals.user_id = auth_users.id),
+               CURRENT_TIMESTAMP
+        FROM auth_users
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
@@ -0,0 +1,50 @@
+"""add learning goals archive
+
+Revision ID: 7
+Revises: 6
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7'
+down_revision: Union[str, None] = '6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Track when a goal's status changed; existing goals start aging now
+    with op.batch_alter_table('learning_goals') as batch_op:
+        batch_op.add_column(sa.Column('status_changed_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE learning_goals SET status_changed_at = CURRENT_TIMESTAMP")
+    op.create_index('ix_learning_goals_status_status_changed_at', 'learning_goals', ['status', 'status_changed_at'])
+
+    # Cold storage for goals that have been archived or completed for a while
+    op.create_table('learning_goals_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('streak_count', sa.Integer(), nullable=True),
+        sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('status_changed_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['auth_users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_learning_goals_archive_user_id_id', 'learning_goals_archive', ['user_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_learning_goals_archive_user_id_id', table_name='learning_goals_archive')
+    op.drop_table('learning_goals_archive')
+    op.drop_index('ix_learning_goals_status_status_changed_at', table_name='learning_goals')
+    with op.batch_alter_table('learning_goals') as batch_op:
+        batch_op.drop_column('status_changed_at')
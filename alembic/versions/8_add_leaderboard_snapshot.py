@@ -0,0 +1,35 @@
+"""add leaderboard snapshot
+
+Revision ID: 8
+Revises: 7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8'
+down_revision: Union[str, None] = '7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('leaderboard_snapshot',
+        sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('badge_count', sa.Integer(), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('snapshotted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index('ix_leaderboard_snapshot_rank', 'leaderboard_snapshot', ['rank'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_leaderboard_snapshot_rank', table_name='leaderboard_snapshot')
+    op.drop_table('leaderboard_snapshot')
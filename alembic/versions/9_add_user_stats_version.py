@@ -0,0 +1,40 @@
+"""add user stats version
+
+Revision ID: 9
+Revises: 8
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9'
+down_revision: Union[str, None] = '8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Version stamp of each user's badges and goals, for ETags on the list endpoints
+    with op.batch_alter_table('user_stats') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    # SQLite cannot update user_stats from the goal UPDATE's CTE; a trigger does it
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS learning_goals_bump_user_stats_version "
+            "AFTER UPDATE ON learning_goals "
+            "BEGIN "
+            "UPDATE user_stats SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE user_id = NEW.user_id; "
+            "END"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS learning_goals_bump_user_stats_version")
+    with op.batch_alter_table('user_stats') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,46 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.api.routes import verify_service_token
+from app.crud.pagination import InvalidCursorError
+from app.services.data_export import ExportPosition, parse_entities, stream_ndjson
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(verify_service_token)],
+    responses={403: {"description": "Missing or invalid service token"}},
+)
+
+@router.get("/export", summary="Bulk export", description="Stream users, badges and learning goals as NDJSON, gzip-compressed when the client accepts it. Checkpoint lines in the stream let an interrupted export resume where it stopped.", responses={200: {"content": {"application/x-ndjson": {}}}, 400: {"description": "Invalid entities or checkpoint"}})
+async def export_data(
+    entities: Optional[str] = Query(None, description="Comma-separated subset of users, badges, learning_goals (default: all)"),
+    checkpoint: Optional[str] = Query(None, description="Token of the last checkpoint line received, to resume an export"),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """
+    Stream a bulk export for analytics.
+    
+    Args:
+        entities (Optional[str]): The entities to export, in any order; they are always exported users first.
+        checkpoint (Optional[str]): The checkpoint token to resume from.
+        
+    Returns:
+        StreamingResponse: One JSON record per line, each with a "type" field.
+        
+    Raises:
+        HTTPException: If the entities or the checkpoint are invalid.
+    """
+    try:
+        selected = parse_entities(entities)
+        if checkpoint:
+            ExportPosition.from_token(checkpoint, selected)
+    except (ValueError, InvalidCursorError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    compress = "gzip" in (accept_encoding or "").lower()
+    headers = {"Content-Encoding": "gzip"} if compress else {}
+    return StreamingResponse(
+        stream_ndjson(selected, checkpoint, compress=compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
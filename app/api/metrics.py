@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from app.db.database import engines
+from app.db.pool_metrics import pool_snapshot
+from app.services.profile_cache import profile_cache
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+@router.get("/db-pool", response_model=dict, summary="Database pool metrics", description="Checkout latency, in-use and overflow connections, and checkout timeouts for each database pool.")
+async def read_db_pool_metrics():
+    """
+    Report usage and saturation of the database connection pools.
+    
+    Returns:
+        dict: One entry per engine ("primary" and, if configured, "replica").
+    """
+    return {name: pool_snapshot(engine.sync_engine.pool) for name, engine in engines.items()}
+
+
+@router.get("/profile-cache", response_model=dict, summary="Profile cache metrics", description="Size, hits, misses and invalidations of the profile cache, and the age of recently served entries.")
+async def read_profile_cache_metrics():
+    """
+    Report how well the profile cache is working and how stale its hits are.
+    
+    Returns:
+        dict: Counters and hit ages for this instance's profile cache.
+    """
+    return profile_cache.snapshot()
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from app import schemas, crud, models
-from app.services.user import UserService
-from app.db.database import get_db
+from app.services.user import MAX_PROFILES_PER_BATCH, UserService
+from app.db.database import get_db, get_read_db
 from app.schemas.user import UserProfileResponse, UserUpdate
 from app.schemas.learning_goal import LearningGoalCreate, LearningGoalUpdate
 from app.schemas.badge import Badge, BadgeCreate
 from app.services.auth_service import auth_service_client
+from app.core.settings import settings
 
 router = APIRouter(
     prefix="/users",
@@ -15,12 +17,109 @@ router = APIRouter(
     responses={404: {"description": "User not found"}},
 )
 
+# Clients may keep badge and goal lists, but must revalidate them with
+# If-None-Match before reuse, which is cheap thanks to the ETags
+LIST_CACHE_CONTROL = "private, no-cache"
+
 def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
     """Dependency to get UserService instance."""
     return UserService(db)
 
-@router.get("/{auth_user_id}", response_model=dict, summary="Get user profile", description="Retrieve a user's profile by their auth-service user ID, including badges and learning goals.")
-async def read_user(auth_user_id: int, user_service: UserService = Depends(get_user_service)):
+def get_read_user_service(db: AsyncSession = Depends(get_read_db)) -> UserService:
+    """Dependency to get a UserService instance for read-only routes."""
+    return UserService(db)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag, using the weak comparison RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+def _conditional_list_response(response: Response, etag: str, if_none_match: Optional[str]) -> Optional[Response]:
+    """Set the caching headers of a list response, and return a 304 if the client's copy is current."""
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def verify_service_token(x_service_token: Optional[str] = Header(None)) -> None:
+    """Dependency that restricts an endpoint to callers presenting SERVICE_API_TOKEN."""
+    expected = settings.SERVICE_API_TOKEN
+    if not expected or not x_service_token or not secrets.compare_digest(x_service_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+@router.post("/badges/bulk", response_model=schemas.BadgeBulkResponse, summary="Award badges in bulk", description="Create many badges for many users in one request. Each badge is accepted or rejected individually; with sharding, badges whose shard could not be written come back as `failed` and can be retried on their own.", responses={403: {"description": "Missing or invalid service token"}, 503: {"description": "Auth service unavailable"}})
+async def create_badges_bulk(
+    request: schemas.BadgeBulkCreate,
+    user_service: UserService = Depends(get_user_service),
+    _: None = Depends(verify_service_token)
+):
+    """
+    Award many badges in a single request.
+    
+    Args:
+        request (schemas.BadgeBulkCreate): The badges to award, each with its user ID.
+        user_service (UserService): The user service instance.
+        
+    Returns:
+        schemas.BadgeBulkResponse: Per-badge results and the created/rejected/failed totals.
+    """
+    return await user_service.create_badges_bulk(request.badges)
+
+@router.get("/leaderboard", response_model=schemas.LeaderboardResponse, summary="Get badge leaderboard", description="Users ranked by badge count (ties by user ID), with their levels. Pass `auth_user_id` to also get that user's own rank.")
+async def read_leaderboard(
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    auth_user_id: Optional[int] = Query(None),
+    user_service: UserService = Depends(get_read_user_service)
+):
+    """
+    Get a page of the badge leaderboard.
+    
+    Args:
+        limit (int): The maximum number of entries to return.
+        offset (int): The number of top entries to skip.
+        auth_user_id (Optional[int]): A user whose own entry to include.
+        
+    Returns:
+        schemas.LeaderboardResponse: The ranked entries, the number of ranked users and the user's entry.
+    """
+    return await user_service.get_leaderboard(limit=limit, offset=offset, auth_user_id=auth_user_id)
+
+@router.get("/batch", response_model=dict, summary="Get user profiles in bulk", description=f"Retrieve the profiles of up to {MAX_PROFILES_PER_BATCH} users at once, keyed by user ID. Users the auth service does not know are listed under `missing` instead of failing the request.", responses={400: {"description": "Invalid or too many user IDs"}, 503: {"description": "Auth service unavailable"}})
+async def read_users_batch(
+    ids: str = Query(..., description="Comma-separated auth-service user IDs"),
+    user_service: UserService = Depends(get_read_user_service)
+):
+    """
+    Get many users' profiles in one request, e.g. for rendering a feed.
+    
+    Args:
+        ids (str): Comma-separated user IDs.
+        user_service (UserService): The user service instance.
+        
+    Returns:
+        Response: A JSON object with the `profiles` keyed by user ID and the `missing` user IDs.
+        
+    Raises:
+        HTTPException: If an ID is not an integer, too many IDs are requested or the auth service is unavailable.
+    """
+    try:
+        auth_user_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User IDs must be comma-separated integers")
+    if not auth_user_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No user IDs given")
+    if len(set(auth_user_ids)) > MAX_PROFILES_PER_BATCH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_PROFILES_PER_BATCH} user IDs can be requested at once")
+    return Response(content=await user_service.get_user_profiles_json(auth_user_ids), media_type="application/json")
+
+@router.get("/{auth_user_id}", response_model=dict, summary="Get user profile", description="Retrieve a user's profile by their auth-service user ID, including badges and learning goals. Profiles are cached briefly; changes made through this service show up immediately.")
+async def read_user(auth_user_id: int, user_service: UserService = Depends(get_read_user_service)):
     """
     Get a user's profile by auth-service user ID.
     
@@ -28,25 +127,43 @@ async def read_user(auth_user_id: int, user_service: UserService = Depends(get_u
         auth_user_id (int): The ID of the user.
         
     Returns:
-        dict: The user's profile data including badges and learning goals.
+        Response: The user's profile data including badges and learning goals, as JSON.
         
     Raises:
         HTTPException: If the user is not found (404).
     """
-    return await user_service.get_user_profile(auth_user_id)
+    return Response(content=await user_service.get_user_profile_json(auth_user_id), media_type="application/json")
 
-@router.get("/{auth_user_id}/badges", response_model=List[schemas.Badge], summary="Get user badges", description="Retrieve all badges earned by a specific user.")
-async def read_user_badges(auth_user_id: int, user_service: UserService = Depends(get_user_service)):
+@router.get("/{auth_user_id}/badges", response_model=List[schemas.Badge], summary="Get user badges", description="Retrieve the badges earned by a specific user, newest first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page. Send the `ETag` of a previous response as `If-None-Match` to get a 304 if the page has not changed.", responses={304: {"description": "The page has not changed"}, 400: {"description": "Invalid cursor"}})
+async def read_user_badges(
+    auth_user_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    user_service: UserService = Depends(get_read_user_service)
+):
     """
-    Retrieve all badges earned by a user.
+    Retrieve a page of badges earned by a user.
     
     Args:
         auth_user_id (int): The ID of the user.
+        limit (int): The maximum number of badges to return.
+        cursor (Optional[str]): The opaque cursor returned with the previous page.
+        if_none_match (Optional[str]): The ETag of the client's copy of this page.
         
     Returns:
-        List[schemas.Badge]: A list of badges earned by the user.
+        List[schemas.Badge]: A list of badges earned by the user, or an empty
+        304 response if the client's copy is still current.
     """
-    return await user_service.get_user_badges(auth_user_id)
+    etag = await user_service.get_list_etag(auth_user_id, "badges", limit, cursor)
+    not_modified = _conditional_list_response(response, etag, if_none_match)
+    if not_modified:
+        return not_modified
+    badges, next_cursor = await user_service.get_user_badges_page(auth_user_id, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return badges
 
 @router.post("/{auth_user_id}/badges", response_model=schemas.Badge, summary="Create user badge", description="Create a new badge for a user.", responses={403: {"description": "Not authorized to create a badge for this user"}})
 async def create_badge(
@@ -70,18 +187,60 @@ async def create_badge(
     """
     return await user_service.create_badge(auth_user_id, badge)
 
-@router.get("/{auth_user_id}/goals", response_model=List[schemas.LearningGoal], summary="Get user learning goals", description="Retrieve all learning goals for a specific user.")
-async def read_user_learning_goals(auth_user_id: int, user_service: UserService = Depends(get_user_service)):
+@router.get("/{auth_user_id}/goals", response_model=List[schemas.LearningGoal], summary="Get user learning goals", description="Retrieve the learning goals for a specific user, newest first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page. Send the `ETag` of a previous response as `If-None-Match` to get a 304 if the page has not changed.", responses={304: {"description": "The page has not changed"}, 400: {"description": "Invalid cursor"}})
+async def read_user_learning_goals(
+    auth_user_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    user_service: UserService = Depends(get_read_user_service)
+):
+    """
+    Retrieve a page of learning goals for a user.
+    
+    Args:
+        auth_user_id (int): The ID of the user.
+        limit (int): The maximum number of learning goals to return.
+        cursor (Optional[str]): The opaque cursor returned with the previous page.
+        if_none_match (Optional[str]): The ETag of the client's copy of this page.
+        
+    Returns:
+        List[schemas.LearningGoal]: A list of learning goals for the user, or
+        an empty 304 response if the client's copy is still current.
+    """
+    etag = await user_service.get_list_etag(auth_user_id, "goals", limit, cursor)
+    not_modified = _conditional_list_response(response, etag, if_none_match)
+    if not_modified:
+        return not_modified
+    goals, next_cursor = await user_service.get_user_learning_goals_page(auth_user_id, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return goals
+
+@router.get("/{auth_user_id}/goals/archived", response_model=List[schemas.ArchivedLearningGoal], summary="Get archived learning goals", description="Retrieve the learning goals that were moved to the archive after staying archived or completed for a while, newest first. Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page.", responses={400: {"description": "Invalid cursor"}})
+async def read_user_archived_learning_goals(
+    auth_user_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    user_service: UserService = Depends(get_read_user_service)
+):
     """
-    Retrieve all learning goals for a user.
+    Retrieve a page of archived learning goals for a user.
     
     Args:
         auth_user_id (int): The ID of the user.
+        limit (int): The maximum number of archived learning goals to return.
+        cursor (Optional[str]): The opaque cursor returned with the previous page.
         
     Returns:
-        List[schemas.LearningGoal]: A list of learning goals for the user.
+        List[schemas.ArchivedLearningGoal]: A list of archived learning goals for the user.
     """
-    return await user_service.get_user_learning_goals(auth_user_id)
+    goals, next_cursor = await user_service.get_user_archived_learning_goals_page(auth_user_id, limit=limit, cursor=cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return goals
 
 @router.post("/{auth_user_id}/goals", response_model=schemas.LearningGoal, summary="Create learning goal", description="Create a new learning goal for a user.", responses={403: {"description": "Not authorized to create a learning goal for this user"}})
 async def create_learning_goal(
@@ -105,7 +264,7 @@ async def create_learning_goal(
     """
     return await user_service.create_learning_goal(auth_user_id, learning_goal)
 
-@router.put("/{auth_user_id}/goals/{goal_id}", response_model=schemas.LearningGoal, summary="Update learning goal", description="Update a specific learning goal for a user.", responses={403: {"description": "Not authorized to update this learning goal"}, 404: {"description": "Learning goal not found"}})
+@router.put("/{auth_user_id}/goals/{goal_id}", response_model=schemas.LearningGoal, summary="Update learning goal", description="Update a specific learning goal for a user. Pass the goal's version to reject the update if the goal changed in the meantime.", responses={400: {"description": "Invalid status transition"}, 403: {"description": "Not authorized to update this learning goal"}, 404: {"description": "Learning goal not found"}, 409: {"description": "Learning goal was modified"}})
 async def update_learning_goal(
     auth_user_id: int, 
     goal_id: int, 
@@ -125,11 +284,12 @@ async def update_learning_goal(
         schemas.LearningGoal: The updated learning goal.
         
     Raises:
-        HTTPException: If the learning goal is not found (404).
+        HTTPException: If the learning goal is not found (404), the status
+            transition is invalid (400) or the goal is no longer at the given version (409).
     """
     return await user_service.update_learning_goal(auth_user_id, goal_id, learning_goal)
 
-@router.delete("/{auth_user_id}/goals/{goal_id}", summary="Delete learning goal", description="Delete a specific learning goal for a user.", responses={403: {"description": "Not authorized to delete this learning goal"}, 404: {"description": "Learning goal not found"}})
+@router.delete("/{auth_user_id}/goals/{goal_id}", summary="Delete learning goal", description="Delete a specific learning goal for a user. Completed goals cannot be deleted.", responses={400: {"description": "Completed learning goals cannot be deleted"}, 403: {"description": "Not authorized to delete this learning goal"}, 404: {"description": "Learning goal not found"}})
 async def delete_learning_goal(
     auth_user_id: int, 
     goal_id: int, 
@@ -147,7 +307,7 @@ async def delete_learning_goal(
         dict: A confirmation that the learning goal was deleted.
         
     Raises:
-        HTTPException: If the learning goal is not found (404).
+        HTTPException: If the learning goal is not found (404) or is completed (400).
     """
     await user_service.delete_learning_goal(auth_user_id, goal_id)
     return {"ok": True}
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import Optional
+from .base import CacheBackend
+from .memory import MemoryCache
+from .null import NullCache
+from .redis import RedisCache
+from app.core.settings import settings
+
+CACHE_BACKENDS = ("memory", "redis", "none")
+
+
+def create_cache(backend: Optional[str] = None) -> CacheBackend:
+    """Create the cache backend named by `backend`, or by CACHE_BACKEND."""
+    backend = backend or settings.CACHE_BACKEND
+    if backend == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES)
+    if backend == "redis":
+        return RedisCache(settings.CACHE_URL)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown cache backend {backend!r}, expected one of {CACHE_BACKENDS}")
+
+
+# Global instance
+cache = create_cache()
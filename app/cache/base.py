@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+
+
+class CacheBackend(ABC):
+    """Interface shared by the cache backends.
+
+    Keys are strings and values are bytes; callers serialize their own
+    values. Entries expire after `ttl_seconds`, or never when it is None.
+    Backends must not raise on lookups: a cache that cannot be reached
+    behaves like an empty one, so callers fall back to the source of truth.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """The cached value, or None on a miss."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        """Cache a value, replacing any previous one."""
+
+    async def delete(self, key: str) -> None:
+        """Drop a cached value, if any."""
+        await self.delete_many([key])
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """The cached values of the keys that were hits."""
+        values = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: Optional[float] = None) -> None:
+        """Cache many values with the same TTL."""
+        for key, value in items.items():
+            await self.set(key, value, ttl_seconds)
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Drop many cached values."""
+
+    async def close(self) -> None:
+        """Release the backend's connections, if it has any."""
@@ -0,0 +1,45 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+from app.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache holding at most `max_entries` values.
+
+    Each process has its own entries, so this suits single-instance
+    deployments; with several instances, a value deleted on one of them
+    is still served by the others until it expires.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # Value and expiry (time.monotonic(), or None for no expiry) per key
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
@@ -0,0 +1,15 @@
+from typing import Iterable, Optional
+from app.cache.base import CacheBackend
+
+
+class NullCache(CacheBackend):
+    """A cache that stores nothing, for tests and for turning caching off."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        pass
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        pass
@@ -0,0 +1,75 @@
+import logging
+from typing import Dict, Iterable, Optional
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from app.cache.base import CacheBackend
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by all instances, kept on a Redis-compatible server.
+
+    A thin adapter over redis.asyncio: connections come from a pool of at
+    most `max_connections`, opened lazily, with the password and database
+    taken from the URL. If the server cannot be reached, is too slow or
+    rejects a command, the error is logged and the call behaves like a
+    miss, so requests fall back to the source of truth.
+    """
+
+    def __init__(self, url: str, max_connections: int = 10, timeout_seconds: float = 0.5, key_prefix: str = "user-service:"):
+        self.key_prefix = key_prefix
+        pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=max_connections,
+            timeout=timeout_seconds,
+            socket_timeout=timeout_seconds,
+            socket_connect_timeout=timeout_seconds,
+        )
+        self.client = redis.Redis(connection_pool=pool)
+        self.address = f"{pool.connection_kwargs.get('host', 'localhost')}:{pool.connection_kwargs.get('port', 6379)}"
+
+    async def _call(self, command, default):
+        try:
+            return await command
+        except (RedisError, OSError) as e:
+            logger.warning(f"Cache server {self.address} unavailable: {e!r}")
+            return default
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._call(self.client.get(self._key(key)), None)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = await self._call(self.client.mget([self._key(key) for key in keys]), [None] * len(keys))
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    @staticmethod
+    def _ttl_ms(ttl_seconds: Optional[float]) -> Optional[int]:
+        return None if ttl_seconds is None else max(1, int(ttl_seconds * 1000))
+
+    async def set(self, key: str, value: bytes, ttl_seconds: Optional[float] = None) -> None:
+        await self._call(self.client.set(self._key(key), value, px=self._ttl_ms(ttl_seconds)), None)
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: Optional[float] = None) -> None:
+        if not items:
+            return
+        # Pipelined on one connection, without MULTI
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(self._key(key), value, px=self._ttl_ms(ttl_seconds))
+        await self._call(pipeline.execute(), None)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            await self._call(self.client.delete(*map(self._key, keys)), None)
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from shared_libs import SharedSettings
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import field_validator, ValidationInfo
 import os
 
@@ -11,6 +11,67 @@ class Settings(SharedSettings):
     DATABASE_MAX_OVERFLOW: int = 30
     DATABASE_POOL_TIMEOUT: int = 30
     DATABASE_POOL_RECYCLE: int = 3600  # 1 hour
+    # Per-connection prepared statement cache size (asyncpg only; 0 disables it)
+    DATABASE_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    
+    # Optional read replica used by GET routes
+    DATABASE_READ_URL: Optional[str] = None
+    # How long a user's reads stay on the primary after they write; the write
+    # is recorded in the cache, so with CACHE_BACKEND=redis this holds on
+    # every instance
+    DATABASE_READ_YOUR_WRITES_SECONDS: int = 5
+    
+    # Optional shards for per-user tables (badges, learning goals, counters),
+    # as a JSON object of shard name to URL. Users are assigned to shards by
+    # consistent hashing of their ID over the shard names.
+    DATABASE_SHARD_URLS: Dict[str, str] = {}
+    DATABASE_SHARD_VNODES: int = 100
+    
+    # Create missing tables with Base.metadata.create_all on startup instead of
+    # checking the alembic revision. For local development and tests only.
+    DATABASE_CREATE_ALL: bool = False
+    
+    # Serialized profile responses are cached per user for up to
+    # PROFILE_CACHE_TTL_SECONDS (0 disables the cache) and dropped when the
+    # user's badges or goals change. They are kept in CACHE_BACKEND: with
+    # "memory", up to PROFILE_CACHE_MAX_ENTRIES per process
+    PROFILE_CACHE_TTL_SECONDS: int = 60
+    PROFILE_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Cache for cross-request data such as auth service lookups: "memory"
+    # keeps up to CACHE_MAX_ENTRIES entries in each process (single-node
+    # deployments), "redis" shares them between instances through the
+    # Redis-compatible server at CACHE_URL, and "none" disables caching
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_MAX_ENTRIES: int = 10000
+    
+    # Users fetched from the auth service are cached this long (0 disables it)
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    
+    # Per-process caches (e.g. profiles) are invalidated on the other
+    # instances through this RabbitMQ fanout exchange; invalidations made
+    # within CACHE_INVALIDATION_COALESCE_MS of each other share one message
+    CACHE_INVALIDATION_EXCHANGE: str = "user_service.cache_invalidations"
+    CACHE_INVALIDATION_COALESCE_MS: int = 50
+    
+    # At startup the profiles and auth records of the CACHE_WARMUP_USERS most
+    # recently active users are cached, CACHE_WARMUP_CONCURRENCY at a time,
+    # for at most CACHE_WARMUP_BUDGET_SECONDS; /ready answers 503 until the
+    # warm-up is over (CACHE_WARMUP_USERS=0 disables it)
+    CACHE_WARMUP_USERS: int = 500
+    CACHE_WARMUP_CONCURRENCY: int = 10
+    CACHE_WARMUP_BUDGET_SECONDS: float = 20
+    
+    # Statements slower than SLOW_QUERY_THRESHOLD_MS are logged with redacted
+    # parameters (0 disables this); on PostgreSQL the plan of this fraction
+    # of them is captured with EXPLAIN
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    
+    # Debug mode: responses carry X-DB-Query-Count and X-DB-Query-Time-Ms
+    # headers, and repeated statements within a request are logged
+    DEBUG: bool = False
     
     # Auth service settings
     AUTH_SERVICE_URL: str = "http://localhost:8001"
@@ -23,6 +84,22 @@ class Settings(SharedSettings):
     # Message queue settings
     RABBITMQ_URL: str
     
+    # Learning goals that stay in one of these statuses longer than
+    # GOAL_ARCHIVE_AFTER_DAYS are moved to learning_goals_archive in batches
+    # every GOAL_ARCHIVE_INTERVAL_SECONDS (0 disables the archiver)
+    GOAL_ARCHIVE_STATUSES: List[str] = ["archived", "completed"]
+    GOAL_ARCHIVE_AFTER_DAYS: int = 30
+    GOAL_ARCHIVE_BATCH_SIZE: int = 500
+    GOAL_ARCHIVE_INTERVAL_SECONDS: int = 3600
+    
+    # The leaderboard is rebuilt from the badge counters and snapshotted every
+    # LEADERBOARD_REFRESH_INTERVAL_SECONDS (0 disables the leaderboard refresher)
+    LEADERBOARD_REFRESH_INTERVAL_SECONDS: int = 300
+    
+    # Token required by service-to-service endpoints (e.g. bulk badge awards);
+    # those endpoints are disabled when it is not set
+    SERVICE_API_TOKEN: Optional[str] = None
+    
     # Validation for secret key
     @field_validator('SECRET_KEY')
     def secret_key_must_not_be_empty(cls, v: str) -> str:
@@ -51,6 +128,35 @@ class Settings(SharedSettings):
             raise ValueError('DATABASE_MAX_OVERFLOW must be non-negative')
         return v
     
+    # Validation for prepared statement cache size
+    @field_validator('DATABASE_PREPARED_STATEMENT_CACHE_SIZE')
+    def prepared_statement_cache_size_must_be_non_negative(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError('DATABASE_PREPARED_STATEMENT_CACHE_SIZE must be non-negative')
+        return v
+    
+    # Validation for the slow query EXPLAIN sample rate
+    @field_validator('SLOW_QUERY_EXPLAIN_SAMPLE_RATE')
+    def explain_sample_rate_must_be_a_fraction(cls, v: float) -> float:
+        if not 0 <= v <= 1:
+            raise ValueError('SLOW_QUERY_EXPLAIN_SAMPLE_RATE must be between 0 and 1')
+        return v
+    
+    # Validation for the cache backend
+    @field_validator('CACHE_BACKEND')
+    def cache_backend_must_be_valid(cls, v: str) -> str:
+        valid_backends = ['memory', 'redis', 'none']
+        if v not in valid_backends:
+            raise ValueError(f'CACHE_BACKEND must be one of {valid_backends}')
+        return v
+    
+    # Validation for the cache warm-up concurrency
+    @field_validator('CACHE_WARMUP_CONCURRENCY')
+    def cache_warmup_concurrency_must_be_positive(cls, v: int) -> int:
+        if v <= 0:
+            raise ValueError('CACHE_WARMUP_CONCURRENCY must be positive')
+        return v
+    
     # Validation for RabbitMQ URL
     @field_validator('RABBITMQ_URL')
     def rabbitmq_url_must_not_be_empty(cls, v: str) -> str:
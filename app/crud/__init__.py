@@ -1 +1 @@
-from . import user, badge, learning_goal
\ No newline at end of file
+from . import user, user_stats, badge, learning_goal, learning_goal_archive, leaderboard, profile
\ No newline at end of file
@@ -1,42 +1,182 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import bindparam, func, insert, tuple_
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+from app.db.dialect import supports_insert_returning
+from app.db.sharding import active_router, routed_by, shard_key
 from app.models.badge import Badge
-from app.schemas.badge import BadgeCreate
+from app.schemas.badge import BadgeCreate, BadgeAward
+from app.crud import user_stats
+from app.crud.pagination import encode_cursor, decode_cursor, split_page
+from app.crud.user_stats import CounterLimitReached
 from app.services.auth_service import auth_service_client
 
-async def get_badges_by_user(db: AsyncSession, auth_user_id: int, skip: int = 0, limit: int = 100):
-    """Get badges for a user by user ID."""
+# Hot queries are built once at import time and executed with bound
+# parameters, so each call skips constructing the select() and generating
+# its cache key.
+_BADGES_BY_USER = (
+    select(Badge)
+    .filter(Badge.user_id == bindparam("user_id"))
+    .order_by(Badge.date_achieved.desc(), Badge.id.desc())
+    .limit(bindparam("limit"))
+)
+_BADGES_BY_USER_AFTER_CURSOR = _BADGES_BY_USER.filter(
+    tuple_(Badge.date_achieved, Badge.id)
+    < tuple_(bindparam("date_achieved", type_=Badge.date_achieved.type), bindparam("badge_id", type_=Badge.id.type))
+)
+
+def decode_badges_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a badge page cursor, raising InvalidCursorError if it is malformed."""
+    return decode_cursor(cursor, datetime, int)
+
+def _badges_by_user_query(auth_user_id: int, limit: int, cursor: Optional[str] = None):
+    """Pick the keyset query and parameters for a user's badges, newest first.
+
+    Served by the (user_id, date_achieved, id) index, so every page costs the
+    same regardless of how deep it is.
+    """
+    params = {"user_id": auth_user_id, "limit": limit}
+    if not cursor:
+        return _BADGES_BY_USER, params
+    date_achieved, badge_id = decode_badges_cursor(cursor)
+    return _BADGES_BY_USER_AFTER_CURSOR, {**params, "date_achieved": date_achieved, "badge_id": badge_id}
+
+@routed_by("auth_user_id")
+async def get_badges_by_user(db: AsyncSession, auth_user_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """Get badges for a user by user ID, newest first."""
+    query, params = _badges_by_user_query(auth_user_id, limit, cursor)
     try:
-        result = await db.execute(
-            select(Badge)
-            .filter(Badge.auth_user_id == auth_user_id)
-            .offset(skip)
-            .limit(limit)
-        )
+        result = await db.execute(query, params)
         return result.scalars().all()
     except Exception as e:
         raise Exception(f"Error fetching badges for user {auth_user_id}: {str(e)}")
 
+@routed_by("auth_user_id")
+async def get_badges_page_by_user(db: AsyncSession, auth_user_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """Get a page of badges for a user along with the cursor for the next page."""
+    query, params = _badges_by_user_query(auth_user_id, limit + 1, cursor)
+    try:
+        result = await db.execute(query, params)
+        badges, has_more = split_page(result.scalars().all(), limit)
+    except Exception as e:
+        raise Exception(f"Error fetching badges for user {auth_user_id}: {str(e)}")
+    next_cursor = encode_cursor(badges[-1].date_achieved, badges[-1].id) if has_more else None
+    return badges, next_cursor
+
+@routed_by("auth_user_id")
 async def get_badges_count_by_user(db: AsyncSession, auth_user_id: int) -> int:
     """Get the total count of badges for a user."""
     try:
         result = await db.execute(
             select(func.count(Badge.id))
-            .filter(Badge.auth_user_id == auth_user_id)
+            .filter(Badge.user_id == auth_user_id)
         )
-        return await result.scalar_one()
+        return result.scalar_one()
     except Exception as e:
         raise Exception(f"Error counting badges for user {auth_user_id}: {str(e)}")
 
-async def create_user_badge(db: AsyncSession, badge: BadgeCreate, auth_user_id: int):
-    """Create a new badge for a user."""
+@routed_by("auth_user_id")
+async def create_user_badge(db: AsyncSession, badge: BadgeCreate, auth_user_id: int, max_badges: Optional[int] = None):
+    """Create a new badge for a user.
+
+    The user's badge counter is incremented in the same transaction; if
+    `max_badges` is given, CounterLimitReached is raised once it is reached.
+    """
     try:
-        db_badge = Badge(**badge.dict(), auth_user_id=auth_user_id)
-        db.add(db_badge)
+        await user_stats.increment_counter(db, auth_user_id, "badge_count", limit=max_badges)
+        values = {**badge.dict(), "user_id": auth_user_id}
+        if supports_insert_returning(db):
+            # INSERT ... RETURNING hands back the generated columns directly
+            result = await db.execute(insert(Badge).values(**values).returning(Badge))
+            db_badge = result.scalars().one()
+        else:
+            db_badge = Badge(**values)
+            db.add(db_badge)
+            await db.flush()
         await db.commit()
-        await db.refresh(db_badge)
         return db_badge
+    except CounterLimitReached:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
         raise Exception(f"Error creating badge for user {auth_user_id}: {str(e)}")
+
+async def create_badges_bulk(db: AsyncSession, awards: List[BadgeAward], max_badges: Optional[int] = None, known_user_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    """Award many badges at once, returning one result per requested badge.
+
+    Limits are checked against the users' badge counters with a single
+    locking aggregate query, all accepted badges are inserted with one
+    multi-row INSERT, and the counters are bumped in one executemany batch,
+    all in the same transaction. Awards with a blank name, for unknown users
+    (without an auth reference, or outside `known_user_ids` when given) or
+    beyond a user's remaining allowance are rejected individually.
+
+    With sharding, this happens once per shard, each shard committing on its
+    own. If a shard fails, its awards come back with status "failed" rather
+    than failing the whole request, since the other shards' awards are
+    already saved and retrying them would award them twice.
+    """
+    known_user_ids = set(known_user_ids) if known_user_ids is not None else None
+    router = active_router()
+    if router is None:
+        return await _create_badges_bulk(db, list(enumerate(awards)), max_badges, known_user_ids)
+    results = []
+    for group in router.group_by_shard(enumerate(awards), lambda item: item[1].user_id).values():
+        with shard_key(group[0][1].user_id):
+            try:
+                results.extend(await _create_badges_bulk(db, group, max_badges, known_user_ids))
+            except Exception:
+                results.extend(
+                    _bulk_result(index, award, status="failed", error="Could not be saved, retry this award")
+                    for index, award in group
+                )
+    return sorted(results, key=lambda result: result["index"])
+
+def _bulk_result(index: int, award: BadgeAward, status: str = "rejected", error: Optional[str] = None) -> dict:
+    return {"index": index, "user_id": award.user_id, "status": status, "badge": None, "error": error}
+
+async def _create_badges_bulk(db: AsyncSession, indexed_awards: List[Tuple[int, BadgeAward]], max_badges: Optional[int], known_user_ids: Optional[Set[int]] = None) -> List[dict]:
+    """Apply (index, award) pairs whose users all live in the same database."""
+    user_ids = {award.user_id for _, award in indexed_awards}
+    if known_user_ids is not None:
+        user_ids &= known_user_ids
+    results = []
+    accepted = []
+    try:
+        await user_stats.ensure_user_stats_many(db, user_ids)
+        counts = await user_stats.lock_counters(db, user_ids, "badge_count")
+        deltas = {}
+        for index, award in indexed_awards:
+            result = _bulk_result(index, award)
+            if not award.name.strip():
+                result["error"] = "Badge name is required"
+            elif award.user_id not in counts:
+                result["error"] = "User not found"
+            elif max_badges is not None and counts[award.user_id] + deltas.get(award.user_id, 0) >= max_badges:
+                result["error"] = f"Maximum number of badges ({max_badges}) reached"
+            else:
+                deltas[award.user_id] = deltas.get(award.user_id, 0) + 1
+                result["status"] = "created"
+                accepted.append((result, award.dict()))
+            results.append(result)
+        
+        rows = [values for _, values in accepted]
+        if rows:
+            if supports_insert_returning(db):
+                # One multi-row INSERT ... RETURNING, with rows in parameter order
+                created = await db.execute(insert(Badge).returning(Badge, sort_by_parameter_order=True), rows)
+                db_badges = created.scalars().all()
+            else:
+                db_badges = [Badge(**values) for values in rows]
+                db.add_all(db_badges)
+                await db.flush()
+            for (result, _), db_badge in zip(accepted, db_badges):
+                result["badge"] = db_badge
+        await user_stats.add_to_counters(db, "badge_count", deltas)
+        await db.commit()
+        return results
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error creating badges in bulk: {str(e)}")
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.db.dialect import dialect_name
+from app.models.leaderboard_snapshot import LeaderboardSnapshot
+from app.models.user_stats import UserStats
+
+# Advisory lock taken by the one instance writing the snapshot at a time
+LEADERBOARD_SNAPSHOT_LOCK_KEY = 0x4C42534E
+
+async def get_badge_counts(db: AsyncSession) -> List[Tuple[int, int]]:
+    """Get (user_id, badge_count) for every user with at least one badge on the session's database."""
+    try:
+        result = await db.execute(
+            select(UserStats.user_id, UserStats.badge_count).where(UserStats.badge_count > 0)
+        )
+        return [tuple(row) for row in result.all()]
+    except Exception as e:
+        raise Exception(f"Error reading badge counts: {str(e)}")
+
+async def get_leaderboard_snapshot(db: AsyncSession) -> List[Tuple[int, int]]:
+    """Get (user_id, badge_count) for every user in the last leaderboard snapshot."""
+    try:
+        result = await db.execute(select(LeaderboardSnapshot.user_id, LeaderboardSnapshot.badge_count))
+        return [tuple(row) for row in result.all()]
+    except Exception as e:
+        raise Exception(f"Error reading leaderboard snapshot: {str(e)}")
+
+async def _try_lock_snapshot(db: AsyncSession) -> bool:
+    """Take the snapshot writer's lock until the end of the transaction, unless another instance holds it."""
+    if dialect_name(db) != "postgresql":
+        return True
+    result = await db.execute(select(func.pg_try_advisory_xact_lock(LEADERBOARD_SNAPSHOT_LOCK_KEY)))
+    return bool(result.scalar_one())
+
+async def update_leaderboard_snapshot(db: AsyncSession, entries: Iterable[dict]) -> Optional[int]:
+    """Make the snapshot match `entries` (user_id, badge_count, level, rank) in one transaction.
+
+    Only rows that changed are written: users who left the ranking are
+    deleted and new or moved users are upserted. Instances refresh on the
+    same schedule, so whoever holds the advisory lock writes and the
+    others skip this round.
+
+    Returns:
+        Optional[int]: The number of rows written or deleted, or None if another instance is writing.
+    """
+    insert = postgresql.insert if dialect_name(db) == "postgresql" else sqlite.insert
+    try:
+        if not await _try_lock_snapshot(db):
+            await db.rollback()
+            return None
+        result = await db.execute(
+            select(LeaderboardSnapshot.user_id, LeaderboardSnapshot.badge_count, LeaderboardSnapshot.level, LeaderboardSnapshot.rank)
+        )
+        current = {row.user_id: (row.badge_count, row.level, row.rank) for row in result.all()}
+        now = datetime.utcnow()
+        rows = [
+            {**entry, "snapshotted_at": now} for entry in entries
+            if current.pop(entry["user_id"], None) != (entry["badge_count"], entry["level"], entry["rank"])
+        ]
+        if current:
+            await db.execute(delete(LeaderboardSnapshot).where(LeaderboardSnapshot.user_id.in_(list(current))))
+        if rows:
+            statement = insert(LeaderboardSnapshot)
+            await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["user_id"],
+                    set_={column: statement.excluded[column] for column in ("badge_count", "level", "rank", "snapshotted_at")},
+                ),
+                rows,
+            )
+        await db.commit()
+        return len(rows) + len(current)
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error writing leaderboard snapshot: {str(e)}")
@@ -1,22 +1,117 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy.orm import aliased
+from sqlalchemy import bindparam, delete, exists, func, insert, update, or_
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.db.dialect import dialect_name, supports_delete_returning, supports_insert_returning, supports_update_returning
+from app.db.sharding import routed_by
 from app.models.learning_goal import LearningGoal
+from app.models.user_stats import UserStats
 from app.schemas.learning_goal import LearningGoalCreate, LearningGoalUpdate
+from app.crud import user_stats
+from app.crud.pagination import encode_cursor, decode_cursor, split_page
+from app.crud.user_stats import CounterLimitReached
 
-async def get_learning_goals_by_user(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100):
-    """Get learning goals for a user by user ID."""
+# Allowed status changes, keyed by the current status. A goal without a
+# status may move to any status.
+VALID_STATUS_TRANSITIONS: Dict[str, List[str]] = {
+    "not_started": ["in_progress", "completed", "archived"],
+    "in_progress": ["paused", "completed", "archived"],
+    "paused": ["in_progress", "completed", "archived"],
+    "completed": ["archived"],
+    "archived": [],
+}
+
+# Goals in this status cannot be deleted; they are archived instead
+UNDELETABLE_STATUS = "completed"
+
+class InvalidStatusTransition(Exception):
+    """Raised when a learning goal cannot move from its current status to the requested one."""
+
+    def __init__(self, goal_id: int, current_status: Optional[str], new_status: str):
+        self.goal_id = goal_id
+        self.current_status = current_status
+        self.new_status = new_status
+        super().__init__(f"Invalid status transition from {current_status} to {new_status}")
+
+class StaleLearningGoal(Exception):
+    """Raised when a learning goal was changed since the version the caller read."""
+
+    def __init__(self, goal_id: int, expected_version: int, current_version: int):
+        self.goal_id = goal_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(f"Learning goal {goal_id} is at version {current_version}, not {expected_version}")
+
+class LearningGoalNotDeletable(Exception):
+    """Raised when deleting a learning goal is refused because of its status."""
+
+    def __init__(self, goal_id: int, status: str):
+        self.goal_id = goal_id
+        self.status = status
+        super().__init__(f"Learning goal {goal_id} is {status} and cannot be deleted")
+
+def statuses_allowed_to_move_to(new_status: str) -> List[str]:
+    """The current statuses from which a goal may move to `new_status`."""
+    return [current for current, targets in VALID_STATUS_TRANSITIONS.items() if new_status in targets]
+
+# Hot queries are built once at import time and executed with bound
+# parameters, so each call skips constructing the select() and generating
+# its cache key.
+_LEARNING_GOALS_BY_USER = (
+    select(LearningGoal)
+    .filter(LearningGoal.user_id == bindparam("user_id"))
+    .order_by(LearningGoal.id.desc())
+    .limit(bindparam("limit"))
+)
+_LEARNING_GOALS_BY_USER_AFTER_CURSOR = _LEARNING_GOALS_BY_USER.filter(
+    LearningGoal.id < bindparam("goal_id", type_=LearningGoal.id.type)
+)
+_LEARNING_GOAL_BY_ID = select(LearningGoal).filter(
+    LearningGoal.id == bindparam("goal_id"),
+    LearningGoal.user_id == bindparam("user_id")
+)
+
+def decode_learning_goals_cursor(cursor: str) -> Tuple[int]:
+    """Decode a learning goal page cursor, raising InvalidCursorError if it is malformed."""
+    return decode_cursor(cursor, int)
+
+def _learning_goals_by_user_query(user_id: int, limit: int, cursor: Optional[str] = None):
+    """Pick the keyset query and parameters for a user's learning goals, newest first.
+
+    Served by the (user_id, id) index, so every page costs the same regardless
+    of how deep it is.
+    """
+    params = {"user_id": user_id, "limit": limit}
+    if not cursor:
+        return _LEARNING_GOALS_BY_USER, params
+    (goal_id,) = decode_learning_goals_cursor(cursor)
+    return _LEARNING_GOALS_BY_USER_AFTER_CURSOR, {**params, "goal_id": goal_id}
+
+@routed_by("user_id")
+async def get_learning_goals_by_user(db: AsyncSession, user_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """Get learning goals for a user by user ID, newest first."""
+    query, params = _learning_goals_by_user_query(user_id, limit, cursor)
     try:
-        result = await db.execute(
-            select(LearningGoal)
-            .filter(LearningGoal.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-        )
+        result = await db.execute(query, params)
         return result.scalars().all()
     except Exception as e:
         raise Exception(f"Error fetching learning goals for user {user_id}: {str(e)}")
 
+@routed_by("user_id")
+async def get_learning_goals_page_by_user(db: AsyncSession, user_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """Get a page of learning goals for a user along with the cursor for the next page."""
+    query, params = _learning_goals_by_user_query(user_id, limit + 1, cursor)
+    try:
+        result = await db.execute(query, params)
+        goals, has_more = split_page(result.scalars().all(), limit)
+    except Exception as e:
+        raise Exception(f"Error fetching learning goals for user {user_id}: {str(e)}")
+    next_cursor = encode_cursor(goals[-1].id) if has_more else None
+    return goals, next_cursor
+
+@routed_by("user_id")
 async def get_learning_goals_count_by_user(db: AsyncSession, user_id: int) -> int:
     """Get the total count of learning goals for a user."""
     try:
@@ -28,54 +123,235 @@ async def get_learning_goals_count_by_user(db: AsyncSession, user_id: int) -> in
     except Exception as e:
         raise Exception(f"Error counting learning goals for user {user_id}: {str(e)}")
 
-async def create_user_learning_goal(db: AsyncSession, learning_goal: LearningGoalCreate, user_id: int):
-    """Create a new learning goal for a user."""
+@routed_by("user_id")
+async def create_user_learning_goal(db: AsyncSession, learning_goal: LearningGoalCreate, user_id: int, max_goals: Optional[int] = None):
+    """Create a new learning goal for a user.
+
+    The user's goal counter is incremented in the same transaction; if
+    `max_goals` is given, CounterLimitReached is raised once it is reached.
+    """
     try:
-        db_learning_goal = LearningGoal(**learning_goal.dict(), user_id=user_id)
-        db.add(db_learning_goal)
+        await user_stats.increment_counter(db, user_id, "goal_count", limit=max_goals)
+        values = {**learning_goal.dict(), "user_id": user_id}
+        if supports_insert_returning(db):
+            # INSERT ... RETURNING hands back the generated columns directly
+            result = await db.execute(insert(LearningGoal).values(**values).returning(LearningGoal))
+            db_learning_goal = result.scalars().one()
+        else:
+            db_learning_goal = LearningGoal(**values)
+            db.add(db_learning_goal)
+            await db.flush()
         await db.commit()
-        await db.refresh(db_learning_goal)
         return db_learning_goal
+    except CounterLimitReached:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
         raise Exception(f"Error creating learning goal for user {user_id}: {str(e)}")
 
+@routed_by("user_id")
 async def get_learning_goal(db: AsyncSession, goal_id: int, user_id: int):
     """Get a specific learning goal for a user."""
     try:
-        result = await db.execute(
-            select(LearningGoal).filter(
-                LearningGoal.id == goal_id, 
-                LearningGoal.user_id == user_id
-            )
-        )
+        result = await db.execute(_LEARNING_GOAL_BY_ID, {"goal_id": goal_id, "user_id": user_id})
         return result.scalars().first()
     except Exception as e:
         raise Exception(f"Error fetching learning goal {goal_id} for user {user_id}: {str(e)}")
 
+@routed_by("user_id")
 async def update_learning_goal(db: AsyncSession, goal_id: int, user_id: int, learning_goal: LearningGoalUpdate):
-    """Update a learning goal for a user."""
+    """Update a learning goal for a user as a single compare-and-set.
+
+    The goal's ownership, the status transition and, when `learning_goal.version`
+    is given, the expected version are all checked in the UPDATE's WHERE
+    clause, and every successful update bumps the version. Returns None if
+    the goal does not exist. Raises InvalidStatusTransition or
+    StaleLearningGoal when the goal exists but the update was refused; that
+    lookup only happens when the UPDATE matched no row.
+    """
     try:
+        update_data = learning_goal.dict(exclude_unset=True)
+        expected_version = update_data.pop("version", None)
+        conditions = [LearningGoal.id == goal_id, LearningGoal.user_id == user_id]
+        if expected_version is not None:
+            conditions.append(LearningGoal.version == expected_version)
+        if not update_data:
+            db_learning_goal = await get_learning_goal(db, goal_id, user_id)
+            _check_version(db_learning_goal, expected_version)
+            return db_learning_goal
+        new_status = update_data.get("status")
+        if new_status is not None:
+            # Starts the clock for moving terminal goals to the archive
+            update_data["status_changed_at"] = datetime.utcnow()
+            conditions.append(or_(LearningGoal.status.is_(None), LearningGoal.status.in_(statuses_allowed_to_move_to(new_status))))
+        if dialect_name(db) == "postgresql":
+            # The update and the owner's list version bump are one statement
+            result = await db.execute(_update_learning_goal_statement(conditions, update_data, user_id))
+            db_learning_goal = result.scalars().first()
+        elif supports_update_returning(db):
+            # UPDATE ... RETURNING checks, writes and reads back the row in one statement
+            result = await db.execute(_update_statement(conditions, update_data).returning(LearningGoal))
+            db_learning_goal = result.scalars().first()
+        else:
+            result = await db.execute(_update_statement(conditions, update_data))
+            db_learning_goal = await get_learning_goal(db, goal_id, user_id) if result.rowcount else None
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error updating learning goal {goal_id} for user {user_id}: {str(e)}")
+    if db_learning_goal is None:
+        # Nothing matched; find out why so the caller can report it
         db_learning_goal = await get_learning_goal(db, goal_id, user_id)
-        if db_learning_goal:
-            update_data = learning_goal.dict(exclude_unset=True)
-            for key, value in update_data.items():
-                setattr(db_learning_goal, key, value)
-            await db.commit()
-            await db.refresh(db_learning_goal)
-        return db_learning_goal
+        if db_learning_goal is None:
+            return None
+        _check_version(db_learning_goal, expected_version)
+        if new_status is None:
+            # Only the version can have refused the update; it moved on in between
+            raise StaleLearningGoal(goal_id, expected_version, db_learning_goal.version)
+        raise InvalidStatusTransition(goal_id, db_learning_goal.status, new_status)
+    try:
+        await db.commit()
     except Exception as e:
         await db.rollback()
         raise Exception(f"Error updating learning goal {goal_id} for user {user_id}: {str(e)}")
+    return db_learning_goal
+
+def _update_statement(conditions, update_data: dict):
+    """UPDATE applying `update_data` to the goal matched by `conditions` and bumping its version.
+
+    On SQLite a trigger bumps the owner's user_stats.version in the same
+    statement (see app.models.user_stats).
+    """
+    return (
+        update(LearningGoal)
+        .where(*conditions)
+        .values(**update_data, version=LearningGoal.version + 1)
+        .execution_options(synchronize_session=False)
+    )
 
+def _update_learning_goal_statement(conditions, update_data: dict, user_id: int):
+    """One PostgreSQL statement that updates a goal and bumps its owner's list version.
+
+    The `updated` CTE applies the compare-and-set update and `stats` bumps
+    user_stats.version only if it matched. The result is the updated goal,
+    or no row if the update was refused.
+    """
+    table = LearningGoal.__table__
+    updated = (
+        update(table)
+        .where(*conditions)
+        .values(**update_data, version=table.c.version + 1)
+        .returning(*table.c)
+        .cte("updated")
+    )
+    stats = (
+        update(UserStats.__table__)
+        .where(UserStats.user_id == user_id, exists(select(updated.c.id)))
+        .values(version=UserStats.version + 1, updated_at=datetime.utcnow())
+        .cte("stats")
+    )
+    return select(aliased(LearningGoal, updated)).add_cte(stats)
+
+def _check_version(db_learning_goal, expected_version: Optional[int]) -> None:
+    """Raise StaleLearningGoal if the goal is not at the version the caller expects."""
+    if db_learning_goal is not None and expected_version is not None and db_learning_goal.version != expected_version:
+        raise StaleLearningGoal(db_learning_goal.id, expected_version, db_learning_goal.version)
+
+def _deletable(goal_id: int, user_id: int):
+    """WHERE clause matching a user's goal only while it may be deleted."""
+    return (
+        LearningGoal.id == goal_id,
+        LearningGoal.user_id == user_id,
+        LearningGoal.status.is_distinct_from(UNDELETABLE_STATUS),
+    )
+
+def _delete_learning_goal_statement(goal_id: int, user_id: int):
+    """One PostgreSQL statement that deletes a goal, decrements the goal counter
+    and reports whether the goal existed.
+
+    The `target` CTE finds the goal regardless of status, `deleted` removes it
+    only if its status allows, and `stats` decrements the counter only if
+    something was deleted. The result has no row if the goal does not exist,
+    and a row with NULL deleted columns if its status refused the delete.
+    """
+    table = LearningGoal.__table__
+    target = (
+        select(LearningGoal.id, LearningGoal.status)
+        .where(LearningGoal.id == goal_id, LearningGoal.user_id == user_id)
+        .cte("target")
+    )
+    deleted = (
+        delete(table)
+        .where(table.c.id.in_(select(target.c.id)), table.c.status.is_distinct_from(UNDELETABLE_STATUS))
+        .returning(*table.c)
+        .cte("deleted")
+    )
+    stats = (
+        update(UserStats.__table__)
+        .where(UserStats.user_id == user_id, exists(select(deleted.c.id)))
+        .values(
+            goal_count=user_stats.decremented(UserStats.goal_count),
+            version=UserStats.version + 1,
+            updated_at=datetime.utcnow(),
+        )
+        .cte("stats")
+    )
+    return (
+        select(target.c.status.label("current_status"), *deleted.c)
+        .select_from(target.outerjoin(deleted, deleted.c.id == target.c.id))
+        .add_cte(stats)
+    )
+
+@routed_by("user_id")
 async def delete_learning_goal(db: AsyncSession, goal_id: int, user_id: int):
-    """Delete a learning goal for a user."""
+    """Delete a learning goal for a user.
+
+    The status check is part of the DELETE's WHERE clause. On PostgreSQL the
+    delete, the goal counter decrement and the not-found/forbidden distinction
+    are a single statement; elsewhere the goal is only read back when the
+    DELETE matched nothing. Returns the deleted goal, or None if it does not
+    exist; raises LearningGoalNotDeletable if its status forbids deleting it.
+    """
     try:
-        db_learning_goal = await get_learning_goal(db, goal_id, user_id)
-        if db_learning_goal:
-            await db.delete(db_learning_goal)
-            await db.commit()
+        if dialect_name(db) == "postgresql":
+            result = await db.execute(_delete_learning_goal_statement(goal_id, user_id))
+            row = result.mappings().first()
+            if row is None:
+                return None
+            if row["id"] is None:
+                raise LearningGoalNotDeletable(goal_id, row["current_status"])
+            db_learning_goal = LearningGoal(**{column.key: row[column.key] for column in LearningGoal.__table__.c})
+        else:
+            if supports_delete_returning(db):
+                result = await db.execute(
+                    delete(LearningGoal)
+                    .where(*_deletable(goal_id, user_id))
+                    .returning(LearningGoal)
+                    .execution_options(synchronize_session=False)
+                )
+                db_learning_goal = result.scalars().first()
+            else:
+                db_learning_goal = await get_learning_goal(db, goal_id, user_id)
+                if db_learning_goal is not None:
+                    result = await db.execute(
+                        delete(LearningGoal)
+                        .where(*_deletable(goal_id, user_id))
+                        .execution_options(synchronize_session=False)
+                    )
+                    if not result.rowcount:
+                        db_learning_goal = None
+            if db_learning_goal is None:
+                # Nothing was deleted; find out why so the caller can report it
+                existing_goal = await get_learning_goal(db, goal_id, user_id)
+                if existing_goal is None:
+                    return None
+                raise LearningGoalNotDeletable(goal_id, existing_goal.status)
+            await user_stats.decrement_counter(db, user_id, "goal_count")
+        await db.commit()
         return db_learning_goal
+    except LearningGoalNotDeletable:
+        await db.rollback()
+        raise
     except Exception as e:
         await db.rollback()
-        raise Exception(f"Error deleting learning goal {goal_id} for user {user_id}: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error deleting learning goal {goal_id} for user {user_id}: {str(e)}")
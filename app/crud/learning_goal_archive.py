@@ -0,0 +1,81 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import bindparam, delete, insert, literal
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from app.db.sharding import routed_by
+from app.models.learning_goal import LearningGoal
+from app.models.learning_goal_archive import LearningGoalArchive
+from app.crud import user_stats
+from app.crud.pagination import encode_cursor, decode_cursor, split_page
+
+# Columns copied from learning_goals into learning_goals_archive
+ARCHIVED_COLUMNS = ("id", "title", "description", "status", "streak_count", "version", "status_changed_at", "user_id")
+
+_ARCHIVED_GOALS_BY_USER = (
+    select(LearningGoalArchive)
+    .filter(LearningGoalArchive.user_id == bindparam("user_id"))
+    .order_by(LearningGoalArchive.id.desc())
+    .limit(bindparam("limit"))
+)
+_ARCHIVED_GOALS_BY_USER_AFTER_CURSOR = _ARCHIVED_GOALS_BY_USER.filter(
+    LearningGoalArchive.id < bindparam("goal_id", type_=LearningGoalArchive.id.type)
+)
+
+@routed_by("user_id")
+async def get_archived_learning_goals_page_by_user(db: AsyncSession, user_id: int, limit: int = 100, cursor: Optional[str] = None):
+    """Get a page of a user's archived learning goals, newest first, and the cursor for the next page."""
+    params = {"user_id": user_id, "limit": limit + 1}
+    query = _ARCHIVED_GOALS_BY_USER
+    if cursor:
+        (goal_id,) = decode_cursor(cursor, int)
+        query, params = _ARCHIVED_GOALS_BY_USER_AFTER_CURSOR, {**params, "goal_id": goal_id}
+    try:
+        result = await db.execute(query, params)
+        goals, has_more = split_page(result.scalars().all(), limit)
+    except Exception as e:
+        raise Exception(f"Error fetching archived learning goals for user {user_id}: {str(e)}")
+    next_cursor = encode_cursor(goals[-1].id) if has_more else None
+    return goals, next_cursor
+
+async def archive_learning_goals(db: AsyncSession, statuses: Iterable[str], changed_before: datetime, batch_size: int = 500) -> Dict[int, int]:
+    """Move one batch of goals that entered one of `statuses` before `changed_before` to the archive.
+
+    The batch is copied and then deleted from learning_goals in one
+    transaction, and the owners' goal counters are lowered to match. On
+    PostgreSQL the batch is claimed with FOR UPDATE SKIP LOCKED so
+    concurrent archivers work on different rows. Must be called with a
+    session bound to a single database (a shard or the primary).
+
+    Returns:
+        Dict[int, int]: The number of goals archived per user; empty once nothing is left.
+    """
+    try:
+        result = await db.execute(
+            select(LearningGoal.id, LearningGoal.user_id)
+            .where(LearningGoal.status.in_(list(statuses)), LearningGoal.status_changed_at < changed_before)
+            .order_by(LearningGoal.status_changed_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        batch = result.all()
+        if not batch:
+            return {}
+        goal_ids = [goal_id for goal_id, _ in batch]
+        columns = [getattr(LearningGoal, name) for name in ARCHIVED_COLUMNS]
+        await db.execute(
+            insert(LearningGoalArchive).from_select(
+                [*ARCHIVED_COLUMNS, "archived_at"],
+                select(*columns, literal(datetime.utcnow())).where(LearningGoal.id.in_(goal_ids)),
+            )
+        )
+        await db.execute(delete(LearningGoal).where(LearningGoal.id.in_(goal_ids)).execution_options(synchronize_session=False))
+        archived: Dict[int, int] = {}
+        for _, user_id in batch:
+            archived[user_id] = archived.get(user_id, 0) + 1
+        await user_stats.add_to_counters(db, "goal_count", {user_id: -count for user_id, count in archived.items()})
+        await db.commit()
+        return archived
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error archiving learning goals: {str(e)}")
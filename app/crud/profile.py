@@ -0,0 +1,179 @@
+import json
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, exists, literal_column, JSON
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from app.db.dialect import dialect_name
+from app.db.sharding import active_router, routed_by, shard_key
+from app.models.auth_user_reference import AuthUserReference
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.models.user_stats import UserStats
+
+BADGE_FIELDS = ("id", "name", "description", "icon_url", "date_achieved", "user_id")
+LEARNING_GOAL_FIELDS = ("id", "title", "description", "status", "streak_count", "user_id")
+
+def _json_object_args(columns, fields):
+    """Flatten columns into the key/value argument list of json_build_object/json_object."""
+    args = []
+    for field in fields:
+        args.extend([field, columns[field]])
+    return args
+
+def _postgres_json_list(model, fields, user_id: int, order_by):
+    """Aggregate a user's rows into an ordered JSON array with json_agg."""
+    row = func.json_build_object(*_json_object_args(model.__table__.c, fields))
+    aggregated = func.json_agg(aggregate_order_by(row, *order_by))
+    return (
+        select(func.coalesce(aggregated, literal_column("'[]'::json"), type_=JSON))
+        .where(model.user_id == user_id)
+        .scalar_subquery()
+    )
+
+def _sqlite_json_list(model, fields, user_id: int, order_by):
+    """Aggregate a user's rows into an ordered JSON array with json_group_array."""
+    ordered = select(model.__table__).where(model.user_id == user_id).order_by(*order_by).subquery()
+    row = func.json_object(*_json_object_args(ordered.c, fields))
+    return select(func.json_group_array(row, type_=JSON)).scalar_subquery()
+
+def _user_stat(column, user_id: int):
+    """Read one counter from the user's user_stats row."""
+    return select(column).where(UserStats.user_id == user_id).scalar_subquery()
+
+def _load_json_list(value):
+    """Normalize an aggregated JSON array coming back from the driver."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+def _normalize_datetimes(rows, field):
+    """Render timestamps the same way regardless of the backend's JSON formatting."""
+    for row in rows:
+        if row.get(field):
+            row[field] = datetime.fromisoformat(row[field]).isoformat()
+    return rows
+
+@routed_by("user_id")
+async def get_profile_data(db: AsyncSession, user_id: int) -> dict:
+    """Load a user's badges, learning goals and their counters in a single round trip.
+
+    The lists are aggregated to JSON inside the database (json_agg on
+    PostgreSQL, json_group_array on SQLite) so the result is ready to
+    serialize without hydrating ORM objects.
+    """
+    badge_order = (Badge.date_achieved.desc(), Badge.id.desc())
+    goal_order = (LearningGoal.id.desc(),)
+    json_list = _postgres_json_list if dialect_name(db) == "postgresql" else _sqlite_json_list
+    badges = json_list(Badge, BADGE_FIELDS, user_id, badge_order)
+    goals = json_list(LearningGoal, LEARNING_GOAL_FIELDS, user_id, goal_order)
+    reference_exists = exists().where(AuthUserReference.id == user_id)
+    try:
+        result = await db.execute(
+            select(
+                reference_exists.label("reference_exists"),
+                badges.label("badges"),
+                goals.label("learning_goals"),
+                _user_stat(UserStats.badge_count, user_id).label("total_badges"),
+                _user_stat(UserStats.goal_count, user_id).label("total_goals"),
+            )
+        )
+        row = result.one()
+    except Exception as e:
+        raise Exception(f"Error fetching profile for user {user_id}: {str(e)}")
+    badge_list = _normalize_datetimes(_load_json_list(row.badges), "date_achieved")
+    goal_list = _load_json_list(row.learning_goals)
+    return {
+        "reference_exists": bool(row.reference_exists),
+        "badges": badge_list,
+        "learning_goals": goal_list,
+        "total_badges": row.total_badges or 0,
+        "total_goals": row.total_goals or 0,
+    }
+
+async def get_profiles_data(db: AsyncSession, user_ids: List[int]) -> Dict[int, dict]:
+    """Load many users' badges, learning goals and counters, keyed by user ID.
+
+    Each table is read once for all the users with a `user_id IN (...)`
+    query, instead of once per user. With sharding, this happens once per
+    shard. Every requested user gets an entry, empty if they have no data.
+    """
+    router = active_router()
+    if router is None:
+        return await _get_profiles_data(db, user_ids)
+    profiles = {}
+    for group in router.group_by_shard(user_ids, lambda user_id: user_id).values():
+        with shard_key(group[0]):
+            profiles.update(await _get_profiles_data(db, group))
+    return profiles
+
+async def _get_profiles_data(db: AsyncSession, user_ids: List[int]) -> Dict[int, dict]:
+    """Load the profiles of users who all live in the same database."""
+    profiles = {
+        user_id: {"reference_exists": False, "badges": [], "learning_goals": [], "total_badges": 0, "total_goals": 0}
+        for user_id in user_ids
+    }
+    badge_columns = [Badge.__table__.c[field] for field in BADGE_FIELDS]
+    goal_columns = [LearningGoal.__table__.c[field] for field in LEARNING_GOAL_FIELDS]
+    try:
+        references = await db.execute(
+            select(AuthUserReference.id, UserStats.badge_count, UserStats.goal_count)
+            .outerjoin(UserStats, UserStats.user_id == AuthUserReference.id)
+            .where(AuthUserReference.id.in_(user_ids))
+        )
+        for user_id, badge_count, goal_count in references.all():
+            profiles[user_id].update(reference_exists=True, total_badges=badge_count or 0, total_goals=goal_count or 0)
+        badges = await db.execute(
+            select(*badge_columns)
+            .where(Badge.user_id.in_(user_ids))
+            .order_by(Badge.user_id, Badge.date_achieved.desc(), Badge.id.desc())
+        )
+        for badge in badges.mappings():
+            profiles[badge["user_id"]]["badges"].append(dict(badge))
+        goals = await db.execute(
+            select(*goal_columns)
+            .where(LearningGoal.user_id.in_(user_ids))
+            .order_by(LearningGoal.user_id, LearningGoal.id.desc())
+        )
+        for goal in goals.mappings():
+            profiles[goal["user_id"]]["learning_goals"].append(dict(goal))
+    except Exception as e:
+        raise Exception(f"Error fetching profiles for {len(user_ids)} users: {str(e)}")
+    return profiles
+
+@routed_by("user_id")
+async def auth_user_reference_exists(db: AsyncSession, user_id: int) -> bool:
+    """Whether the auth user reference for `user_id` exists."""
+    try:
+        result = await db.execute(select(exists().where(AuthUserReference.id == user_id)))
+        return bool(result.scalar())
+    except Exception as e:
+        raise Exception(f"Error checking the auth user reference of user {user_id}: {str(e)}")
+
+async def ensure_auth_user_references(db: AsyncSession, user_ids: List[int]) -> None:
+    """Create the missing auth user references for `user_ids` and commit.
+
+    One insert per shard; references that already exist are left alone,
+    so concurrent backfills of the same users do not conflict.
+    """
+    if not user_ids:
+        return
+    insert = postgresql.insert if dialect_name(db) == "postgresql" else sqlite.insert
+    router = active_router()
+    groups = router.group_by_shard(user_ids, lambda user_id: user_id).values() if router else [user_ids]
+    try:
+        for group in groups:
+            with shard_key(group[0]):
+                await db.execute(
+                    insert(AuthUserReference)
+                    .values([{"id": user_id} for user_id in group])
+                    .on_conflict_do_nothing(index_elements=["id"])
+                )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Error creating auth user references for {len(user_ids)} users: {str(e)}")
@@ -1,12 +1,18 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import bindparam, insert, update
+from app.db.dialect import supports_insert_returning, supports_update_returning
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from typing import List, Optional
+from app.crud.pagination import encode_cursor, decode_cursor, split_page
+from typing import List, Optional, Tuple
+
+# Built once at import time and executed with bound parameters
+_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
 
 async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
     """Get a user by ID"""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await db.execute(_USER_BY_ID, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
@@ -14,36 +20,69 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     result = await db.execute(select(User).where(User.username == username))
     return result.scalar_one_or_none()
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+def _users_query(limit: int, cursor: Optional[str] = None):
+    """Build the keyset query for users in ID order"""
+    query = select(User).order_by(User.id).limit(limit)
+    if cursor:
+        (user_id,) = decode_cursor(cursor, int)
+        query = query.where(User.id > user_id)
+    return query
+
+async def get_users(db: AsyncSession, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
     """Get a list of users"""
-    result = await db.execute(select(User).offset(skip).limit(limit))
+    result = await db.execute(_users_query(limit, cursor))
     return result.scalars().all()
 
+async def get_users_page(db: AsyncSession, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[User], Optional[str]]:
+    """Get a page of users along with the cursor for the next page"""
+    result = await db.execute(_users_query(limit + 1, cursor))
+    users, has_more = split_page(result.scalars().all(), limit)
+    next_cursor = encode_cursor(users[-1].id) if has_more else None
+    return users, next_cursor
+
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Create a new user from message queue event"""
-    db_user = User(
-        id=user.id,
-        username=user.username
-    )
-    db.add(db_user)
+    if supports_insert_returning(db):
+        result = await db.execute(
+            insert(User).values(id=user.id, username=user.username).returning(User)
+        )
+        db_user = result.scalars().one()
+    else:
+        db_user = User(
+            id=user.id,
+            username=user.username
+        )
+        db.add(db_user)
+        await db.flush()
     await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 async def update_user(db: AsyncSession, user_id: int, user: UserUpdate) -> Optional[User]:
     """Update a user"""
-    # First get the user to update
-    db_user = await get_user(db, user_id)
-    if not db_user:
-        return None
-    
-    # Update the user fields
     update_data = user.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_user, key, value)
+    if not update_data:
+        return await get_user(db, user_id)
+    
+    if supports_update_returning(db):
+        # Update and read back the user in one statement
+        result = await db.execute(
+            update(User).where(User.id == user_id).values(**update_data).returning(User)
+        )
+        db_user = result.scalar_one_or_none()
+        if not db_user:
+            return None
+    else:
+        # First get the user to update
+        db_user = await get_user(db, user_id)
+        if not db_user:
+            return None
+        
+        # Update the user fields
+        for key, value in update_data.items():
+            setattr(db_user, key, value)
+        await db.flush()
     
     await db.commit()
-    await db.refresh(db_user)
     return db_user
 
 async def delete_user(db: AsyncSession, user_id: int) -> bool:
@@ -0,0 +1,159 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import update, bindparam, case, exists, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.db.dialect import dialect_name
+from app.db.sharding import routed_by
+from app.models.auth_user_reference import AuthUserReference
+from app.models.user_stats import UserStats
+
+class CounterLimitReached(Exception):
+    """Raised when a conditional counter increment would exceed its limit."""
+
+    def __init__(self, user_id: int, counter: str, limit: int):
+        self.user_id = user_id
+        self.counter = counter
+        self.limit = limit
+        super().__init__(f"User {user_id} reached the {counter} limit of {limit}")
+
+@routed_by("user_id")
+async def get_user_stats(db: AsyncSession, user_id: int) -> Optional[UserStats]:
+    """Get the counters row for a user."""
+    try:
+        result = await db.execute(select(UserStats).filter(UserStats.user_id == user_id))
+        return result.scalars().first()
+    except Exception as e:
+        raise Exception(f"Error fetching stats for user {user_id}: {str(e)}")
+
+@routed_by("user_id")
+async def ensure_user_stats(db: AsyncSession, user_id: int) -> None:
+    """Create the counters row for a user if it does not exist yet. Does not commit."""
+    insert = postgresql.insert if dialect_name(db) == "postgresql" else sqlite.insert
+    await db.execute(
+        insert(UserStats)
+        .values(user_id=user_id, badge_count=0, goal_count=0, updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+async def ensure_user_stats_many(db: AsyncSession, user_ids: Iterable[int]) -> None:
+    """Create the counters rows for every known user in `user_ids` in one statement. Does not commit.
+
+    Only users that have an auth reference get a row, so unknown IDs are
+    simply skipped.
+    """
+    insert = postgresql.insert if dialect_name(db) == "postgresql" else sqlite.insert
+    known_users = select(
+        AuthUserReference.id, literal(0), literal(0), literal(datetime.utcnow())
+    ).where(AuthUserReference.id.in_(list(user_ids)))
+    await db.execute(
+        insert(UserStats)
+        .from_select(["user_id", "badge_count", "goal_count", "updated_at"], known_users)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+
+async def lock_counters(db: AsyncSession, user_ids: Iterable[int], counter: str) -> Dict[int, int]:
+    """Read one counter for many users, locking their rows until the transaction ends.
+
+    Users without a counters row are absent from the result.
+    """
+    column = getattr(UserStats, counter)
+    result = await db.execute(
+        select(UserStats.user_id, column)
+        .where(UserStats.user_id.in_(list(user_ids)))
+        .with_for_update()
+    )
+    return {user_id: value for user_id, value in result.all()}
+
+async def add_to_counters(db: AsyncSession, counter: str, deltas: Dict[int, int]) -> None:
+    """Add a per-user delta to a counter for many users in one executemany batch. Does not commit."""
+    if not deltas:
+        return
+    table = UserStats.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.user_id == bindparam("b_user_id"))
+        .values({counter: table.c[counter] + bindparam("b_delta"), "version": table.c.version + 1, "updated_at": datetime.utcnow()}),
+        [{"b_user_id": user_id, "b_delta": delta} for user_id, delta in deltas.items()],
+    )
+
+async def _adjust_counter(db: AsyncSession, user_id: int, counter: str, delta: int, limit: Optional[int] = None) -> bool:
+    """Atomically add `delta` to a counter, refusing to go past `limit`. Does not commit."""
+    column = getattr(UserStats, counter)
+    statement = (
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values({counter: column + delta, "version": UserStats.version + 1, "updated_at": datetime.utcnow()})
+        .execution_options(synchronize_session=False)
+    )
+    if limit is not None:
+        statement = statement.where(column + delta <= limit)
+    result = await db.execute(statement)
+    return result.rowcount > 0
+
+@routed_by("user_id")
+async def increment_counter(db: AsyncSession, user_id: int, counter: str, limit: Optional[int] = None) -> None:
+    """Increment a user's counter in the current transaction.
+
+    The limit check and the increment are one conditional UPDATE, so
+    concurrent creates cannot both slip under the limit. The counters row
+    is only created when the first UPDATE finds nothing to update.
+    """
+    if await _adjust_counter(db, user_id, counter, 1, limit):
+        return
+    await ensure_user_stats(db, user_id)
+    if not await _adjust_counter(db, user_id, counter, 1, limit):
+        raise CounterLimitReached(user_id, counter, limit)
+
+@routed_by("user_id")
+async def decrement_counter(db: AsyncSession, user_id: int, counter: str) -> None:
+    """Decrement a user's counter in the current transaction, never going below zero."""
+    column = getattr(UserStats, counter)
+    await db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values({counter: decremented(column), "version": UserStats.version + 1, "updated_at": datetime.utcnow()})
+        .execution_options(synchronize_session=False)
+    )
+
+def decremented(column):
+    """SQL expression for a counter decremented by one, never going below zero."""
+    return case((column > 0, column - 1), else_=0)
+
+@routed_by("user_id")
+async def get_version(db: AsyncSession, user_id: int) -> int:
+    """Get the version stamp of a user's badges and goals (0 before their first write)."""
+    try:
+        result = await db.execute(select(UserStats.version).where(UserStats.user_id == user_id))
+        return result.scalar_one_or_none() or 0
+    except Exception as e:
+        raise Exception(f"Error fetching the version of user {user_id}: {str(e)}")
+
+@routed_by("user_id")
+async def get_version_and_reference(db: AsyncSession, user_id: int) -> Tuple[int, bool]:
+    """Get a user's version stamp and whether their auth reference exists, in one query."""
+    try:
+        result = await db.execute(
+            select(
+                select(UserStats.version).where(UserStats.user_id == user_id).scalar_subquery(),
+                exists().where(AuthUserReference.id == user_id),
+            )
+        )
+        version, reference_exists = result.one()
+        return version or 0, bool(reference_exists)
+    except Exception as e:
+        raise Exception(f"Error fetching the version of user {user_id}: {str(e)}")
+
+async def get_recently_active_users(db: AsyncSession, limit: int) -> List[Tuple[int, datetime]]:
+    """Get the users whose badges or goals changed most recently, newest first, with when they changed."""
+    try:
+        result = await db.execute(
+            select(UserStats.user_id, UserStats.updated_at)
+            .where(UserStats.updated_at.is_not(None))
+            .order_by(UserStats.updated_at.desc())
+            .limit(limit)
+        )
+        return [(user_id, updated_at) for user_id, updated_at in result.all()]
+    except Exception as e:
+        raise Exception(f"Error fetching recently active users: {str(e)}")
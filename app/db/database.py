@@ -1,16 +1,63 @@
+import time
+from typing import Dict, Iterable, Set
+from fastapi import Request
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.cache import cache
 from app.core.settings import settings
+from app.db.pool_metrics import InstrumentedAsyncAdaptedQueuePool
+from app.db.query_stats import instrument_engine
+from app.db.slow_queries import SlowQueryLog
+from app.db.sharding import ShardRouter, ShardRoutingSession, configure as configure_sharding
+
+def _connect_args(url: str) -> dict:
+    """Driver-specific connection arguments for a database URL."""
+    if make_url(url).drivername == "postgresql+asyncpg":
+        # Server-side prepared statements are cached per connection by asyncpg
+        return {"prepared_statement_cache_size": settings.DATABASE_PREPARED_STATEMENT_CACHE_SIZE}
+    return {}
+
+def create_engine_for(url: str):
+    """Create an async engine with the service's connection pool settings."""
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        connect_args=_connect_args(url),
+        echo=False  # Set to True for SQL debugging
+    )
+    # Count statements and database time per request (see app.db.query_stats)
+    instrument_engine(engine)
+    # Log slow statements with their origin, and sample their plans
+    if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+        SlowQueryLog(engine, settings.SLOW_QUERY_THRESHOLD_MS / 1000, settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE).attach()
+    return engine
 
 # Create async engine with connection pooling
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
-    pool_recycle=settings.DATABASE_POOL_RECYCLE,
-    echo=False  # Set to True for SQL debugging
+engine = create_engine_for(settings.DATABASE_URL)
+
+# Create a separate engine for the read replica, if one is configured.
+# Without DATABASE_READ_URL all reads go to the primary.
+read_engine = create_engine_for(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else engine
+
+# Per-user tables are spread over DATABASE_SHARD_URLS when it is set;
+# otherwise they live on the primary with everything else.
+shard_router = (
+    ShardRouter.from_urls(settings.DATABASE_SHARD_URLS, create_engine_for, settings.DATABASE_SHARD_VNODES)
+    if settings.DATABASE_SHARD_URLS else None
 )
+configure_sharding(shard_router)
+
+# Engines whose pools are reported by the metrics endpoint
+engines = {"primary": engine}
+if read_engine is not engine:
+    engines["replica"] = read_engine
+if shard_router is not None:
+    engines.update({f"shard:{name}": shard_engine for name, shard_engine in shard_router.engines.items()})
 
 # Create session factory
 SessionLocal = sessionmaker(
@@ -18,21 +65,96 @@ SessionLocal = sessionmaker(
     autoflush=False, 
     bind=engine, 
     class_=AsyncSession,
+    sync_session_class=ShardRoutingSession,  # Sends per-user tables to their shard
     expire_on_commit=False  # Prevents lazy loading issues after commit
 )
 
+# Create session factory for the read replica
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=read_engine,
+    class_=AsyncSession,
+    sync_session_class=ShardRoutingSession,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 # Create a sync engine for alembic migrations
 sync_engine = engine.sync_engine
 
+# Users who wrote recently, mapped to the monotonic time until which their
+# reads must stay on the primary (read-your-writes). Writes are also marked
+# in the shared cache, so that with CACHE_BACKEND=redis the next read is
+# pinned to the primary whichever instance serves it; this map answers for
+# the writing instance without a round trip.
+_recent_writes: Dict[int, float] = {}
+_RECENT_WRITES_PRUNE_SIZE = 10000
+
+def _recent_write_key(user_id: int) -> str:
+    return f"recent-write:{user_id}"
+
+async def mark_user_writes(user_ids: Iterable[int]) -> None:
+    """Record writes by users so their next reads, on any instance, are served by the primary."""
+    user_ids = list(user_ids)
+    now = time.monotonic()
+    if len(_recent_writes) >= _RECENT_WRITES_PRUNE_SIZE:
+        for stale_user_id in [uid for uid, deadline in _recent_writes.items() if deadline <= now]:
+            del _recent_writes[stale_user_id]
+    for user_id in user_ids:
+        _recent_writes[user_id] = now + settings.DATABASE_READ_YOUR_WRITES_SECONDS
+    if user_ids:
+        await cache.set_many({_recent_write_key(user_id): b"1" for user_id in user_ids}, settings.DATABASE_READ_YOUR_WRITES_SECONDS)
+
+async def mark_user_write(user_id: int) -> None:
+    """Record a write by a user so their next reads, on any instance, are served by the primary."""
+    await mark_user_writes([user_id])
+
+async def should_read_from_primary(user_id: int) -> bool:
+    """Whether a user wrote recently enough that the replica may not have caught up."""
+    deadline = _recent_writes.get(user_id)
+    if deadline is not None:
+        if deadline > time.monotonic():
+            return True
+        _recent_writes.pop(user_id, None)
+    return await cache.get(_recent_write_key(user_id)) is not None
+
+async def users_reading_from_primary(user_ids: Iterable[int]) -> Set[int]:
+    """The users among `user_ids` who wrote recently, with one shared cache lookup."""
+    now = time.monotonic()
+    user_ids = list(user_ids)
+    recent = {user_id for user_id in user_ids if _recent_writes.get(user_id, 0) > now}
+    others = [user_id for user_id in user_ids if user_id not in recent]
+    if others:
+        marked = await cache.get_many([_recent_write_key(user_id) for user_id in others])
+        recent.update(user_id for user_id in others if _recent_write_key(user_id) in marked)
+    return recent
+
 async def get_db():
     """
     Dependency to get a database session.
     
     This function provides a database session that is properly managed
     with async context management. The session is automatically closed
-    when the request is completed.
+    when the request is completed. It only checks out a pooled connection
+    when the first statement runs, so a request that is answered or
+    rejected before querying never touches the pool.
     """
     async with SessionLocal() as session:
         yield session
+
+async def get_read_db(request: Request):
+    """
+    Dependency to get a database session for read-only requests.
+    
+    The session is bound to the read replica, unless the user named by the
+    `auth_user_id` path parameter wrote recently, in which case it is bound
+    to the primary so they always see their own writes.
+    """
+    auth_user_id = request.path_params.get("auth_user_id")
+    session_factory = ReadSessionLocal
+    if auth_user_id is not None and auth_user_id.isdigit() and await should_read_from_primary(int(auth_user_id)):
+        session_factory = SessionLocal
+    async with session_factory() as session:
+        yield session
@@ -0,0 +1,21 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_name(db: AsyncSession) -> str:
+    """Return the name of the SQL dialect the session is bound to (e.g. 'postgresql', 'sqlite')."""
+    return db.bind.dialect.name
+
+
+def supports_insert_returning(db: AsyncSession) -> bool:
+    """Whether the bound backend supports INSERT ... RETURNING."""
+    return db.bind.dialect.insert_returning
+
+
+def supports_update_returning(db: AsyncSession) -> bool:
+    """Whether the bound backend supports UPDATE ... RETURNING."""
+    return db.bind.dialect.update_returning
+
+
+def supports_delete_returning(db: AsyncSession) -> bool:
+    """Whether the bound backend supports DELETE ... RETURNING."""
+    return db.bind.dialect.delete_returning
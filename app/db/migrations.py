@@ -0,0 +1,52 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import FrozenSet
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+class SchemaRevisionError(RuntimeError):
+    """Raised when the database schema is not at the revision this code expects."""
+
+
+@lru_cache(maxsize=1)
+def expected_revisions() -> FrozenSet[str]:
+    """The head revision(s) of the alembic scripts shipped with this code."""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+async def current_revisions(engine: AsyncEngine) -> FrozenSet[str]:
+    """The revision(s) recorded in the database's alembic_version table."""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except Exception as e:
+            raise SchemaRevisionError(
+                f"Could not read alembic_version, run `python apply_migrations.py` first: {str(e)}"
+            )
+        return frozenset(result.scalars().all())
+
+
+async def check_schema_revision(engine: AsyncEngine) -> str:
+    """Verify the database is migrated to the current head in a single query.
+
+    Returns:
+        str: The database revision.
+
+    Raises:
+        SchemaRevisionError: If the database is behind, ahead of, or diverged from the code.
+    """
+    expected = expected_revisions()
+    current = await current_revisions(engine)
+    if current != expected:
+        raise SchemaRevisionError(
+            f"Database schema is at revision {', '.join(sorted(current)) or 'none'} "
+            f"but the code expects {', '.join(sorted(expected))}; run `python apply_migrations.py`"
+        )
+    return ", ".join(sorted(current))
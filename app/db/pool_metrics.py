@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Number of recent checkout wait times kept for the latency percentiles
+_WAIT_SAMPLE_SIZE = 1000
+
+
+class PoolMetrics:
+    """Counters and checkout wait times for one connection pool."""
+
+    def __init__(self, sample_size: int = _WAIT_SAMPLE_SIZE):
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=sample_size)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+
+    def record_checkout(self, wait_seconds: float, checked_out: int) -> None:
+        """Record a successful checkout and how long the caller waited for it."""
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self._waits.append(wait_seconds)
+
+    def record_timeout(self, wait_seconds: float) -> None:
+        """Record a checkout that gave up after DATABASE_POOL_TIMEOUT."""
+        with self._lock:
+            self.timeouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def wait_percentile(self, percentile: float) -> Optional[float]:
+        """Checkout wait time at the given percentile (0-100) over the recent samples."""
+        with self._lock:
+            samples = sorted(self._waits)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def reset(self) -> None:
+        """Clear all counters and samples."""
+        with self._lock:
+            self._waits.clear()
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.peak_checked_out = 0
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times every checkout and counts checkout timeouts.
+
+    Pool events fire only once a connection has been handed out, so the wait
+    for a free connection is measured around the pool's own checkout instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - start)
+            logger.warning(f"Connection pool exhausted: {self.status()}")
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # Keep the counters when the engine is disposed and the pool rebuilt
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_snapshot(pool) -> dict:
+    """Current usage and saturation figures for a pool."""
+    snapshot = {"pool_class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        size = pool.size()
+        max_overflow = pool._max_overflow
+        checked_out = pool.checkedout()
+        snapshot.update({
+            "size": size,
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "utilization": round(checked_out / (size + max_overflow), 4) if size + max_overflow > 0 else None,
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        checkouts = metrics.checkouts
+        snapshot.update({
+            "checkouts": checkouts,
+            "timeouts": metrics.timeouts,
+            "peak_checked_out": metrics.peak_checked_out,
+            "wait_seconds": {
+                "mean": metrics.total_wait_seconds / checkouts if checkouts else None,
+                "max": metrics.max_wait_seconds,
+                "p50": metrics.wait_percentile(50),
+                "p95": metrics.wait_percentile(95),
+                "p99": metrics.wait_percentile(99),
+            },
+        })
+    return snapshot
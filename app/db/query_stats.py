@@ -0,0 +1,85 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# The same statement run this many times in one request is reported as a likely N+1
+REPEATED_STATEMENT_THRESHOLD = 5
+
+
+class QueryStats:
+    """Statements executed and time spent in the database within one unit of work (e.g. a request)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = REPEATED_STATEMENT_THRESHOLD) -> Dict[str, int]:
+        """Statements executed at least `threshold` times, which usually means a query inside a loop."""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+# The stats being collected for the current request, or None when nobody is tracking
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements executed inside this block, on any instrumented engine."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryStats]:
+    """Fail with AssertionError if the block executes more than `max_queries` statements.
+
+    Meant for tests, to pin the number of queries an endpoint or service
+    method may issue so that regressions are caught before they ship.
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        listing = "\n".join(f"  {count}x {statement}" for statement, count in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {max_queries} queries, got {stats.count}:\n{listing}")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Report every statement executed through `engine` to the tracking block in effect, if any."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def log_repeated_statements(stats: QueryStats, where: str) -> None:
+    """Warn about statements that were executed suspiciously often."""
+    for statement, count in stats.repeated().items():
+        logger.warning(f"Possible N+1 in {where}: statement executed {count} times: {statement}")
@@ -0,0 +1,271 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Table, select, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.db.database import Base
+from app.db.sharding import SHARDED_TABLES, ShardRouter
+# Register every table on Base.metadata
+import app.models  # noqa: F401
+import app.models.auth_user_reference  # noqa: F401
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+# Shards interleave the IDs of their per-user tables: with a stride of 64,
+# the shard at offset k hands out k, k + 64, k + 128, ... so up to 64 shards
+# never generate the same ID and rows keep their IDs when users move
+DEFAULT_ID_STRIDE = 64
+
+
+class ReshardConflict(Exception):
+    """Raised when a row cannot be copied because its ID belongs to another user on the target shard.
+
+    Row IDs are kept when users move, so shards must hand out IDs from
+    disjoint ranges (see configure_id_ranges). Rows created before the
+    ranges were configured may still clash.
+    """
+
+
+class ShardIdRangeError(RuntimeError):
+    """Raised when shards may generate the same IDs for a per-user table."""
+
+
+def sharded_tables() -> List[Table]:
+    """The per-user tables, parents before children."""
+    return [table for table in Base.metadata.sorted_tables if table.name in SHARDED_TABLES]
+
+
+def user_column(table: Table):
+    """The column holding the owning user's ID."""
+    return table.c.user_id if "user_id" in table.c else table.c.id
+
+
+def _url(engine: AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=False)
+
+
+def _upsert(conn: AsyncConnection, table: Table):
+    """INSERT that overwrites an existing row with the same primary key, for idempotent copies."""
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    statement = insert(table)
+    primary_key = [column.name for column in table.primary_key]
+    updates = {column.name: statement.excluded[column.name] for column in table.c if column.name not in primary_key}
+    if not updates:
+        return statement.on_conflict_do_nothing(index_elements=primary_key)
+    return statement.on_conflict_do_update(index_elements=primary_key, set_=updates)
+
+
+async def _user_ids(conn: AsyncConnection, after: int, batch_size: int) -> List[int]:
+    """The next batch of user IDs on a database, in ID order."""
+    users = Base.metadata.tables["auth_users"]
+    result = await conn.execute(select(users.c.id).where(users.c.id > after).order_by(users.c.id).limit(batch_size))
+    return list(result.scalars().all())
+
+
+async def _check_conflicts(conn: AsyncConnection, table: Table, rows: List[dict]) -> None:
+    """Refuse to overwrite rows on the target that share an ID with a moving row but belong to another user."""
+    if "id" not in table.c or "user_id" not in table.c or not rows:
+        return
+    owners = {row["id"]: row["user_id"] for row in rows}
+    result = await conn.execute(select(table.c.id, table.c.user_id).where(table.c.id.in_(list(owners))))
+    clashes = [row.id for row in result if row.user_id != owners[row.id]]
+    if clashes:
+        raise ReshardConflict(f"{table.name} IDs {clashes[:10]} already belong to other users on the target shard")
+
+
+def id_sequence_tables() -> List[Table]:
+    """The per-user tables whose IDs come from a sequence (archived goals keep their goal's ID)."""
+    return [table for table in sharded_tables() if table.name != "auth_users" and "id" in table.c and table.c.id.autoincrement is not False]
+
+
+def aligned_id(floor: int, offset: int, stride: int) -> int:
+    """The smallest ID at or above `floor` in the range of the shard at `offset`."""
+    return floor + (offset - floor) % stride
+
+
+async def _id_sequence(conn: AsyncConnection, table: Table) -> Tuple[str, int, int]:
+    """The name, start and increment of a table's ID sequence (PostgreSQL only)."""
+    result = await conn.execute(
+        text(
+            "SELECT pg_get_serial_sequence(:table, 'id'), seqstart, seqincrement FROM pg_sequence "
+            "WHERE seqrelid = pg_get_serial_sequence(:table, 'id')::regclass"
+        ),
+        {"table": table.name},
+    )
+    return tuple(result.one())
+
+
+async def _align_sequence(conn: AsyncConnection, table: Table) -> None:
+    """Move a table's ID sequence past its highest ID, staying in the shard's range."""
+    sequence, offset, stride = await _id_sequence(conn, table)
+    result = await conn.execute(text(f"SELECT GREATEST((SELECT MAX(id) FROM {table.name}), (SELECT last_value FROM {sequence}), 1)"))
+    await conn.execute(text(f"SELECT setval('{sequence}', {aligned_id(result.scalar_one(), offset % stride, stride)})"))
+
+
+async def _reset_sequences(conn: AsyncConnection) -> None:
+    """Move PostgreSQL ID sequences past the copied IDs so new rows do not collide with them."""
+    if conn.dialect.name != "postgresql":
+        return
+    for table in id_sequence_tables():
+        await _align_sequence(conn, table)
+
+
+async def id_ranges(engine: AsyncEngine) -> Optional[Dict[str, Tuple[int, int]]]:
+    """Each per-user table's ID offset and stride on a database, or None if it has no sequences (SQLite)."""
+    if engine.dialect.name != "postgresql":
+        return None
+    async with engine.connect() as conn:
+        ranges = {}
+        for table in id_sequence_tables():
+            _, start, increment = await _id_sequence(conn, table)
+            ranges[table.name] = (start % increment, increment)
+        return ranges
+
+
+def find_overlapping_ranges(ranges: Dict[str, Dict[str, Tuple[int, int]]]) -> List[str]:
+    """Describe every way the shards' ID ranges (shard to table to offset and stride) may overlap."""
+    problems = []
+    for table in id_sequence_tables():
+        table_ranges = {shard: shard_ranges[table.name] for shard, shard_ranges in ranges.items()}
+        strides = {stride for _, stride in table_ranges.values()}
+        if len(strides) > 1:
+            problems.append(f"{table.name} IDs use different strides {sorted(strides)}")
+            continue
+        offsets: Dict[int, List[str]] = {}
+        for shard, (offset, stride) in sorted(table_ranges.items()):
+            offsets.setdefault(offset, []).append(shard)
+            if stride < len(table_ranges):
+                problems.append(f"{table.name} IDs on shard {shard} step by {stride}, fewer than the {len(table_ranges)} shards")
+        problems.extend(f"{table.name} IDs on shards {', '.join(shards)} share offset {offset}" for offset, shards in offsets.items() if len(shards) > 1)
+    return problems
+
+
+async def check_id_ranges(engines: Dict[str, AsyncEngine]) -> None:
+    """Verify the shards hand out disjoint IDs for their per-user tables.
+
+    Databases without sequences (SQLite, for development) are skipped.
+
+    Raises:
+        ShardIdRangeError: If two shards may generate the same ID; run `reshard.py ids`.
+    """
+    ranges = {name: await id_ranges(engine) for name, engine in engines.items()}
+    ranges = {name: shard_ranges for name, shard_ranges in ranges.items() if shard_ranges is not None}
+    if len(ranges) < 2:
+        return
+    problems = find_overlapping_ranges(ranges)
+    if problems:
+        raise ShardIdRangeError(f"Shards may generate the same IDs ({'; '.join(problems)}); run `reshard.py ids` to give each shard its own range")
+
+
+async def configure_id_ranges(engines: Dict[str, AsyncEngine], stride: int = DEFAULT_ID_STRIDE) -> Dict[str, int]:
+    """Give every PostgreSQL shard its own interleaved ID range and return the offset of each shard.
+
+    Shards whose sequences already step by `stride` from an offset no other
+    shard uses keep it; the others get the lowest free offsets, in name
+    order. Each sequence then continues past the table's highest ID, so
+    this is safe to run on shards that already hold data.
+    """
+    shards = {name: engine for name, engine in sorted(engines.items()) if engine.dialect.name == "postgresql"}
+    if len(shards) > stride:
+        raise ShardIdRangeError(f"{len(shards)} shards do not fit in an ID stride of {stride}")
+    offsets: Dict[str, int] = {}
+    for name, engine in shards.items():
+        ranges = set((await id_ranges(engine)).values())
+        if len(ranges) == 1:
+            offset, current_stride = ranges.pop()
+            if current_stride == stride and offset not in offsets.values():
+                offsets[name] = offset
+    free = (offset for offset in range(1, stride + 1) if offset % stride not in offsets.values())
+    for name in shards:
+        offsets.setdefault(name, next(free) % stride)
+    for name, engine in shards.items():
+        async with engine.begin() as conn:
+            for table in id_sequence_tables():
+                sequence, _, _ = await _id_sequence(conn, table)
+                start = offsets[name] or stride
+                await conn.execute(text(f"ALTER SEQUENCE {sequence} INCREMENT BY {stride} MINVALUE 1 START WITH {start}"))
+                await _align_sequence(conn, table)
+    return offsets
+
+
+async def copy_to_owners(sources: Dict[str, AsyncEngine], target: ShardRouter, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Copy every user's rows from the source databases to the shard that owns them under `target`.
+
+    Rows are upserted by primary key, so the copy can be re-run (e.g. once
+    more after the new shard map is deployed, to pick up writes made in the
+    meantime). Source rows are left in place; see delete_from_non_owners.
+    """
+    stats = {"users_scanned": 0, "users_moved": 0, "rows_copied": {table.name: 0 for table in sharded_tables()}}
+    for source_name, source in sources.items():
+        after = 0
+        async with source.connect() as source_conn:
+            while True:
+                user_ids = await _user_ids(source_conn, after, batch_size)
+                if not user_ids:
+                    break
+                after = user_ids[-1]
+                stats["users_scanned"] += len(user_ids)
+                moving = {
+                    user_id: target.shard_for(user_id) for user_id in user_ids
+                    if _url(target.engine_for(user_id)) != _url(source)
+                }
+                if not moving:
+                    continue
+                stats["users_moved"] += len(moving)
+                rows_by_shard: Dict[str, Dict[str, List[dict]]] = {}
+                for table in sharded_tables():
+                    result = await source_conn.execute(select(table).where(user_column(table).in_(list(moving))))
+                    for row in result.mappings():
+                        shard = moving[row[user_column(table).name]]
+                        rows_by_shard.setdefault(shard, {}).setdefault(table.name, []).append(dict(row))
+                for shard, tables in rows_by_shard.items():
+                    for table in sharded_tables():
+                        stats["rows_copied"][table.name] += len(tables.get(table.name, []))
+                    if dry_run:
+                        continue
+                    async with target.engines[shard].begin() as target_conn:
+                        for table in sharded_tables():
+                            rows = tables.get(table.name, [])
+                            if rows:
+                                await _check_conflicts(target_conn, table, rows)
+                                await target_conn.execute(_upsert(target_conn, table), rows)
+                logger.info(f"[{source_name}] copied users {user_ids[0]}..{after}: {len(moving)} moved")
+    if not dry_run:
+        for shard_engine in target.engines.values():
+            async with shard_engine.begin() as target_conn:
+                await _reset_sequences(target_conn)
+    return stats
+
+
+async def delete_from_non_owners(sources: Dict[str, AsyncEngine], target: ShardRouter, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """Delete rows of users that `target` assigns to another database.
+
+    Run this only after copy_to_owners and after every instance uses the
+    new shard map, otherwise writes may land on rows that are then deleted.
+    """
+    stats = {"users_scanned": 0, "users_removed": 0, "rows_deleted": {table.name: 0 for table in sharded_tables()}}
+    for source_name, source in sources.items():
+        after = 0
+        while True:
+            async with source.begin() as conn:
+                user_ids = await _user_ids(conn, after, batch_size)
+                if not user_ids:
+                    break
+                after = user_ids[-1]
+                stats["users_scanned"] += len(user_ids)
+                foreign = [user_id for user_id in user_ids if _url(target.engine_for(user_id)) != _url(source)]
+                stats["users_removed"] += len(foreign)
+                if not foreign:
+                    continue
+                # Children first, so foreign keys to auth_users stay valid
+                for table in reversed(sharded_tables()):
+                    if dry_run:
+                        result = await conn.execute(select(func.count()).select_from(table).where(user_column(table).in_(foreign)))
+                        stats["rows_deleted"][table.name] += result.scalar_one()
+                    else:
+                        result = await conn.execute(table.delete().where(user_column(table).in_(foreign)))
+                        stats["rows_deleted"][table.name] += result.rowcount
+            logger.info(f"[{source_name}] cleaned users {user_ids[0]}..{after}: {len(foreign)} removed")
+    return stats
@@ -0,0 +1,155 @@
+import bisect
+import functools
+import hashlib
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, TypeVar
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+T = TypeVar("T")
+
+# Tables holding per-user data. They live on the shard that owns the user;
+# every other table (e.g. users, whose usernames must be globally unique)
+# stays on the primary database.
+SHARDED_TABLES = frozenset({"auth_users", "user_stats", "badges", "learning_goals", "learning_goals_archive"})
+
+# Virtual nodes per shard on the hash ring; more nodes spread users more evenly
+DEFAULT_VNODES = 100
+
+
+class ShardKeyRequired(RuntimeError):
+    """Raised when a statement touches sharded tables outside of a shard_key() block."""
+
+
+def _hash(value: str) -> int:
+    """A stable 64-bit hash (Python's hash() is randomized per process)."""
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """Maps keys to nodes so that adding or removing a node only moves about 1/N of the keys."""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = DEFAULT_VNODES):
+        points = sorted((_hash(f"{node}#{index}"), node) for node in nodes for index in range(vnodes))
+        if not points:
+            raise ValueError("A hash ring needs at least one node")
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+        self.nodes = sorted(set(self._nodes))
+
+    def node_for(self, key: Hashable) -> str:
+        """The node owning `key`: the first ring point at or after the key's hash."""
+        index = bisect.bisect_left(self._hashes, _hash(str(key)))
+        return self._nodes[index % len(self._nodes)]
+
+
+class ShardRouter:
+    """Routes user IDs to one of several database engines through a consistent-hash ring."""
+
+    def __init__(self, engines: Dict[str, AsyncEngine], vnodes: int = DEFAULT_VNODES):
+        self.engines = dict(engines)
+        self.ring = ConsistentHashRing(self.engines, vnodes)
+
+    @classmethod
+    def from_urls(cls, urls: Dict[str, str], engine_factory: Callable[[str], AsyncEngine], vnodes: int = DEFAULT_VNODES) -> "ShardRouter":
+        """Build a router from shard names mapped to database URLs.
+
+        Shard names, not their order or URLs, decide where users hash to,
+        so a shard can move to another host without resharding.
+        """
+        return cls({name: engine_factory(url) for name, url in urls.items()}, vnodes)
+
+    def shard_for(self, user_id: int) -> str:
+        """Name of the shard owning a user."""
+        return self.ring.node_for(user_id)
+
+    def engine_for(self, user_id: int) -> AsyncEngine:
+        """Engine of the shard owning a user."""
+        return self.engines[self.shard_for(user_id)]
+
+    def group_by_shard(self, items: Iterable[T], user_id: Callable[[T], int]) -> Dict[str, List[T]]:
+        """Partition items by the shard owning each item's user, preserving order."""
+        groups: Dict[str, List[T]] = {}
+        for item in items:
+            groups.setdefault(self.shard_for(user_id(item)), []).append(item)
+        return groups
+
+    async def dispose(self) -> None:
+        """Close every shard's connection pool."""
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+# The router in use by this process, or None when sharding is disabled
+_router: Optional[ShardRouter] = None
+# The user whose shard statements on sharded tables are routed to
+_shard_key: ContextVar[Optional[int]] = ContextVar("shard_key", default=None)
+
+
+def configure(router: Optional[ShardRouter]) -> None:
+    """Install the router used by ShardRoutingSession (None disables sharding)."""
+    global _router
+    _router = router
+
+
+def active_router() -> Optional[ShardRouter]:
+    """The router in use, or None when sharding is disabled."""
+    return _router
+
+
+@contextmanager
+def shard_key(user_id: int):
+    """Route statements on sharded tables to `user_id`'s shard inside this block."""
+    token = _shard_key.set(user_id)
+    try:
+        yield
+    finally:
+        _shard_key.reset(token)
+
+
+def routed_by(parameter: str):
+    """Decorate a CRUD coroutine so its queries run on the shard of its `parameter` user ID."""
+    def decorator(func):
+        position = list(inspect.signature(func).parameters).index(parameter)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if parameter in kwargs:
+                user_id = kwargs[parameter]
+            elif position < len(args):
+                user_id = args[position]
+            else:
+                return await func(*args, **kwargs)
+            with shard_key(user_id):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _touches_sharded_tables(mapper, clause) -> bool:
+    """Whether a statement (or the flush of `mapper`'s objects) involves a sharded table."""
+    if mapper is not None and getattr(mapper, "local_table", None) is not None and mapper.local_table.name in SHARDED_TABLES:
+        return True
+    if clause is None:
+        return False
+    return any(table.name in SHARDED_TABLES for table in find_tables(clause, check_columns=True, include_crud=True))
+
+
+class ShardRoutingSession(Session):
+    """Session that sends statements on sharded tables to the current user's shard.
+
+    Everything else goes to the session's own bind (the primary). Without an
+    active router this behaves exactly like Session.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        router = _router
+        if router is not None and _touches_sharded_tables(mapper, clause):
+            user_id = _shard_key.get()
+            if user_id is None:
+                raise ShardKeyRequired("Queries on sharded tables must run inside shard_key() or a @routed_by function")
+            return router.engine_for(user_id).sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
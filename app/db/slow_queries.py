@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import random
+import sys
+import time
+from typing import Iterator, Optional, Set
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Modules whose functions are reported as the origin of a statement, most specific first
+_ORIGIN_PREFIXES = ("app.crud.", "app.services.", "app.")
+
+
+def redact(parameters):
+    """Replace bind parameter values with their type names, keeping the structure for context."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [redact(value) if isinstance(value, (dict, list, tuple)) else type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _frames() -> Iterator:
+    """The current call stack, continuing into the greenlets that are waiting on this one.
+
+    SQLAlchemy runs the async API's blocking work in a child greenlet, so
+    the coroutine that issued a statement is on the parent greenlet's stack.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    parent = getcurrent().parent
+    while parent is not None:
+        frame = parent.gr_frame
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        parent = parent.parent
+
+
+def statement_origin() -> str:
+    """The application function that issued the statement being executed, e.g. app.crud.badge.get_badges_by_user."""
+    frames = [(frame.f_globals.get("__name__", ""), frame.f_code.co_name) for frame in _frames()]
+    for prefix in _ORIGIN_PREFIXES:
+        for module, function in frames:
+            if module.startswith(prefix) and not module.startswith("app.db."):
+                return f"{module}.{function}"
+    return "unknown"
+
+
+class SlowQueryLog:
+    """Logs statements slower than a threshold, and samples their PostgreSQL query plans.
+
+    Bind parameters are logged as type names only, so no user data ends up
+    in the logs. Plans are captured with EXPLAIN (without ANALYZE, so the
+    statement is not run again) on a separate connection in the background,
+    at most one at a time per engine.
+    """
+
+    def __init__(self, engine: AsyncEngine, threshold_seconds: float, explain_sample_rate: float = 0.0):
+        self.engine = engine
+        self.threshold_seconds = threshold_seconds
+        self.explain_sample_rate = explain_sample_rate
+        self._explaining: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def attach(self) -> None:
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold_seconds:
+            return
+        origin = statement_origin()
+        shown = f"{len(parameters)} rows like {redact(parameters[0])}" if executemany and parameters else redact(parameters)
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) from {origin}: {statement} parameters={shown}")
+        if not executemany and self._should_explain(conn):
+            self._explain_in_background(statement, parameters, origin)
+
+    def _should_explain(self, conn) -> bool:
+        return (
+            conn.dialect.name == "postgresql"
+            and self._explaining is None
+            and random.random() < self.explain_sample_rate
+        )
+
+    def _explain_in_background(self, statement: str, parameters, origin: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explaining = loop.create_task(self._explain(statement, tuple(parameters or ()), origin))
+        self._tasks.add(self._explaining)
+        self._explaining.add_done_callback(self._explain_done)
+
+    def _explain_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._explaining = None
+
+    async def _explain(self, statement: str, parameters: tuple, origin: str) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                rows = await raw.driver_connection.fetch(f"EXPLAIN (ANALYZE off) {statement}", *parameters)
+            plan = "\n".join(row[0] for row in rows)
+            logger.warning(f"Plan of slow query from {origin}:\n{plan}")
+        except Exception as e:
+            logger.error(f"Error explaining slow query from {origin}: {e}")
@@ -1,7 +1,22 @@
-from fastapi import FastAPI
-from app.api import routes
-from app.db.database import engine, Base
+import logging
+import time
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from app.api import routes, metrics, admin
+from app.cache import cache
+from app.core.settings import settings
+from app.db.database import engine, shard_router, Base
+from app.db.migrations import check_schema_revision
+from app.db.query_stats import log_repeated_statements, track_queries
+from app.db.resharding import check_id_ranges, configure_id_ranges
+from app.services.cache_warmer import cache_warmer
 from app.services.message_queue_consumer import message_queue_consumer
+from app.services.goal_archiver import goal_archiver
+from app.services.invalidation_bus import invalidation_bus
+from app.services.leaderboard import leaderboard_refresher
+
+# Set up logging
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="User Service API",
@@ -17,23 +32,73 @@ app = FastAPI(
     }
 )
 
+async def add_query_stats_headers(request: Request, call_next):
+    """Report the statements a request executed and the time they took (debug mode only)."""
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Query-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+    log_repeated_statements(stats, f"{request.method} {request.url.path}")
+    return response
+
+if settings.DEBUG:
+    app.middleware("http")(add_query_stats_headers)
+
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all) # Use this to drop tables for a clean start
-        await conn.run_sync(Base.metadata.create_all)
+    started = time.perf_counter()
+    # Per-user tables live on the shards, which carry the same schema as the primary
+    database_engines = [engine] + (list(shard_router.engines.values()) if shard_router else [])
+    if settings.DATABASE_CREATE_ALL:
+        for database_engine in database_engines:
+            async with database_engine.begin() as conn:
+                # await conn.run_sync(Base.metadata.drop_all) # Use this to drop tables for a clean start
+                await conn.run_sync(Base.metadata.create_all)
+        logger.info("Created missing tables (DATABASE_CREATE_ALL is set)")
+        if shard_router is not None:
+            await configure_id_ranges(shard_router.engines)
+    else:
+        # The schema is owned by alembic; refuse to start against an unmigrated database
+        for database_engine in database_engines:
+            revision = await check_schema_revision(database_engine)
+        logger.info(f"Database schema is at revision {revision}")
+        # Users move between shards with their row IDs, so the shards must not hand out the same IDs
+        if shard_router is not None:
+            await check_id_ranges(shard_router.engines)
+    logger.info(f"Database ready in {(time.perf_counter() - started) * 1000:.1f} ms")
     
     # Initialize and start consuming messages from the queue
     await message_queue_consumer.connect()
     await message_queue_consumer.consume_user_events()
+    
+    # Share the connection to broadcast cache invalidations between instances
+    await invalidation_bus.start()
+    
+    # Move long-finished learning goals to the archive in the background
+    goal_archiver.start()
+    
+    # Load the leaderboard and keep it reconciled with the badge counters
+    leaderboard_refresher.start()
+    
+    # Fill the caches with the most active users; /ready waits for this
+    cache_warmer.start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Stop consuming messages and close the connection on shutdown."""
+    """Stop background work and close connections on shutdown."""
+    await cache_warmer.stop()
+    await goal_archiver.stop()
+    await leaderboard_refresher.stop()
+    await invalidation_bus.stop()
     await message_queue_consumer.stop_consuming()
     await message_queue_consumer.close()
+    await cache.close()
+    if shard_router is not None:
+        await shard_router.dispose()
 
 app.include_router(routes.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
 @app.get("/", summary="Root endpoint", description="Welcome message for the User Service API")
 async def root():
@@ -43,4 +108,16 @@ async def root():
     Returns:
         dict: A dictionary containing a welcome message.
     """
-    return {"message": "Welcome to the User Service"}
\ No newline at end of file
+    return {"message": "Welcome to the User Service"}
+
+@app.get("/ready", summary="Readiness probe", description="Whether this instance is ready for traffic: 503 until the startup cache warm-up is over, 200 afterwards.", responses={503: {"description": "Still warming up"}})
+async def ready():
+    """
+    Reports whether the instance finished starting up, including the cache warm-up.
+    
+    Returns:
+        dict: The readiness status and the number of users whose caches were warmed.
+    """
+    if not cache_warmer.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "warming_up"})
+    return {"status": "ready", "warmed_users": cache_warmer.warmed}
@@ -1,3 +1,6 @@
 from .badge import Badge
+from .leaderboard_snapshot import LeaderboardSnapshot
 from .learning_goal import LearningGoal
-from .user import User
\ No newline at end of file
+from .learning_goal_archive import LearningGoalArchive
+from .user import User
+from .user_stats import UserStats
\ No newline at end of file
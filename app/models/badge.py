@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from app.db.database import Base
 from datetime import datetime
 
 class Badge(Base):
     __tablename__ = "badges"
+    __table_args__ = (
+        # Keyset pagination over a user's badges, newest first
+        Index("ix_badges_user_id_date_achieved_id", "user_id", "date_achieved", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
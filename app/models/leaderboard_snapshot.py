@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime
+from app.db.database import Base
+from datetime import datetime
+
+class LeaderboardSnapshot(Base):
+    __tablename__ = "leaderboard_snapshot"
+
+    # Periodic copy of the in-memory leaderboard, kept on the primary so a
+    # starting instance can load the ranking without scanning every shard
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    badge_count = Column(Integer, nullable=False)
+    level = Column(Integer, nullable=False)
+    rank = Column(Integer, nullable=False, index=True)
+    snapshotted_at = Column(DateTime, default=datetime.utcnow)
@@ -1,13 +1,24 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from app.db.database import Base
+from datetime import datetime
 
 class LearningGoal(Base):
     __tablename__ = "learning_goals"
+    __table_args__ = (
+        # Keyset pagination over a user's learning goals, newest first
+        Index("ix_learning_goals_user_id_id", "user_id", "id"),
+        # Finding goals that have sat in a terminal status long enough to archive
+        Index("ix_learning_goals_status_status_changed_at", "status", "status_changed_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String)
     status = Column(String)
     streak_count = Column(Integer)
+    # Bumped on every update, for optimistic concurrency control
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # When the status last changed, used to age goals out to the archive
+    status_changed_at = Column(DateTime, default=datetime.utcnow)
     # Reference to user ID in auth_users table
     user_id = Column(Integer, ForeignKey("auth_users.id"))
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from app.db.database import Base
+from datetime import datetime
+
+class LearningGoalArchive(Base):
+    __tablename__ = "learning_goals_archive"
+    __table_args__ = (
+        # Keyset pagination over a user's archived goals, newest first
+        Index("ix_learning_goals_archive_user_id_id", "user_id", "id"),
+    )
+
+    # Cold storage for goals moved out of learning_goals; ids are kept
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    description = Column(String)
+    status = Column(String)
+    streak_count = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    status_changed_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    # Reference to user ID in auth_users table
+    user_id = Column(Integer, ForeignKey("auth_users.id"))
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, DDL, event
+from app.db.database import Base
+from datetime import datetime
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    # Denormalized per-user counters, maintained in the same transaction as
+    # the badge/learning goal writes they count
+    user_id = Column(Integer, ForeignKey("auth_users.id"), primary_key=True)
+    badge_count = Column(Integer, nullable=False, default=0, server_default="0")
+    goal_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by every badge or learning goal write, so list responses can be
+    # validated with ETags without re-running the list queries
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Indexed to find the most recently active users (cache warm-up)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+# SQLite cannot modify tables from a CTE, so there a trigger bumps the
+# owner's version whenever a learning goal is updated, within the same
+# statement. PostgreSQL does this in the UPDATE's CTE instead.
+USER_STATS_VERSION_TRIGGER = DDL(
+    "CREATE TRIGGER IF NOT EXISTS learning_goals_bump_user_stats_version "
+    "AFTER UPDATE ON learning_goals "
+    "BEGIN "
+    "UPDATE user_stats SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE user_id = NEW.user_id; "
+    "END"
+)
+event.listen(Base.metadata, "after_create", USER_STATS_VERSION_TRIGGER.execute_if(dialect="sqlite"))
@@ -1,3 +1,4 @@
 from .user import User, UserCreate, UserUpdate, UserProfileResponse
-from .badge import Badge, BadgeCreate, BadgeBase
-from .learning_goal import LearningGoal, LearningGoalCreate, LearningGoalUpdate, LearningGoalBase
\ No newline at end of file
+from .badge import Badge, BadgeCreate, BadgeBase, BadgeAward, BadgeImport, BadgeBulkCreate, BadgeBulkResult, BadgeBulkResponse
+from .learning_goal import LearningGoal, LearningGoalCreate, LearningGoalUpdate, LearningGoalBase, LearningGoalImport, ArchivedLearningGoal
+from .leaderboard import LeaderboardEntry, LeaderboardResponse
\ No newline at end of file
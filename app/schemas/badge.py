@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Optional
 
 class BadgeBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -15,4 +16,29 @@ class Badge(BadgeBase):
     user_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BadgeAward(BadgeBase):
+    """A badge to award to a user as part of a bulk request."""
+    user_id: int
+
+class BadgeImport(BadgeBase):
+    """A badge row loaded by the bulk importer."""
+    user_id: int
+    date_achieved: Optional[datetime] = None
+
+class BadgeBulkCreate(BaseModel):
+    badges: List[BadgeAward] = Field(..., min_length=1, max_length=5000)
+
+class BadgeBulkResult(BaseModel):
+    index: int
+    user_id: int
+    status: str
+    badge: Optional[Badge] = None
+    error: Optional[str] = None
+
+class BadgeBulkResponse(BaseModel):
+    created: int
+    rejected: int
+    failed: int = 0
+    results: List[BadgeBulkResult]
\ No newline at end of file
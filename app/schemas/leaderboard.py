@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    badge_count: int
+    level: int
+
+class LeaderboardResponse(BaseModel):
+    total: int
+    entries: List[LeaderboardEntry]
+    # The requested user's own entry, if they have any badges
+    user: Optional[LeaderboardEntry] = None
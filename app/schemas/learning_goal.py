@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional
+from datetime import datetime
 
 class LearningGoalBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
@@ -10,15 +11,28 @@ class LearningGoalBase(BaseModel):
 class LearningGoalCreate(LearningGoalBase):
     pass
 
+class LearningGoalImport(LearningGoalBase):
+    """A learning goal row loaded by the bulk importer."""
+    user_id: int
+    status_changed_at: Optional[datetime] = None
+
 class LearningGoalUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=1000)
     status: Optional[str] = Field(None, min_length=1, max_length=50)
     streak_count: Optional[int] = Field(None, ge=0)
+    # If given, the update only applies while the goal is still at this version
+    version: Optional[int] = Field(None, ge=1)
 
 class LearningGoal(LearningGoalBase):
     id: int
     user_id: int
+    version: int = 1
 
     class Config:
         from_attributes = True
+
+
+class ArchivedLearningGoal(LearningGoal):
+    status_changed_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
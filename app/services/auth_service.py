@@ -1,20 +1,121 @@
+import asyncio
+import json
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List
+from app.cache import CacheBackend, NullCache, cache
 from app.core.settings import settings
 
+# Status codes meaning the auth service has no batch lookup endpoint
+BATCH_UNSUPPORTED_STATUSES = (404, 405, 501)
+
+# Status codes rejecting one batch request (too many IDs, a malformed ID),
+# or "batch" as a user ID where /users/batch is routed to /users/{user_id}.
+# That request falls back to single-user lookups, the next one tries the
+# batch endpoint again
+BATCH_REJECTED_STATUSES = (400, 422)
+
+# Concurrent single-user lookups when falling back from the batch endpoint
+MAX_CONCURRENT_USER_LOOKUPS = 10
+
+class AuthServiceUnavailable(Exception):
+    """Raised when the auth service cannot be reached or fails with a server error."""
+
+def _unavailable(e: Exception) -> AuthServiceUnavailable:
+    return AuthServiceUnavailable(f"Auth service unavailable: {e}")
+
 class AuthServiceClient:
-    def __init__(self):
+    def __init__(self, cache: Optional[CacheBackend] = None, user_ttl_seconds: Optional[float] = None):
         self.base_url = getattr(settings, 'AUTH_SERVICE_URL', 'http://localhost:8001')
         self.client = httpx.AsyncClient()
+        # Users found by ID are cached; misses and errors are not, so new
+        # users show up immediately and outages are retried
+        self.cache = cache if cache is not None else NullCache()
+        self.user_ttl_seconds = settings.AUTH_USER_CACHE_TTL_SECONDS if user_ttl_seconds is None else user_ttl_seconds
+        # Cleared the first time the auth service turns out to have no batch
+        # endpoint, so it is not probed again on every lookup
+        self.batch_supported = True
     
     async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Fetch user data from auth-service by ID"""
+        key = self._user_key(user_id)
+        if self.user_ttl_seconds > 0:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
         try:
             response = await self.client.get(f"{self.base_url}/users/{user_id}")
             response.raise_for_status()  # This will raise an exception for 4xx and 5xx status codes
-            return response.json()
+            user = response.json()
         except Exception:
             return None
+        if self.user_ttl_seconds > 0:
+            await self.cache.set(key, json.dumps(user).encode(), self.user_ttl_seconds)
+        return user
+    
+    async def get_users(self, user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch many users from auth-service by ID, keyed by ID; unknown IDs are left out.
+
+        Uncached users are fetched with one request to the batch endpoint, or
+        with concurrent single-user requests if the auth service has none.
+        Raises AuthServiceUnavailable on connection errors and server errors,
+        so an outage is not mistaken for users that do not exist.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        users = {}
+        if self.user_ttl_seconds > 0:
+            cached = await self.cache.get_many([self._user_key(user_id) for user_id in user_ids])
+            for value in cached.values():
+                user = json.loads(value)
+                users[user["id"]] = user
+        wanted = [user_id for user_id in user_ids if user_id not in users]
+        if not wanted:
+            return users
+        fetched = await self._fetch_users(wanted)
+        if self.user_ttl_seconds > 0 and fetched:
+            await self.cache.set_many({self._user_key(user_id): json.dumps(user).encode() for user_id, user in fetched.items()}, self.user_ttl_seconds)
+        users.update(fetched)
+        return users
+    
+    async def _fetch_users(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch users with the batch endpoint, falling back to single-user requests."""
+        if self.batch_supported:
+            try:
+                response = await self.client.get(f"{self.base_url}/users/batch", params={"ids": ",".join(map(str, user_ids))})
+                response.raise_for_status()  # This will raise an exception for 4xx and 5xx status codes
+                return {user["id"]: user for user in response.json() if user["id"] in user_ids}
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code in BATCH_UNSUPPORTED_STATUSES:
+                    self.batch_supported = False
+                elif e.response.status_code not in BATCH_REJECTED_STATUSES:
+                    raise _unavailable(e)
+            except Exception as e:
+                raise _unavailable(e)
+        
+        slots = asyncio.Semaphore(MAX_CONCURRENT_USER_LOOKUPS)
+        
+        async def fetch(user_id: int) -> Optional[Dict[str, Any]]:
+            async with slots:
+                return await self._fetch_user(user_id)
+        
+        results = await asyncio.gather(*(fetch(user_id) for user_id in user_ids))
+        return {user_id: user for user_id, user in zip(user_ids, results) if user is not None}
+    
+    async def _fetch_user(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch one user, returning None if they do not exist and raising AuthServiceUnavailable on outages."""
+        try:
+            response = await self.client.get(f"{self.base_url}/users/{user_id}")
+            response.raise_for_status()  # This will raise an exception for 4xx and 5xx status codes
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                raise _unavailable(e)
+            return None
+        except Exception as e:
+            raise _unavailable(e)
+    
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"auth:user:{user_id}"
     
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Fetch user data from auth-service by email"""
@@ -26,4 +127,4 @@ class AuthServiceClient:
             return None
 
 # Global instance
-auth_service_client = AuthServiceClient()
\ No newline at end of file
+auth_service_client = AuthServiceClient(cache=cache)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app import crud
+from app.core.settings import settings
+from app.db.database import ReadSessionLocal, engine, shard_router
+from app.services.user import UserService
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class CacheWarmer:
+    """Startup task filling the auth and profile caches with the most active users.
+
+    The `user_count` users whose badges or goals changed most recently
+    (across all shards) have their profiles built, which also caches
+    their auth service records. Users are warmed `concurrency` at a time,
+    batch after batch, until all are done or `budget_seconds` ran out;
+    the instance reports ready once the warm-up ended either way.
+    """
+
+    def __init__(self, engines: Iterable[AsyncEngine], user_count: int, concurrency: int, budget_seconds: float):
+        self.engines = list(engines)
+        self.user_count = user_count
+        self.concurrency = concurrency
+        self.budget_seconds = budget_seconds
+        self.task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.warmed = 0
+
+    async def recently_active_user_ids(self) -> List[int]:
+        """The IDs of the `user_count` most recently active users, most recent first."""
+        users = []
+        for database_engine in self.engines:
+            async with AsyncSession(database_engine) as db:
+                users.extend(await crud.user_stats.get_recently_active_users(db, self.user_count))
+        users.sort(key=lambda user: user[1], reverse=True)
+        return [user_id for user_id, _ in users[:self.user_count]]
+
+    async def warm_user(self, user_id: int) -> bool:
+        """Cache one user's profile and auth record. Returns whether the profile was built."""
+        try:
+            async with ReadSessionLocal() as db:
+                await UserService(db).get_user_profile_json(user_id)
+            return True
+        except HTTPException:
+            # Unknown to the auth service; nothing to cache
+            return False
+        except Exception as e:
+            logger.warning(f"Error warming the caches for user {user_id}: {e}")
+            return False
+
+    async def warm_once(self) -> int:
+        """Warm the caches within the time budget. Returns the number of users warmed."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.budget_seconds
+        warmed = 0
+        try:
+            user_ids = await asyncio.wait_for(self.recently_active_user_ids(), self.budget_seconds)
+            for start in range(0, len(user_ids), self.concurrency):
+                batch = user_ids[start:start + self.concurrency]
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(self.warm_user(user_id) for user_id in batch)),
+                    max(deadline - loop.time(), 0),
+                )
+                warmed += sum(results)
+        except asyncio.TimeoutError:
+            logger.warning(f"Cache warm-up stopped after its {self.budget_seconds}s budget")
+        return warmed
+
+    async def run(self):
+        """Warm the caches, then mark the instance ready."""
+        try:
+            self.warmed = await self.warm_once()
+            logger.info(f"Warmed the caches for {self.warmed} users")
+        except Exception as e:
+            logger.error(f"Error warming the caches: {e}")
+        finally:
+            self.ready = True
+
+    def start(self):
+        """Start the warm-up in the background, or report ready at once if it is disabled."""
+        if self.user_count <= 0 or self.budget_seconds <= 0:
+            self.ready = True
+        elif self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the warm-up if it is still running."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+cache_warmer = CacheWarmer(
+    list(shard_router.engines.values()) if shard_router else [engine],
+    user_count=settings.CACHE_WARMUP_USERS,
+    concurrency=settings.CACHE_WARMUP_CONCURRENCY,
+    budget_seconds=settings.CACHE_WARMUP_BUDGET_SECONDS,
+)
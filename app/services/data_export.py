@@ -0,0 +1,201 @@
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from sqlalchemy import Table, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.crud.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.db.database import Base, read_engine, shard_router
+from app.db.sharding import SHARDED_TABLES
+# Register every table on Base.metadata
+import app.models  # noqa: F401
+
+# Exportable entities, in export order, mapped to their tables
+EXPORT_TABLES = {"users": "users", "badges": "badges", "learning_goals": "learning_goals"}
+# Record type written on each NDJSON line, per entity
+RECORD_TYPES = {"users": "user", "badges": "badge", "learning_goals": "learning_goal"}
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHECKPOINT_EVERY = 10000
+
+
+@dataclass(frozen=True)
+class ExportPosition:
+    """Where an export stands: the entity and source being read, and the last ID written from it."""
+    entity: str
+    source: int = 0
+    last_id: int = 0
+
+    def token(self) -> str:
+        return encode_cursor(self.entity, self.source, self.last_id)
+
+    @classmethod
+    def from_token(cls, token: str, entities: Sequence[str]) -> "ExportPosition":
+        entity, source, last_id = decode_cursor(token, str, int, int)
+        if entity not in entities:
+            raise InvalidCursorError(f"Checkpoint is for {entity!r}, which is not being exported")
+        return cls(entity, source, last_id)
+
+
+@dataclass(frozen=True)
+class ExportChunk:
+    """NDJSON-encoded records, followed by the checkpoint to resume after them (if any)."""
+    data: bytes
+    checkpoint: Optional[str] = None
+
+
+def parse_entities(value: Optional[str]) -> List[str]:
+    """Validate a comma-separated entity list, keeping the export order. None means everything."""
+    if not value:
+        return list(EXPORT_TABLES)
+    requested = {entity.strip() for entity in value.split(",") if entity.strip()}
+    if not requested:
+        raise ValueError("No export entities given")
+    unknown = requested - set(EXPORT_TABLES)
+    if unknown:
+        raise ValueError(f"Unknown export entities: {', '.join(sorted(unknown))}")
+    return [entity for entity in EXPORT_TABLES if entity in requested]
+
+
+def export_sources(entity: str) -> List[AsyncEngine]:
+    """The databases holding an entity's rows, in a stable order.
+
+    Per-user tables are read from every shard; the rest from the read
+    replica (or the primary when there is none).
+    """
+    if EXPORT_TABLES[entity] in SHARDED_TABLES and shard_router is not None:
+        return [shard_router.engines[name] for name in sorted(shard_router.engines)]
+    return [read_engine]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__} values")
+
+
+def _encode_rows(record_type: str, rows) -> bytes:
+    lines = [json.dumps({"type": record_type, **row}, default=_json_default, separators=(",", ":")) for row in rows]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def checkpoint_line(token: str) -> bytes:
+    """The NDJSON line announcing a checkpoint."""
+    return (json.dumps({"type": "checkpoint", "token": token}, separators=(",", ":")) + "\n").encode()
+
+
+async def export_records(
+    entities: Sequence[str],
+    checkpoint: Optional[str] = None,
+    sources: Optional[Dict[str, List[AsyncEngine]]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+) -> AsyncIterator[ExportChunk]:
+    """Stream every row of the given entities as NDJSON, in ID order per source database.
+
+    Rows are read through a server-side cursor (yield_per) and encoded one
+    batch at a time, so memory stays flat however large the tables are. A
+    checkpoint is issued every `checkpoint_every` rows and whenever a source
+    is finished; passing it back resumes the export right after the rows
+    written before it.
+    """
+    position = ExportPosition.from_token(checkpoint, entities) if checkpoint else ExportPosition(entities[0])
+    start = (entities.index(position.entity), position.source)
+    for entity_index, entity in enumerate(entities):
+        table: Table = Base.metadata.tables[EXPORT_TABLES[entity]]
+        entity_sources = sources[entity] if sources is not None else export_sources(entity)
+        for source_index, source in enumerate(entity_sources):
+            if (entity_index, source_index) < start:
+                continue
+            last_id = position.last_id if (entity_index, source_index) == start else 0
+            since_checkpoint = 0
+            statement = (
+                select(table).where(table.c.id > last_id).order_by(table.c.id)
+                .execution_options(yield_per=batch_size)
+            )
+            async with source.connect() as conn:
+                result = await conn.stream(statement)
+                async for rows in result.mappings().partitions():
+                    last_id = rows[-1]["id"]
+                    since_checkpoint += len(rows)
+                    data = _encode_rows(RECORD_TYPES[entity], rows)
+                    if since_checkpoint >= checkpoint_every:
+                        since_checkpoint = 0
+                        yield ExportChunk(data, ExportPosition(entity, source_index, last_id).token())
+                    else:
+                        yield ExportChunk(data)
+            yield ExportChunk(b"", _next_position(entities, entity_index, source_index, len(entity_sources), last_id).token())
+
+
+def _next_position(entities: Sequence[str], entity_index: int, source_index: int, source_count: int, last_id: int) -> ExportPosition:
+    """The position right after a finished source: the next source, the next entity, or the end."""
+    if source_index + 1 < source_count:
+        return ExportPosition(entities[entity_index], source_index + 1, 0)
+    if entity_index + 1 < len(entities):
+        return ExportPosition(entities[entity_index + 1], 0, 0)
+    # Past the last source: resuming from here exports nothing more
+    return ExportPosition(entities[entity_index], source_count, last_id)
+
+
+class GzipMembers:
+    """Incremental gzip compressor that can flush, or close the current gzip member, at any point.
+
+    The CLI ends a member at every checkpoint, so a file cut at a checkpoint
+    is a complete gzip file and a resumed export can simply be appended
+    (concatenated members are themselves a valid gzip file). HTTP decoders
+    often stop after the first member, so the endpoint only flushes.
+    """
+
+    def __init__(self, level: int = 6):
+        self.level = level
+        self._compressor = None
+
+    def compress(self, data: bytes) -> bytes:
+        if self._compressor is None:
+            # wbits=31 writes a gzip header and trailer instead of raw zlib
+            self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, so a reader can decode up to this point."""
+        if self._compressor is None:
+            return b""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def end_member(self) -> bytes:
+        """Finish the current gzip member; the next write starts a new one."""
+        if self._compressor is None:
+            return b""
+        tail = self._compressor.flush(zlib.Z_FINISH)
+        self._compressor = None
+        return tail
+
+
+async def stream_ndjson(
+    entities: Sequence[str],
+    checkpoint: Optional[str] = None,
+    compress: bool = False,
+    **options,
+) -> AsyncIterator[bytes]:
+    """Encode an export as NDJSON bytes, optionally gzipped, with checkpoint lines inline.
+
+    A `{"type": "checkpoint", "token": ...}` line follows the last record it
+    covers; clients resume by passing the last token they received.
+    """
+    gzip = GzipMembers() if compress else None
+    async for chunk in export_records(entities, checkpoint, **options):
+        data = chunk.data + (checkpoint_line(chunk.checkpoint) if chunk.checkpoint else b"")
+        if gzip is None:
+            yield data
+            continue
+        compressed = gzip.compress(data)
+        if chunk.checkpoint:
+            # Deliver everything up to the checkpoint line right away
+            compressed += gzip.flush()
+        if compressed:
+            yield compressed
+    if gzip is not None:
+        tail = gzip.end_member()
+        if tail:
+            yield tail
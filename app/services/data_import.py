@@ -0,0 +1,214 @@
+import csv
+import gzip
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.crud import user_stats
+from app.db.database import Base, engine, shard_router
+from app.schemas.badge import BadgeImport
+from app.schemas.learning_goal import LearningGoalImport
+# Register every table on Base.metadata
+import app.models  # noqa: F401
+import app.models.auth_user_reference  # noqa: F401
+
+T = TypeVar("T")
+
+DEFAULT_CHUNK_SIZE = 10000
+# Rejected rows whose errors are kept for the report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """How one entity is validated and loaded."""
+    table: str
+    schema: Type[BaseModel]
+    # Columns written, in COPY order; IDs are left to the database
+    columns: Tuple[str, ...]
+    # Record type in NDJSON exports, so export files can be loaded directly
+    record_type: str
+    counter: str
+
+
+IMPORT_SPECS = {
+    "badges": ImportSpec(
+        "badges", BadgeImport, ("name", "description", "icon_url", "date_achieved", "user_id"), "badge", "badge_count",
+    ),
+    "learning_goals": ImportSpec(
+        "learning_goals", LearningGoalImport,
+        ("title", "description", "status", "streak_count", "version", "status_changed_at", "user_id"),
+        "learning_goal", "goal_count",
+    ),
+}
+
+
+@dataclass
+class ImportStats:
+    """Running totals of an import."""
+    read: int = 0
+    loaded: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    errors: List[dict] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.loaded / self.seconds if self.seconds else 0.0
+
+
+def read_records(path: str, format: Optional[str] = None) -> Iterator[dict]:
+    """Stream records from a CSV or NDJSON file (optionally gzipped), one dict per row.
+
+    The format is taken from the file name unless given. Empty CSV cells
+    are read as missing values.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    name = path[:-3] if path.endswith(".gz") else path
+    format = format or ("csv" if name.endswith(".csv") else "ndjson")
+    with opener(path, "rt", newline="") as source:
+        if format == "csv":
+            for row in csv.DictReader(source):
+                yield {key: value for key, value in row.items() if value != ""}
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _chunks(records: Iterable[T], size: int) -> Iterator[List[T]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(spec: ImportSpec, records: List[dict], row_numbers: Optional[List[int]] = None) -> Tuple[List[BaseModel], List[dict]]:
+    """Validate a chunk of records in one pass. Returns the valid rows and one error per rejected row.
+
+    The whole list is validated by pydantic-core at once; only when some
+    rows fail are the rest validated again without them. Errors name each
+    rejected row by its number in `row_numbers` (by default its 1-based
+    position in the chunk).
+    """
+    adapter = _adapter(spec)
+    try:
+        return adapter.validate_python(records), []
+    except ValidationError as e:
+        failures: Dict[int, List[str]] = {}
+        for error in e.errors():
+            index = error["loc"][0]
+            failures.setdefault(index, []).append(f"{'.'.join(str(part) for part in error['loc'][1:])}: {error['msg']}")
+    valid = adapter.validate_python([record for index, record in enumerate(records) if index not in failures])
+    row_numbers = row_numbers or list(range(1, len(records) + 1))
+    errors = [{"row": row_numbers[index], "errors": messages} for index, messages in sorted(failures.items())]
+    return valid, errors
+
+
+_adapters: Dict[str, TypeAdapter] = {}
+
+
+def _adapter(spec: ImportSpec) -> TypeAdapter:
+    if spec.table not in _adapters:
+        _adapters[spec.table] = TypeAdapter(List[spec.schema])
+    return _adapters[spec.table]
+
+
+def _row(spec: ImportSpec, item: BaseModel, now: datetime) -> tuple:
+    """The COPY tuple for a validated row, filling the defaults the ORM would otherwise apply."""
+    values = item.model_dump()
+    values.setdefault("version", 1)
+    for column in ("date_achieved", "status_changed_at"):
+        if column in spec.columns and values.get(column) is None:
+            values[column] = now
+    return tuple(values[column] for column in spec.columns)
+
+
+async def _ensure_references(db: AsyncSession, user_ids: List[int]) -> None:
+    """Create missing auth user references (and counters rows) for the users being loaded. Does not commit."""
+    references = Base.metadata.tables["auth_users"]
+    insert_ = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    await db.execute(insert_(references).on_conflict_do_nothing(index_elements=["id"]), [{"id": user_id} for user_id in user_ids])
+    await user_stats.ensure_user_stats_many(db, user_ids)
+
+
+async def _copy_rows(db: AsyncSession, table: Table, columns: Tuple[str, ...], rows: List[tuple]) -> None:
+    """Load rows with COPY on PostgreSQL, or one executemany INSERT elsewhere. Does not commit."""
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql":
+        raw = await connection.get_raw_connection()
+        # The asyncpg connection is inside the session's transaction already
+        await raw.driver_connection.copy_records_to_table(table.name, records=rows, columns=list(columns))
+        return
+    await connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+
+
+async def load_chunk(database: AsyncEngine, spec: ImportSpec, items: List[BaseModel]) -> None:
+    """Load validated rows into one database in a single transaction, updating the owners' counters."""
+    table = Base.metadata.tables[spec.table]
+    now = datetime.utcnow()
+    deltas: Dict[int, int] = {}
+    for item in items:
+        deltas[item.user_id] = deltas.get(item.user_id, 0) + 1
+    async with AsyncSession(database) as db:
+        try:
+            await _ensure_references(db, sorted(deltas))
+            await _copy_rows(db, table, spec.columns, [_row(spec, item, now) for item in items])
+            await user_stats.add_to_counters(db, spec.counter, deltas)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise Exception(f"Error importing {spec.table}: {str(e)}")
+
+
+def _targets(items: List[BaseModel]) -> Dict[AsyncEngine, List[BaseModel]]:
+    """Split rows by the database that owns their user."""
+    if shard_router is None:
+        return {engine: items}
+    groups = shard_router.group_by_shard(items, lambda item: item.user_id)
+    return {shard_router.engines[name]: group for name, group in groups.items()}
+
+
+async def import_records(
+    entity: str,
+    records: Iterable[dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    targets=_targets,
+    progress=None,
+) -> ImportStats:
+    """Validate and load records chunk by chunk, skipping (and reporting) invalid rows.
+
+    Records of another type in an NDJSON export (e.g. checkpoint lines) are
+    ignored. Each chunk is committed on its own, so a failure leaves the
+    earlier chunks loaded.
+    """
+    spec = IMPORT_SPECS[entity]
+    stats = ImportStats()
+    started = time.perf_counter()
+    wanted = (
+        (number, record) for number, record in enumerate(records, 1)
+        if record.get("type", spec.record_type) == spec.record_type
+    )
+    for numbered in _chunks(wanted, chunk_size):
+        chunk = [record for _, record in numbered]
+        items, errors = validate_chunk(spec, chunk, [number for number, _ in numbered])
+        stats.read += len(chunk)
+        stats.rejected += len(errors)
+        stats.errors.extend(errors[:MAX_REPORTED_ERRORS - len(stats.errors)])
+        for database, group in (targets(items).items() if items else ()):
+            await load_chunk(database, spec, group)
+        stats.loaded += len(items)
+        stats.seconds = time.perf_counter() - started
+        if progress is not None:
+            progress(stats)
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app import crud
+from app.core.settings import settings
+from app.db.database import engine, shard_router
+from app.services.invalidation_bus import invalidate_profile
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class GoalArchiver:
+    """Background task moving long-finished learning goals to cold storage.
+
+    Every run drains the eligible goals of each database (the shards, or the
+    primary without sharding) batch by batch, so the hot learning_goals
+    table and its indexes only hold goals that are still in use.
+    """
+
+    def __init__(self, engines: Iterable[AsyncEngine], statuses: List[str], max_age: timedelta, batch_size: int, interval_seconds: int):
+        self.engines = list(engines)
+        self.statuses = statuses
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.task: Optional[asyncio.Task] = None
+
+    async def archive_once(self) -> int:
+        """Archive every goal that is currently old enough. Returns the number of goals moved."""
+        changed_before = datetime.utcnow() - self.max_age
+        total = 0
+        for database_engine in self.engines:
+            while True:
+                async with AsyncSession(database_engine, expire_on_commit=False) as db:
+                    archived = await crud.learning_goal_archive.archive_learning_goals(db, self.statuses, changed_before, self.batch_size)
+                moved = sum(archived.values())
+                # Archived goals no longer appear on their owners' profiles
+                for user_id in archived:
+                    await invalidate_profile(user_id)
+                total += moved
+                if moved < self.batch_size:
+                    break
+                # Let request traffic in between batches
+                await asyncio.sleep(0)
+        return total
+
+    async def run(self):
+        """Archive goals every `interval_seconds` until cancelled."""
+        while True:
+            try:
+                archived = await self.archive_once()
+                if archived:
+                    logger.info(f"Archived {archived} learning goals")
+            except Exception as e:
+                logger.error(f"Error archiving learning goals: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the archiver in the background, unless it is disabled."""
+        if self.interval_seconds > 0 and self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background archiver."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+goal_archiver = GoalArchiver(
+    list(shard_router.engines.values()) if shard_router else [engine],
+    statuses=settings.GOAL_ARCHIVE_STATUSES,
+    max_age=timedelta(days=settings.GOAL_ARCHIVE_AFTER_DAYS),
+    batch_size=settings.GOAL_ARCHIVE_BATCH_SIZE,
+    interval_seconds=settings.GOAL_ARCHIVE_INTERVAL_SECONDS,
+)
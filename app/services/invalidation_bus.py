@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Set
+from app.core.settings import settings
+from app.services.message_queue_consumer import MessageQueueConsumer, message_queue_consumer
+from app.services.profile_cache import profile_cache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class InvalidationBus:
+    """Broadcasts cache invalidations to the other instances over a RabbitMQ fanout exchange.
+
+    Invalidations are applied locally by the caller and published here by
+    cache name (e.g. "profile") and key. Keys published within
+    `coalesce_seconds` of each other go out as one message, so a burst of
+    writes (a bulk badge award, an archiver batch) costs one publish.
+    Every instance consumes the exchange through its own exclusive queue,
+    which RabbitMQ deletes when the instance disconnects, and hands the
+    keys to the handler registered for each cache, skipping its own messages.
+
+    The bus shares the consumer's AMQP connection on a channel of its own.
+    Without a connection, invalidations stay local and other instances
+    serve cached entries until they expire.
+    """
+
+    def __init__(self, consumer: MessageQueueConsumer, exchange: str, handlers: Dict[str, Callable[[int], Awaitable[None]]], coalesce_seconds: float):
+        self.consumer = consumer
+        self.exchange = exchange
+        self.handlers = handlers
+        self.coalesce_seconds = coalesce_seconds
+        self.instance_id = uuid.uuid4().hex
+        self.channel = None
+        self.task: Optional[asyncio.Task] = None
+        self._pending: Dict[str, Set[int]] = {}
+        self._wakeup = asyncio.Event()
+
+    def publish(self, cache: str, key: int) -> None:
+        """Queue an invalidation for the other instances."""
+        if self.task is None:
+            return
+        self._pending.setdefault(cache, set()).add(key)
+        self._wakeup.set()
+
+    def encode(self, keys: Dict[str, Set[int]]) -> bytes:
+        """A compact message carrying the invalidated keys of each cache."""
+        message = {"origin": self.instance_id, "keys": {cache: sorted(values) for cache, values in keys.items()}}
+        return json.dumps(message, separators=(",", ":")).encode()
+
+    async def apply(self, body: bytes) -> int:
+        """Evict the keys of another instance's message. Returns the number of keys evicted."""
+        message = json.loads(body)
+        if message.get("origin") == self.instance_id:
+            return 0
+        evicted = 0
+        for cache, keys in message.get("keys", {}).items():
+            handler = self.handlers.get(cache)
+            if handler is None:
+                logger.warning(f"Ignoring invalidations for unknown cache {cache}")
+                continue
+            for key in set(keys):
+                await handler(key)
+                evicted += 1
+        return evicted
+
+    async def handle_message(self, message):
+        try:
+            await self.apply(message.body)
+        except Exception as e:
+            logger.error(f"Error applying cache invalidations: {e}")
+
+    async def flush(self) -> None:
+        """Publish the pending invalidations as one message."""
+        if not self._pending:
+            return
+        keys, self._pending = self._pending, {}
+        try:
+            await self.channel.basic_publish(self.encode(keys), exchange=self.exchange, routing_key="")
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidations: {e}")
+
+    async def run(self):
+        """Publish coalesced invalidations until cancelled."""
+        while True:
+            await self._wakeup.wait()
+            # Let the rest of the burst arrive before publishing
+            await asyncio.sleep(self.coalesce_seconds)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        """Subscribe to the exchange and start publishing, if the message queue is connected."""
+        if self.task is not None:
+            return
+        if not self.consumer.connection:
+            logger.warning("Message queue not available, cache invalidations stay local")
+            return
+        try:
+            self.channel = await self.consumer.connection.channel()
+            await self.channel.exchange_declare(self.exchange, exchange_type="fanout")
+            declare_ok = await self.channel.queue_declare("", exclusive=True, auto_delete=True)
+            await self.channel.queue_bind(declare_ok.queue, self.exchange)
+            await self.channel.basic_consume(declare_ok.queue, self.handle_message, no_ack=True)
+        except Exception as e:
+            logger.error(f"Failed to subscribe to cache invalidations: {e}")
+            self.channel = None
+            return
+        self._wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+        logger.info(f"Broadcasting cache invalidations on exchange {self.exchange}")
+
+    async def stop(self):
+        """Publish what is pending and stop broadcasting."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+            await self.flush()
+        if self.channel is not None:
+            try:
+                await self.channel.close()
+            except Exception:
+                pass
+            self.channel = None
+
+invalidation_bus = InvalidationBus(
+    message_queue_consumer,
+    exchange=settings.CACHE_INVALIDATION_EXCHANGE,
+    handlers={"profile": profile_cache.invalidate},
+    coalesce_seconds=settings.CACHE_INVALIDATION_COALESCE_MS / 1000,
+)
+
+async def invalidate_profile(user_id: int) -> None:
+    """Drop a user's cached profile on this instance and broadcast it to the others."""
+    await profile_cache.invalidate(user_id)
+    invalidation_bus.publish("profile", user_id)
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from sortedcontainers import SortedList
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app import crud
+from app.core.settings import settings
+from app.db.database import engine, shard_router
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Business logic: one level per 5 badges, capped at level 10
+BADGES_PER_LEVEL = 5
+MAX_LEVEL = 10
+
+def user_level(badge_count: int) -> int:
+    """The level (1-10) a user reaches with `badge_count` badges."""
+    return min(badge_count // BADGES_PER_LEVEL + 1, MAX_LEVEL)
+
+
+class FenwickTree:
+    """Binary indexed tree over non-negative integer slots: point updates and prefix sums in O(log n)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int) -> None:
+        """Add `delta` to slot `index`."""
+        index += 1
+        while index <= self.size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of slots 0..index (inclusive); 0 for a negative index."""
+        total = 0
+        index = min(index, self.size - 1) + 1
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def lower_bound(self, target: int) -> int:
+        """The smallest slot whose prefix sum reaches `target` (>= 1)."""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            if position + step <= self.size and self._tree[position + step] < target:
+                position += step
+                target -= self._tree[position]
+            step >>= 1
+        return position
+
+
+class Leaderboard:
+    """Users ranked by badge count, kept up to date as badges are awarded.
+
+    Users are grouped into one bucket per badge count, each holding its
+    user IDs in a SortedList, and a Fenwick tree counts the users per
+    bucket. That answers "how many users have more badges" in O(log n),
+    which is all a rank lookup or the start of a top-N page needs; moving
+    a user between buckets and finding their place within one are
+    O(log n) as well, however many users share a count. Ties are ranked
+    by user ID. Users without badges are not ranked.
+    """
+
+    def __init__(self, capacity: int = 128):
+        self._counts: Dict[int, int] = {}
+        self._buckets: Dict[int, SortedList] = {}
+        self._tree = FenwickTree(capacity)
+        # Deltas applied while a rebuild reads the counters, replayed onto its result
+        self._pending: Optional[Dict[int, int]] = None
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _grow(self, badge_count: int) -> None:
+        """Widen the tree so it has a slot for `badge_count`."""
+        size = self._tree.size
+        while size <= badge_count:
+            size *= 2
+        self._tree = FenwickTree(size)
+        for count, users in self._buckets.items():
+            self._tree.add(count, len(users))
+
+    def set(self, user_id: int, badge_count: int) -> None:
+        """Record a user's badge count."""
+        old = self._counts.pop(user_id, 0)
+        if old:
+            bucket = self._buckets[old]
+            bucket.remove(user_id)
+            if not bucket:
+                del self._buckets[old]
+            self._tree.add(old, -1)
+        if badge_count > 0:
+            if badge_count >= self._tree.size:
+                self._grow(badge_count)
+            self._counts[user_id] = badge_count
+            self._buckets.setdefault(badge_count, SortedList()).add(user_id)
+            self._tree.add(badge_count, 1)
+
+    def apply(self, user_id: int, delta: int) -> None:
+        """Adjust a user's badge count after badges were awarded (delta > 0) or removed (delta < 0)."""
+        if self._pending is not None:
+            self._pending[user_id] = self._pending.get(user_id, 0) + delta
+        self.set(user_id, max(self._counts.get(user_id, 0) + delta, 0))
+
+    def start_rebuild(self) -> None:
+        """Record the deltas applied from now on, so the next replace() keeps them."""
+        self._pending = {}
+
+    def abort_rebuild(self) -> None:
+        """Stop recording deltas after a rebuild failed."""
+        self._pending = None
+
+    def replace(self, counts: Iterable[Tuple[int, int]]) -> None:
+        """Replace every user's badge count at once, e.g. from a snapshot.
+
+        Deltas applied since start_rebuild() are replayed on top, since the
+        counts may have been read before those writes committed.
+        """
+        counts = [(user_id, badge_count) for user_id, badge_count in counts if badge_count > 0]
+        self._counts = dict(counts)
+        buckets: Dict[int, List[int]] = {}
+        for user_id, badge_count in counts:
+            buckets.setdefault(badge_count, []).append(user_id)
+        self._buckets = {badge_count: SortedList(users) for badge_count, users in buckets.items()}
+        self._tree = FenwickTree(128)
+        self._grow(max(self._buckets, default=0))
+        pending, self._pending = self._pending or {}, None
+        for user_id, delta in pending.items():
+            self.set(user_id, max(self._counts.get(user_id, 0) + delta, 0))
+        self.loaded = True
+
+    def _entry(self, user_id: int, badge_count: int, rank: int) -> dict:
+        return {"rank": rank, "user_id": user_id, "badge_count": badge_count, "level": user_level(badge_count)}
+
+    def rank_of(self, user_id: int) -> Optional[dict]:
+        """A user's entry, or None if they have no badges."""
+        badge_count = self._counts.get(user_id)
+        if badge_count is None:
+            return None
+        above = len(self._counts) - self._tree.prefix_sum(badge_count)
+        within = self._buckets[badge_count].bisect_left(user_id)
+        return self._entry(user_id, badge_count, above + within + 1)
+
+    def top(self, limit: int, offset: int = 0) -> List[dict]:
+        """Entries ranked offset+1 .. offset+limit, best first."""
+        total = len(self._counts)
+        entries = []
+        position = offset
+        while len(entries) < limit and position < total:
+            # The bucket holding the user at this position, counting from the top
+            badge_count = self._tree.lower_bound(total - position)
+            above = total - self._tree.prefix_sum(badge_count)
+            bucket = self._buckets[badge_count]
+            for user_id in bucket.islice(position - above, position - above + limit - len(entries)):
+                position += 1
+                entries.append(self._entry(user_id, badge_count, position))
+        return entries
+
+    def entries(self) -> List[dict]:
+        """Every ranked entry, best first."""
+        return self.top(len(self._counts))
+
+
+class LeaderboardRefresher:
+    """Background task reconciling the leaderboard with the user_stats counters.
+
+    Badges awarded through this instance update the leaderboard as they
+    happen; awards handled by other instances (or imported in bulk) are
+    picked up by the periodic rebuild. Awards made here while a rebuild
+    reads the counters are replayed onto its result rather than lost; one
+    committed just before its shard was read is counted twice until the
+    next rebuild. The rebuild also brings the snapshot table that
+    instances load on startup up to date, one instance at a time.
+    """
+
+    def __init__(self, board: Leaderboard, engines: Iterable[AsyncEngine], snapshot_engine: AsyncEngine, interval_seconds: int):
+        self.board = board
+        self.engines = list(engines)
+        self.snapshot_engine = snapshot_engine
+        self.interval_seconds = interval_seconds
+        self.task: Optional[asyncio.Task] = None
+
+    async def load_snapshot(self) -> int:
+        """Fill the leaderboard from the last snapshot. Returns the number of users loaded."""
+        async with AsyncSession(self.snapshot_engine) as db:
+            counts = await crud.leaderboard.get_leaderboard_snapshot(db)
+        self.board.replace(counts)
+        return len(counts)
+
+    async def refresh_once(self) -> int:
+        """Rebuild the leaderboard from the counters on every database and snapshot it."""
+        counts: List[Tuple[int, int]] = []
+        self.board.start_rebuild()
+        try:
+            for database_engine in self.engines:
+                async with AsyncSession(database_engine) as db:
+                    counts.extend(await crud.leaderboard.get_badge_counts(db))
+        except Exception:
+            self.board.abort_rebuild()
+            raise
+        self.board.replace(counts)
+        async with AsyncSession(self.snapshot_engine) as db:
+            written = await crud.leaderboard.update_leaderboard_snapshot(db, self.board.entries())
+        if written is None:
+            logger.debug("Another instance is writing the leaderboard snapshot")
+        return len(self.board)
+
+    async def run(self):
+        """Load the last snapshot, then rebuild every `interval_seconds` until cancelled."""
+        try:
+            logger.info(f"Loaded {await self.load_snapshot()} users from the leaderboard snapshot")
+        except Exception as e:
+            logger.error(f"Error loading leaderboard snapshot: {e}")
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Error refreshing leaderboard: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start the refresher in the background, unless it is disabled."""
+        if self.interval_seconds > 0 and self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the background refresher."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+leaderboard = Leaderboard()
+
+leaderboard_refresher = LeaderboardRefresher(
+    leaderboard,
+    list(shard_router.engines.values()) if shard_router else [engine],
+    snapshot_engine=engine,
+    interval_seconds=settings.LEADERBOARD_REFRESH_INTERVAL_SECONDS,
+)
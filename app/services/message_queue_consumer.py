@@ -5,6 +5,7 @@ import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.settings import settings
 from app.models.auth_user_reference import AuthUserReference
+from app.db.sharding import shard_key
 from app.db.database import SessionLocal
 
 # Set up logging
@@ -110,21 +111,23 @@ class MessageQueueConsumer:
                 
                 logger.info(f"Processing UserCreated event for user {user_id} ({username})")
                 
-                # Check if we already have an auth user reference with this ID
-                result = await db.execute(
-                    AuthUserReference.__table__.select().where(AuthUserReference.id == user_id)
-                )
-                existing_auth_user = await result.fetchone()
-                
-                # If we don't have an auth user reference, create one
-                if not existing_auth_user:
-                    # Create a new auth user reference
-                    auth_user_ref = AuthUserReference(id=user_id)
-                    db.add(auth_user_ref)
-                    await db.commit()
-                    logger.info(f"Created auth user reference for user {user_id}")
-                else:
-                    logger.info(f"Auth user reference already exists for user {user_id}")
+                # The reference lives on the user's shard (or the primary without sharding)
+                with shard_key(user_id):
+                    # Check if we already have an auth user reference with this ID
+                    result = await db.execute(
+                        AuthUserReference.__table__.select().where(AuthUserReference.id == user_id)
+                    )
+                    existing_auth_user = await result.fetchone()
+                    
+                    # If we don't have an auth user reference, create one
+                    if not existing_auth_user:
+                        # Create a new auth user reference
+                        auth_user_ref = AuthUserReference(id=user_id)
+                        db.add(auth_user_ref)
+                        await db.commit()
+                        logger.info(f"Created auth user reference for user {user_id}")
+                    else:
+                        logger.info(f"Auth user reference already exists for user {user_id}")
             except Exception as e:
                 # Rollback the transaction in case of error
                 await db.rollback()
@@ -0,0 +1,152 @@
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, Optional
+from app.cache import CacheBackend, MemoryCache, cache
+from app.core.settings import settings
+
+# Number of recent hit ages kept for the staleness percentiles
+_AGE_SAMPLE_SIZE = 1000
+
+
+class ProfileCache:
+    """Cache of serialized profile responses, keyed by user ID, on a CacheBackend.
+
+    Entries are kept in `backend` (by default an in-process MemoryCache
+    of `max_entries` profiles; with CACHE_BACKEND=redis the shared cache)
+    for `ttl_seconds`, and dropped whenever this instance changes the
+    user's badges or goals. Writes handled by other instances are applied
+    through the invalidation bus, or once the entry expires, which bounds
+    how stale a cached profile can be; the age of every entry served is
+    recorded to show how stale they actually are.
+
+    A fill that raced with an invalidation is discarded: callers take a
+    token() before building the profile and pass it to store(), which
+    refuses the entry if the user was invalidated in the meantime.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, backend: Optional[CacheBackend] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._own_backend = backend is None
+        self.backend = backend if backend is not None else MemoryCache(max_entries)
+        # Sequence number of each user's latest invalidation, bounded like the entries
+        self._invalidations: "OrderedDict[int, int]" = OrderedDict()
+        self._sequence = 0
+        # Invalidations older than this were forgotten; fills from before it are refused
+        self._forgotten_before = 0
+        self._ages: Deque[float] = deque(maxlen=_AGE_SAMPLE_SIZE)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.discarded_fills = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"profile:{user_id}"
+
+    def _hit(self, value: bytes) -> bytes:
+        """Record a hit on a stored entry and return its profile."""
+        stored_at, _, data = value.partition(b":")
+        self.hits += 1
+        self._ages.append(max(time.time() - float(stored_at), 0.0))
+        return data
+
+    async def get(self, user_id: int) -> Optional[bytes]:
+        """The cached profile, or None on a miss."""
+        value = await self.backend.get(self._key(user_id)) if self.enabled else None
+        if value is None:
+            self.misses += 1
+            return None
+        return self._hit(value)
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, bytes]:
+        """The cached profiles of the users that were hits, in one backend lookup."""
+        user_ids = list(user_ids)
+        values = await self.backend.get_many([self._key(user_id) for user_id in user_ids]) if self.enabled else {}
+        profiles = {}
+        for user_id in user_ids:
+            value = values.get(self._key(user_id))
+            if value is None:
+                self.misses += 1
+            else:
+                profiles[user_id] = self._hit(value)
+        return profiles
+
+    def token(self) -> int:
+        """Mark the start of a fill; pass the result to store()."""
+        return self._sequence
+
+    def _fresh(self, user_id: int, token: int) -> bool:
+        """Whether a profile built since `token` may be cached."""
+        if token < self._forgotten_before or self._invalidations.get(user_id, -1) > token:
+            self.discarded_fills += 1
+            return False
+        return True
+
+    async def store(self, user_id: int, data: bytes, token: int) -> bool:
+        """Cache a profile built since `token`, unless the user was invalidated meanwhile."""
+        return user_id in await self.store_many({user_id: data}, token)
+
+    async def store_many(self, profiles: Dict[int, bytes], token: int) -> Dict[int, bytes]:
+        """Cache profiles built since `token` in one backend write; returns those that were cached."""
+        if not self.enabled:
+            return {}
+        profiles = {user_id: data for user_id, data in profiles.items() if self._fresh(user_id, token)}
+        if profiles:
+            stored_at = b"%.6f:" % time.time()
+            await self.backend.set_many({self._key(user_id): stored_at + data for user_id, data in profiles.items()}, self.ttl_seconds)
+        return profiles
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop a user's cached profile after their data changed."""
+        self._sequence += 1
+        self.invalidations += 1
+        self._invalidations[user_id] = self._sequence
+        self._invalidations.move_to_end(user_id)
+        while len(self._invalidations) > max(self.max_entries, 1):
+            _, sequence = self._invalidations.popitem(last=False)
+            self._forgotten_before = sequence
+        await self.backend.delete(self._key(user_id))
+
+    def clear(self) -> None:
+        """Drop every entry (of an in-process backend) and reset the metrics."""
+        self.__init__(self.max_entries, self.ttl_seconds, None if self._own_backend else self.backend)
+
+    def _age_percentile(self, percentile: float) -> Optional[float]:
+        samples = sorted(self._ages)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))]
+
+    def snapshot(self) -> Dict[str, object]:
+        """Current size, hit/miss counters and the age of recently served entries."""
+        lookups = self.hits + self.misses
+        return {
+            # Only known for an in-process backend
+            "entries": len(self.backend) if isinstance(self.backend, MemoryCache) else None,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "discarded_fills": self.discarded_fills,
+            "hit_age_seconds": {
+                "p50": self._age_percentile(50),
+                "p95": self._age_percentile(95),
+                "max": max(self._ages, default=None),
+            },
+        }
+
+
+# With CACHE_BACKEND=memory each instance keeps its own PROFILE_CACHE_MAX_ENTRIES
+# profiles; otherwise they share the configured cache (or none is kept)
+profile_cache = ProfileCache(
+    settings.PROFILE_CACHE_MAX_ENTRIES,
+    settings.PROFILE_CACHE_TTL_SECONDS,
+    backend=None if settings.CACHE_BACKEND == "memory" else cache,
+)
@@ -1,14 +1,34 @@
+import hashlib
+import json
+import logging
 from fastapi import Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud, models, schemas
-from app.db.database import get_db
-from typing import List
-from app.services.auth_service import auth_service_client
+from app.db.database import SessionLocal, get_db, mark_user_write, mark_user_writes, should_read_from_primary, users_reading_from_primary
+from app.crud.pagination import InvalidCursorError
+from app.crud.user_stats import CounterLimitReached
+from app.crud.learning_goal import InvalidStatusTransition, LearningGoalNotDeletable, StaleLearningGoal
+from typing import Dict, List, Optional, Tuple
+from app.services.auth_service import AuthServiceUnavailable, auth_service_client
+from app.services.invalidation_bus import invalidate_profile
+from app.services.leaderboard import leaderboard, user_level
+from app.services.profile_cache import profile_cache
 from app.core.settings import settings
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi.security import OAuth2PasswordBearer
 
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Per-user limits, enforced through the user_stats counters
+MAX_BADGES_PER_USER = 100
+MAX_LEARNING_GOALS_PER_USER = 50
+
+# Most profiles a single batch request may ask for
+MAX_PROFILES_PER_BATCH = 200
+
 # We need to define the oauth2_scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -47,55 +67,132 @@ class UserService:
         if not user_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
+        # Get user's badges, learning goals and their counts in one round trip
+        profile_data = await crud.profile.get_profile_data(self.db, user_id=auth_user_id)
+        
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
+        # (this session may be on a replica, so it is written through the primary)
+        if not profile_data["reference_exists"]:
+            await self._backfill_auth_user_references([auth_user_id])
         
-        # Get user's badges and learning goals from our service
-        badges = await self.get_user_badges(auth_user_id)
-        learning_goals = await self.get_user_learning_goals(auth_user_id)
+        return self._build_profile(user_data, profile_data)
+
+    @staticmethod
+    def _build_profile(user_data: dict, profile_data: dict) -> dict:
+        """Combine a user's auth service record with their badges, goals and counters."""
+        badges = profile_data["badges"]
+        learning_goals = profile_data["learning_goals"]
         
         # Business logic: Calculate user statistics
-        total_badges = len(badges)
-        total_goals = len(learning_goals)
+        total_badges = profile_data["total_badges"]
+        total_goals = profile_data["total_goals"]
         
         # Business logic: Determine user level based on badges
-        user_level = min(total_badges // 5 + 1, 10)  # Level 1-10 based on badges
+        level = user_level(total_badges)
         
         # Combine the data
         user_profile = {
-            "id": user_data.id,
+            "id": user_data["id"],
             "username": user_data["username"],
             "email": user_data["email"],
-            "display_name": user_data.display_name,
-            "bio": user_data.bio,
-            "avatar_url": user_data.avatar_url,
-            "location": user_data.location,
+            "display_name": user_data.get("display_name"),
+            "bio": user_data.get("bio"),
+            "avatar_url": user_data.get("avatar_url"),
+            "location": user_data.get("location"),
             "badges": badges,
             "learning_goals": learning_goals,
             "statistics": {
                 "total_badges": total_badges,
                 "total_goals": total_goals,
-                "level": user_level
+                "level": level
             }
         }
         
         return user_profile
 
+    async def get_user_profile_json(self, auth_user_id: int) -> bytes:
+        """Get a user's profile serialized as JSON, from the profile cache when possible."""
+        cached = await profile_cache.get(auth_user_id)
+        if cached is not None:
+            return cached
+        
+        token = profile_cache.token()
+        user_profile = await self.get_user_profile(auth_user_id)
+        data = json.dumps(jsonable_encoder(user_profile)).encode()
+        
+        # Business logic: Right after a write the profile may have been read from a
+        # lagging replica, so only cache it once the user's reads are back on it
+        if not await should_read_from_primary(auth_user_id):
+            await profile_cache.store(auth_user_id, data, token)
+        
+        return data
+
+    async def get_user_profiles_json(self, auth_user_ids: List[int]) -> bytes:
+        """Get many users' profiles as one JSON document keyed by user ID.
+
+        The document has a `profiles` object and a `missing` list of the IDs
+        the auth service does not know. Cached profiles are reused; the rest
+        are resolved with one auth service call and one query per table.
+        """
+        auth_user_ids = list(dict.fromkeys(auth_user_ids))
+        profiles: Dict[int, bytes] = await profile_cache.get_many(auth_user_ids)
+        
+        wanted = [auth_user_id for auth_user_id in auth_user_ids if auth_user_id not in profiles]
+        if wanted:
+            token = profile_cache.token()
+            # Business logic: Validate users exist in auth service, in one batched call
+            try:
+                users = await auth_service_client.get_users(wanted)
+            except AuthServiceUnavailable:
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Auth service unavailable")
+            found = [auth_user_id for auth_user_id in wanted if auth_user_id in users]
+            profile_data = await crud.profile.get_profiles_data(self.db, found) if found else {}
+            
+            # Ensure the auth user references exist, as get_user_profile does; this
+            # session may be on a replica, so they are written through the primary
+            unreferenced = [auth_user_id for auth_user_id in found if not profile_data[auth_user_id]["reference_exists"]]
+            if unreferenced:
+                await self._backfill_auth_user_references(unreferenced)
+            reading_from_primary = await users_reading_from_primary(found)
+            for auth_user_id in found:
+                profiles[auth_user_id] = json.dumps(jsonable_encoder(self._build_profile(users[auth_user_id], profile_data[auth_user_id]))).encode()
+            await profile_cache.store_many({auth_user_id: profiles[auth_user_id] for auth_user_id in found if auth_user_id not in reading_from_primary}, token)
+        
+        # The cached profiles are already serialized, so the document is assembled around them
+        entries = b",".join(b'"%d":%s' % (auth_user_id, profiles[auth_user_id]) for auth_user_id in auth_user_ids if auth_user_id in profiles)
+        missing = [auth_user_id for auth_user_id in auth_user_ids if auth_user_id not in profiles]
+        return b'{"profiles":{%s},"missing":%s}' % (entries, json.dumps(missing).encode())
+
+    async def _ensure_auth_user_reference(self, auth_user_id: int) -> None:
+        """Backfill a user's auth reference if this session does not see it.
+
+        The check runs on the request's session, which may be a replica; only
+        a missing reference costs a write through the primary.
+        """
+        if not await crud.profile.auth_user_reference_exists(self.db, user_id=auth_user_id):
+            await self._backfill_auth_user_references([auth_user_id])
+
+    @staticmethod
+    async def _backfill_auth_user_references(auth_user_ids: List[int]) -> None:
+        """Create missing auth user references on the primary; a failure does not fail the read."""
+        try:
+            async with SessionLocal() as db:
+                await crud.profile.ensure_auth_user_references(db, auth_user_ids)
+        except Exception as e:
+            logger.error(f"Error backfilling auth user references: {e}")
+
     async def get_my_profile(self, current_user: dict = Depends(get_current_user_from_token)) -> dict:
         """Get the current user's profile with additional information."""
         # Business logic: Add additional information to the user profile
         auth_user_id = current_user["id"]
         
-        # Get user's badges and learning goals
-        badges = await self.get_user_badges(auth_user_id)
-        learning_goals = await self.get_user_learning_goals(auth_user_id)
-        
-        # Business logic: Calculate user statistics
-        total_badges = len(badges)
-        total_goals = len(learning_goals)
+        # Business logic: Read user statistics from the counters row
+        stats = await crud.user_stats.get_user_stats(self.db, user_id=auth_user_id)
+        total_badges = stats.badge_count if stats else 0
+        total_goals = stats.goal_count if stats else 0
         
         # Business logic: Determine user level based on badges
-        user_level = min(total_badges // 5 + 1, 10)  # Level 1-10 based on badges
+        level = user_level(total_badges)
         
         # Combine the data
         user_profile = {
@@ -103,7 +200,7 @@ class UserService:
             "statistics": {
                 "total_badges": total_badges,
                 "total_goals": total_goals,
-                "level": user_level
+                "level": level
             }
         }
         
@@ -117,16 +214,57 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
+        await self._ensure_auth_user_reference(auth_user_id)
         
-        # Get badges from database
+        # Get badges from database (already sorted by achievement date, newest first)
         badges = await crud.badge.get_badges_by_user(self.db, auth_user_id=auth_user_id)
         
-        # Business logic: Sort badges by achievement date (newest first)
-        badges.sort(key=lambda x: x.date_achieved, reverse=True)
-        
         return badges
 
+    async def get_list_etag(self, auth_user_id: int, kind: str, limit: int, cursor: Optional[str] = None) -> str:
+        """Get a strong ETag for one page of a user's badges or goals.
+
+        The tag combines the user's version stamp, which every badge and goal
+        write bumps, with the page being requested. Read it before the list
+        itself, so a write landing in between can only make the tag older
+        than the page and the client revalidates again on its next poll.
+        Unknown users and invalid cursors are rejected first, so they never
+        get a tag, nor a 304 for sending one back.
+        """
+        # Business logic: Validate user exists in auth service (the lookup is cached)
+        user_data = await auth_service_client.get_user(auth_user_id)
+        if not user_data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        
+        if cursor:
+            decode = crud.badge.decode_badges_cursor if kind == "badges" else crud.learning_goal.decode_learning_goals_cursor
+            try:
+                decode(cursor)
+            except InvalidCursorError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        
+        version, reference_exists = await crud.user_stats.get_version_and_reference(self.db, user_id=auth_user_id)
+        
+        # Ensure the auth user reference exists, as get_user_profile does; the list
+        # routes read the tag first, so the list reads themselves do not check again
+        if not reference_exists:
+            await self._backfill_auth_user_references([auth_user_id])
+        
+        page = hashlib.sha256(f"{limit}:{cursor or ''}".encode()).hexdigest()[:16]
+        return f'"{kind}-{auth_user_id}-{version}-{page}"'
+
+    async def get_user_badges_page(self, auth_user_id: int, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[schemas.Badge], Optional[str]]:
+        """Get a page of badges for a user and the cursor for the next page."""
+        # Business logic: Validate user exists in auth service
+        user_data = await auth_service_client.get_user(auth_user_id)
+        if not user_data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        
+        try:
+            return await crud.badge.get_badges_page_by_user(self.db, auth_user_id=auth_user_id, limit=limit, cursor=cursor)
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
     async def create_badge(self, auth_user_id: int, badge: schemas.BadgeCreate, current_user: dict = Depends(get_current_user_from_token)) -> schemas.Badge:
         """Create a badge for a user."""
         # Business logic: Authorization check
@@ -139,25 +277,78 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
+        await crud.profile.ensure_auth_user_references(self.db, [auth_user_id])
         
         # Business logic: Validate badge data
         if not badge.name or len(badge.name.strip()) == 0:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Badge name is required")
         
-        # Business logic: Limit the number of badges a user can have
-        existing_badges = await self.get_user_badges(auth_user_id)
-        if len(existing_badges) >= 100:  # Limit to 100 badges per user
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Maximum number of badges (100) reached")
-        
         # Create the badge
-        created_badge = await crud.badge.create_user_badge(self.db, badge=badge, auth_user_id=auth_user_id)
+        # Business logic: Limit the number of badges a user can have, enforced
+        # by the badge counter in the same transaction as the insert
+        try:
+            created_badge = await crud.badge.create_user_badge(self.db, badge=badge, auth_user_id=auth_user_id, max_badges=MAX_BADGES_PER_USER)
+        except CounterLimitReached:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Maximum number of badges ({MAX_BADGES_PER_USER}) reached")
+        
+        # Business logic: Keep this user's reads on the primary for a while
+        await mark_user_write(auth_user_id)
+        
+        # Business logic: Drop the user's cached profile here and on the other instances
+        await invalidate_profile(auth_user_id)
+        
+        # Business logic: Move the user up the leaderboard
+        leaderboard.apply(auth_user_id, 1)
         
         # Business logic: Log badge creation
         print(f"Badge '{created_badge.name}' created for user {auth_user_id}")
         
         return created_badge
 
+    async def create_badges_bulk(self, awards: List[schemas.BadgeAward]) -> dict:
+        """Award many badges at once, e.g. from the end-of-day gamification jobs."""
+        # Business logic: Validate users exist in auth service, in one batched call
+        try:
+            users = await auth_service_client.get_users({award.user_id for award in awards})
+        except AuthServiceUnavailable:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Auth service unavailable")
+        
+        # Ensure the auth user references exist in our database, as create_badge does
+        await crud.profile.ensure_auth_user_references(self.db, list(users))
+        
+        # Business logic: Limits are validated per user inside the bulk insert;
+        # awards for unknown users or that would exceed them are rejected individually
+        results = await crud.badge.create_badges_bulk(self.db, awards, max_badges=MAX_BADGES_PER_USER, known_user_ids=users)
+        created = sum(1 for result in results if result["status"] == "created")
+        failed = sum(1 for result in results if result["status"] == "failed")
+        rejected = len(results) - created - failed
+        
+        # Business logic: Keep the awarded users' reads on the primary for a while
+        awarded: Dict[int, int] = {}
+        for result in results:
+            if result["status"] == "created":
+                awarded[result["user_id"]] = awarded.get(result["user_id"], 0) + 1
+        await mark_user_writes(awarded)
+        for user_id, badge_count in awarded.items():
+            await invalidate_profile(user_id)
+            # Business logic: Move the awarded users up the leaderboard
+            leaderboard.apply(user_id, badge_count)
+        
+        # Business logic: Log bulk badge creation
+        logger.info(f"Bulk badge award: {created} created, {rejected} rejected, {failed} failed")
+        
+        return {"created": created, "rejected": rejected, "failed": failed, "results": results}
+
+    async def get_leaderboard(self, limit: int = 10, offset: int = 0, auth_user_id: Optional[int] = None) -> dict:
+        """Get a page of the badge leaderboard, and optionally one user's own standing."""
+        # Business logic: Rankings come from the in-memory leaderboard, which is
+        # kept current by badge awards and rebuilt from the counters periodically
+        return {
+            "total": len(leaderboard),
+            "entries": leaderboard.top(limit, offset),
+            "user": leaderboard.rank_of(auth_user_id) if auth_user_id is not None else None,
+        }
+
     async def get_user_learning_goals(self, auth_user_id: int):
         """Get learning goals for a user by auth-service user ID."""
         # Business logic: Validate user exists in auth service
@@ -166,16 +357,37 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
-        
-        # Get learning goals from database
-        goals = await crud.learning_goal.get_learning_goals_by_user(self.db, auth_user_id=auth_user_id)
+        await self._ensure_auth_user_reference(auth_user_id)
         
-        # Business logic: Sort goals by ID (newest first, assuming higher ID means newer)
-        goals.sort(key=lambda x: x.id, reverse=True)
+        # Get learning goals from database (already sorted by ID, newest first)
+        goals = await crud.learning_goal.get_learning_goals_by_user(self.db, user_id=auth_user_id)
         
         return goals
 
+    async def get_user_learning_goals_page(self, auth_user_id: int, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of learning goals for a user and the cursor for the next page."""
+        # Business logic: Validate user exists in auth service
+        user_data = await auth_service_client.get_user(auth_user_id)
+        if not user_data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        
+        try:
+            return await crud.learning_goal.get_learning_goals_page_by_user(self.db, user_id=auth_user_id, limit=limit, cursor=cursor)
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def get_user_archived_learning_goals_page(self, auth_user_id: int, limit: int = 100, cursor: Optional[str] = None):
+        """Get a page of a user's archived learning goals and the cursor for the next page."""
+        # Business logic: Validate user exists in auth service
+        user_data = await auth_service_client.get_user(auth_user_id)
+        if not user_data:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        
+        try:
+            return await crud.learning_goal_archive.get_archived_learning_goals_page_by_user(self.db, user_id=auth_user_id, limit=limit, cursor=cursor)
+        except InvalidCursorError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
     async def create_learning_goal(self, auth_user_id: int, learning_goal: schemas.LearningGoalCreate, current_user: dict = Depends(get_current_user_from_token)):
         """Create a learning goal for a user."""
         # Business logic: Authorization check
@@ -188,23 +400,29 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
+        await crud.profile.ensure_auth_user_references(self.db, [auth_user_id])
         
         # Business logic: Validate learning goal data
         if not learning_goal.title or len(learning_goal.title.strip()) == 0:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Learning goal title is required")
         
-        # Business logic: Limit the number of learning goals a user can have
-        existing_goals = await self.get_user_learning_goals(auth_user_id)
-        if len(existing_goals) >= 50:  # Limit to 50 learning goals per user
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Maximum number of learning goals (50) reached")
-        
         # Business logic: Set default status if not provided
         if not learning_goal.status:
             learning_goal.status = "not_started"
         
         # Create the learning goal
-        created_goal = await crud.learning_goal.create_user_learning_goal(self.db, learning_goal=learning_goal, auth_user_id=auth_user_id)
+        # Business logic: Limit the number of learning goals a user can have,
+        # enforced by the goal counter in the same transaction as the insert
+        try:
+            created_goal = await crud.learning_goal.create_user_learning_goal(self.db, learning_goal=learning_goal, user_id=auth_user_id, max_goals=MAX_LEARNING_GOALS_PER_USER)
+        except CounterLimitReached:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Maximum number of learning goals ({MAX_LEARNING_GOALS_PER_USER}) reached")
+        
+        # Business logic: Keep this user's reads on the primary for a while
+        await mark_user_write(auth_user_id)
+        
+        # Business logic: Drop the user's cached profile here and on the other instances
+        await invalidate_profile(auth_user_id)
         
         # Business logic: Log learning goal creation
         print(f"Learning goal '{created_goal.title}' created for user {auth_user_id}")
@@ -223,29 +441,24 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
-        
-        # Business logic: Validate that the learning goal exists and belongs to the user
-        existing_goal = await self.get_learning_goal(auth_user_id, goal_id)
-        if existing_goal is None:
+        await crud.profile.ensure_auth_user_references(self.db, [auth_user_id])
+        
+        # Business logic: Update the goal only if it belongs to the user, the status
+        # transition is valid and (if given) the version still matches, in one statement
+        try:
+            updated_goal = await crud.learning_goal.update_learning_goal(self.db, goal_id=goal_id, user_id=auth_user_id, learning_goal=learning_goal)
+        except InvalidStatusTransition as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid status transition from {e.current_status} to {e.new_status}")
+        except StaleLearningGoal as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Learning goal was modified (now at version {e.current_version})")
+        if updated_goal is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Learning goal not found")
         
-        # Business logic: Validate status transitions
-        if learning_goal.status and existing_goal.status:
-            valid_transitions = {
-                "not_started": ["in_progress", "completed", "archived"],
-                "in_progress": ["paused", "completed", "archived"],
-                "paused": ["in_progress", "completed", "archived"],
-                "completed": ["archived"],
-                "archived": []
-            }
-            if learning_goal.status not in valid_transitions.get(existing_goal.status, []):
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid status transition from {existing_goal.status} to {learning_goal.status}")
+        # Business logic: Keep this user's reads on the primary for a while
+        await mark_user_write(auth_user_id)
         
-        # Update the learning goal
-        updated_goal = await crud.learning_goal.update_learning_goal(self.db, goal_id=goal_id, auth_user_id=auth_user_id, learning_goal=learning_goal)
-        if updated_goal is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Learning goal not found")
+        # Business logic: Drop the user's cached profile here and on the other instances
+        await invalidate_profile(auth_user_id)
         
         # Business logic: Log learning goal update
         print(f"Learning goal '{updated_goal.title}' updated for user {auth_user_id}")
@@ -254,8 +467,8 @@ class UserService:
 
     async def get_learning_goal(self, auth_user_id: int, goal_id: int):
         """Get a specific learning goal for a user."""
-        # Ensure the auth user reference exists
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
+        # Ensure the auth user reference exists in our database
+        await self._ensure_auth_user_reference(auth_user_id)
         
         return await crud.learning_goal.get_learning_goal(self.db, goal_id=goal_id, auth_user_id=auth_user_id)
 
@@ -271,22 +484,23 @@ class UserService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         
         # Ensure the auth user reference exists in our database
-        await auth_service_client.ensure_auth_user_reference_exists(auth_user_id, self.db)
-        
-        # Business logic: Validate that the learning goal exists and belongs to the user
-        existing_goal = await self.get_learning_goal(auth_user_id, goal_id)
-        if existing_goal is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Learning goal not found")
+        await crud.profile.ensure_auth_user_references(self.db, [auth_user_id])
         
-        # Business logic: Prevent deletion of completed goals (archive instead)
-        if existing_goal.status == "completed":
+        # Business logic: Delete the goal only if it belongs to the user and is not
+        # completed (completed goals are archived instead), in one statement
+        try:
+            deleted_goal = await crud.learning_goal.delete_learning_goal(self.db, goal_id=goal_id, user_id=auth_user_id)
+        except LearningGoalNotDeletable:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete completed learning goals. Please archive them instead.")
-        
-        # Delete the learning goal
-        deleted_goal = await crud.learning_goal.delete_learning_goal(self.db, goal_id=goal_id, auth_user_id=auth_user_id)
         if deleted_goal is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Learning goal not found")
         
+        # Business logic: Keep this user's reads on the primary for a while
+        await mark_user_write(auth_user_id)
+        
+        # Business logic: Drop the user's cached profile here and on the other instances
+        await invalidate_profile(auth_user_id)
+        
         # Business logic: Log learning goal deletion
         print(f"Learning goal '{deleted_goal.title}' deleted for user {auth_user_id}")
         
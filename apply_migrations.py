@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 """
 Script to apply database migrations for the user-service.
+
+Runs `alembic upgrade head` against the primary (DATABASE_URL) and then
+against every shard in DATABASE_SHARD_URLS. The shards carry the same
+schema as the primary, and the service refuses to start until every one
+of them is at head, so run this after each deploy that adds a migration:
+
+    python apply_migrations.py
+
+A single database can be migrated by hand by passing its URL to alembic:
+
+    alembic -x url=postgresql://.../users_a upgrade head
 """
 
-import asyncio
+import argparse
 import sys
 import os
 import logging
@@ -15,20 +26,31 @@ logger = logging.getLogger(__name__)
 # Add the app directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.db.database import engine, Base
-from app.models import *
-from sqlalchemy import text
-
-async def apply_migrations():
-    """Apply the database migrations."""
-    # Create all tables based on the current models
-    async with engine.begin() as conn:
-        # Drop existing tables
-        await conn.run_sync(Base.metadata.drop_all)
-        # Create new tables
-        await conn.run_sync(Base.metadata.create_all)
-        
-        logger.info("Database migrations applied successfully!")
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.engine import make_url
+from app.core.settings import settings
+from app.db.migrations import ALEMBIC_INI
+
+def sync_url(url: str) -> str:
+    """The URL with its async driver swapped for the default one, as alembic runs synchronously."""
+    parsed = make_url(url)
+    return parsed.set(drivername=parsed.get_backend_name()).render_as_string(hide_password=False)
+
+def upgrade(name: str, url: str):
+    """Upgrade one database to the head revision."""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    config.cmd_opts = argparse.Namespace(x=[f"url={sync_url(url)}"])
+    command.upgrade(config, "head")
+    logger.info(f"Migrated {name} to head")
+
+def apply_migrations():
+    """Apply the database migrations to the primary and every shard."""
+    databases = {"primary": settings.DATABASE_URL, **{f"shard {name}": url for name, url in settings.DATABASE_SHARD_URLS.items()}}
+    for name, url in databases.items():
+        upgrade(name, url)
+    logger.info("Database migrations applied successfully!")
 
 if __name__ == "__main__":
-    asyncio.run(apply_migrations())
\ No newline at end of file
+    apply_migrations()
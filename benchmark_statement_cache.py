@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the cached statements used by the hot CRUD queries.
+Compares the per-call Python overhead of rebuilding a select() construct on
+every call, of a lambda_stmt() (which caches the construct by the lambda's
+code) and of the prebuilt, parameterized statements in app.crud, against
+in-memory SQLite.
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy import create_engine, lambda_stmt, select
+from sqlalchemy.orm import Session
+from app.db.database import Base
+from app.models import *
+from app.models.auth_user_reference import AuthUserReference
+from app.crud.badge import _badges_by_user_query
+from app.crud.learning_goal import _learning_goals_by_user_query, _LEARNING_GOAL_BY_ID
+from app.crud.user import _USER_BY_ID
+
+ITERATIONS = 5000
+
+def plain_badges_query(auth_user_id, limit):
+    """The query as it was built before: a fresh select() on every call."""
+    return (
+        select(Badge)
+        .filter(Badge.user_id == auth_user_id)
+        .order_by(Badge.date_achieved.desc(), Badge.id.desc())
+        .limit(limit)
+    ), {}
+
+def plain_learning_goals_query(user_id, limit):
+    """The query as it was built before: a fresh select() on every call."""
+    return (
+        select(LearningGoal)
+        .filter(LearningGoal.user_id == user_id)
+        .order_by(LearningGoal.id.desc())
+        .limit(limit)
+    ), {}
+
+def plain_learning_goal_query(goal_id, user_id):
+    """The query as it was built before: a fresh select() on every call."""
+    return select(LearningGoal).filter(LearningGoal.id == goal_id, LearningGoal.user_id == user_id), {}
+
+def plain_user_query(user_id):
+    """The query as it was built before: a fresh select() on every call."""
+    return select(User).where(User.id == user_id), {}
+
+def lambda_badges_query(auth_user_id, limit):
+    """The same query as a lambda_stmt(); closure variables become bound parameters."""
+    return lambda_stmt(
+        lambda: select(Badge)
+        .filter(Badge.user_id == auth_user_id)
+        .order_by(Badge.date_achieved.desc(), Badge.id.desc())
+        .limit(limit)
+    ), {}
+
+def lambda_learning_goals_query(user_id, limit):
+    """The same query as a lambda_stmt(); closure variables become bound parameters."""
+    return lambda_stmt(
+        lambda: select(LearningGoal)
+        .filter(LearningGoal.user_id == user_id)
+        .order_by(LearningGoal.id.desc())
+        .limit(limit)
+    ), {}
+
+def lambda_learning_goal_query(goal_id, user_id):
+    """The same query as a lambda_stmt(); closure variables become bound parameters."""
+    return lambda_stmt(lambda: select(LearningGoal).filter(LearningGoal.id == goal_id, LearningGoal.user_id == user_id)), {}
+
+def lambda_user_query(user_id):
+    """The same query as a lambda_stmt(); closure variables become bound parameters."""
+    return lambda_stmt(lambda: select(User).where(User.id == user_id)), {}
+
+def time_per_call(session, build):
+    """Return the mean time in microseconds to build and execute a statement."""
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        session.execute(*build(i % 50 + 1)).scalars().all()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(AuthUserReference.__table__.insert(), [{"id": user_id} for user_id in range(1, 51)])
+        conn.execute(User.__table__.insert(), [{"id": user_id, "username": f"user{user_id}"} for user_id in range(1, 51)])
+        conn.execute(Badge.__table__.insert(), [
+            {"name": f"Badge {i}", "description": "", "icon_url": "", "user_id": i % 50 + 1,
+             "date_achieved": datetime(2024, 1, 1) + timedelta(hours=i)}
+            for i in range(500)
+        ])
+        conn.execute(LearningGoal.__table__.insert(), [
+            {"title": f"Goal {i}", "status": "in_progress", "streak_count": 0, "user_id": i % 50 + 1}
+            for i in range(500)
+        ])
+
+    cases = [
+        ("user by id", plain_user_query, lambda_user_query, lambda uid: (_USER_BY_ID, {"user_id": uid})),
+        ("badges by user", lambda uid: plain_badges_query(uid, 20), lambda uid: lambda_badges_query(uid, 20), lambda uid: _badges_by_user_query(uid, 20)),
+        ("goals by user", lambda uid: plain_learning_goals_query(uid, 20), lambda uid: lambda_learning_goals_query(uid, 20), lambda uid: _learning_goals_by_user_query(uid, 20)),
+        ("goal by id", lambda uid: plain_learning_goal_query(uid, uid), lambda uid: lambda_learning_goal_query(uid, uid), lambda uid: (_LEARNING_GOAL_BY_ID, {"goal_id": uid, "user_id": uid})),
+    ]
+    with Session(engine) as session:
+        for name, plain, lambda_built, cached in cases:
+            # Warm the compiled statement cache before measuring
+            for build in (plain, lambda_built, cached):
+                time_per_call(session, build)
+            plain_us = time_per_call(session, plain)
+            lambda_us = time_per_call(session, lambda_built)
+            cached_us = time_per_call(session, cached)
+            print(f"{name:>14}: select() {plain_us:7.1f} us/call, lambda_stmt {lambda_us:7.1f} us/call, cached {cached_us:7.1f} us/call, "
+                  f"saved {plain_us - cached_us:6.1f} us/call ({(1 - cached_us / plain_us) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
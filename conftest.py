@@ -11,7 +11,7 @@ import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.db.database import Base, get_db, engine
+from app.db.database import Base, get_db, get_read_db, engine
 from app.core.settings import settings
 from httpx import AsyncClient
 import httpx
@@ -45,8 +45,9 @@ async def client():
         async def override_get_db():
             yield session
         
-        # Override the get_db dependency
+        # Override the get_db and get_read_db dependencies
         app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
         
         transport = httpx.ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Script to export users, badges and learning goals as NDJSON for analytics.
+
+Rows are streamed from the read replica (and from every shard for per-user
+tables) through server-side cursors, so memory use does not grow with the
+tables. Output ending in .gz is gzip-compressed on the fly.
+
+After every checkpoint the script records the checkpoint token and the
+output size in <output>.checkpoint. If an export is interrupted, run it
+again with --resume: the output is cut back to the last checkpoint and the
+export continues from there.
+
+    python export_data.py --output users-2026-10-19.ndjson.gz
+    python export_data.py --output users-2026-10-19.ndjson.gz --resume
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.data_export import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CHECKPOINT_EVERY, GzipMembers, checkpoint_line, export_records, parse_entities,
+)
+
+def load_checkpoint(path):
+    """Read the last recorded checkpoint, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+def save_checkpoint(path, token, offset):
+    """Atomically record a checkpoint token and the output size it corresponds to."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as checkpoint_file:
+        json.dump({"token": token, "offset": offset}, checkpoint_file)
+    os.replace(temporary, path)
+
+async def export(args):
+    """Write the export to args.output, resuming from the last checkpoint if asked to."""
+    entities = parse_entities(args.entities)
+    checkpoint_path = f"{args.output}.checkpoint"
+    saved = load_checkpoint(checkpoint_path) if args.resume else None
+    token = saved["token"] if saved else None
+    gzip = GzipMembers() if args.output.endswith(".gz") else None
+    rows = 0
+    started = time.perf_counter()
+    with open(args.output, "r+b" if saved else "wb") as output:
+        if saved:
+            # Drop anything written after the checkpoint; it is exported again
+            output.truncate(saved["offset"])
+            output.seek(saved["offset"])
+            logger.info(f"Resuming export at byte {saved['offset']}")
+        async for chunk in export_records(entities, token, batch_size=args.batch_size, checkpoint_every=args.checkpoint_every):
+            rows += chunk.data.count(b"\n")
+            data = chunk.data + (checkpoint_line(chunk.checkpoint) if chunk.checkpoint else b"")
+            output.write(gzip.compress(data) if gzip else data)
+            if chunk.checkpoint:
+                if gzip:
+                    output.write(gzip.end_member())
+                output.flush()
+                os.fsync(output.fileno())
+                save_checkpoint(checkpoint_path, chunk.checkpoint, output.tell())
+        if gzip:
+            output.write(gzip.end_member())
+    elapsed = time.perf_counter() - started
+    logger.info(f"Exported {rows} rows to {args.output} in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export users, badges and learning goals as NDJSON.")
+    parser.add_argument("--output", required=True, help="file to write; a .gz suffix enables gzip compression")
+    parser.add_argument("--entities", help="comma-separated subset of users, badges, learning_goals (default: all)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint recorded next to the output")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows fetched per round trip")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY, help="rows between checkpoints")
+    asyncio.run(export(parser.parse_args()))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Script to bulk-load badges or learning goals from CSV or NDJSON files.
+
+Rows are validated in chunks against the API schemas, then loaded with
+COPY on PostgreSQL (a batched INSERT elsewhere), one transaction per chunk
+and shard. Auth user references and counters are created and updated for
+the users that receive rows. Invalid rows are skipped and reported.
+
+    python import_data.py badges legacy_badges.csv
+    python import_data.py learning_goals export.ndjson.gz --rejects rejected.ndjson
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import os
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.data_import import DEFAULT_CHUNK_SIZE, IMPORT_SPECS, import_records, read_records
+
+def report_progress(stats):
+    """Log the running totals after each chunk."""
+    logger.info(f"{stats.loaded} rows loaded, {stats.rejected} rejected ({stats.rows_per_second:.0f} rows/s)")
+
+async def run_import(args):
+    """Import args.input and report what was loaded."""
+    stats = await import_records(
+        args.entity,
+        read_records(args.input, args.format),
+        chunk_size=args.chunk_size,
+        progress=report_progress,
+    )
+    if args.rejects and stats.errors:
+        with open(args.rejects, "w") as rejects:
+            for error in stats.errors:
+                rejects.write(json.dumps(error) + "\n")
+    logger.info(
+        f"Imported {stats.loaded} of {stats.read} {args.entity} rows in {stats.seconds:.1f}s "
+        f"({stats.rows_per_second:.0f} rows/s); {stats.rejected} rejected"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load badges or learning goals.")
+    parser.add_argument("entity", choices=sorted(IMPORT_SPECS), help="what the file contains")
+    parser.add_argument("input", help="CSV or NDJSON file, optionally gzipped (.gz)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="file format (default: from the file name)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows validated and committed together")
+    parser.add_argument("--rejects", help="write the first rejected rows and their errors to this NDJSON file")
+    asyncio.run(run_import(parser.parse_args()))
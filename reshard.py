@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script to move per-user data (auth user references, counters, badges and
+learning goals) onto the shards that own it under a new shard map.
+
+Resharding is done in two passes:
+
+1. copy:    copy every user's rows to the shard that owns them under the new
+            map. Safe to re-run; rows are upserted by primary key.
+2. cleanup: after every instance runs with the new DATABASE_SHARD_URLS (and
+            a final copy pass has picked up writes made in the meantime),
+            delete rows from the databases that no longer own them.
+
+Shards keep row IDs when users move, so before the first copy every shard
+must hand out IDs from its own range; the service refuses to start until
+they do. The ids command sets this up (PostgreSQL only) and can be re-run:
+
+    python reshard.py ids --to '{"a": "postgresql+asyncpg://.../users_a", "b": "postgresql+asyncpg://.../users_b"}'
+
+Backfilling an unsharded deployment is the same operation with the primary
+as the only source:
+
+    python reshard.py copy --from '{"primary": "postgresql+asyncpg://.../users"}' \\
+        --to '{"a": "postgresql+asyncpg://.../users_a", "b": "postgresql+asyncpg://.../users_b"}'
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import os
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.sharding import DEFAULT_VNODES, ShardRouter
+from app.db.resharding import DEFAULT_ID_STRIDE, configure_id_ranges, copy_to_owners, delete_from_non_owners
+
+async def configure_ids(args):
+    """Give every shard of the map its own ID range and report the offsets."""
+    target = ShardRouter.from_urls(json.loads(args.target), create_async_engine, args.vnodes)
+    try:
+        offsets = await configure_id_ranges(target.engines, args.id_stride)
+        logger.info(f"ID ranges configured with stride {args.id_stride}: {json.dumps(offsets)}")
+    finally:
+        await target.dispose()
+
+async def reshard(args):
+    """Run one resharding pass and report what it did."""
+    sources = {name: create_async_engine(url) for name, url in json.loads(args.source).items()}
+    target = ShardRouter.from_urls(json.loads(args.target), create_async_engine, args.vnodes)
+    try:
+        if args.command == "copy":
+            stats = await copy_to_owners(sources, target, batch_size=args.batch_size, dry_run=args.dry_run)
+        else:
+            stats = await delete_from_non_owners(sources, target, batch_size=args.batch_size, dry_run=args.dry_run)
+        logger.info(f"{'Dry run: ' if args.dry_run else ''}{args.command} finished: {json.dumps(stats)}")
+    finally:
+        for engine in sources.values():
+            await engine.dispose()
+        await target.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move per-user data to the shards that own it.")
+    parser.add_argument("command", choices=["ids", "copy", "cleanup"], help="give each shard its own ID range, copy rows to their owners, or delete rows held by non-owners")
+    parser.add_argument("--from", dest="source", help="JSON object of the databases currently holding the data, name to URL")
+    parser.add_argument("--to", dest="target", required=True, help="JSON object of the new shard map, name to URL (DATABASE_SHARD_URLS)")
+    parser.add_argument("--vnodes", type=int, default=DEFAULT_VNODES, help="virtual nodes per shard (DATABASE_SHARD_VNODES)")
+    parser.add_argument("--batch-size", type=int, default=500, help="users processed per batch")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--id-stride", type=int, default=DEFAULT_ID_STRIDE, help="most shards the ID ranges leave room for (ids only)")
+    args = parser.parse_args()
+    if args.command == "ids":
+        asyncio.run(configure_ids(args))
+    elif args.source is None:
+        parser.error("--from is required for copy and cleanup")
+    else:
+        asyncio.run(reshard(args))
@@ -9,9 +9,12 @@ import pytest
 import pytest_asyncio
 import asyncio
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.db.database import Base, get_db, engine
+from app.db.database import Base, get_db, get_read_db, engine
+from app.models.auth_user_reference import AuthUserReference
+from app.models.user_stats import UserStats
 from app.core.settings import settings
 from httpx import AsyncClient
 import httpx
@@ -44,8 +47,9 @@ async def client():
         def override_get_db():
             yield session
         
-        # Override the get_db dependency
+        # Override the get_db and get_read_db dependencies
         app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
         
         transport = httpx.ASGITransport(app=app)
         async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -57,4 +61,47 @@ async def client():
         session.close()
     
     # Drop tables after the test
-    Base.metadata.drop_all(bind=test_engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=test_engine)
+
+@pytest_asyncio.fixture
+async def make_sqlite_engine(tmp_path):
+    """Factory for file-backed SQLite databases, with the full schema unless `create_schema` is False.
+
+    The engines are disposed after the test.
+    """
+    engines = []
+
+    async def make_sqlite_engine(name: str = "test", create_schema: bool = True):
+        sqlite_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'{name}.db'}")
+        engines.append(sqlite_engine)
+        if create_schema:
+            async with sqlite_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        return sqlite_engine
+
+    yield make_sqlite_engine
+    for sqlite_engine in engines:
+        await sqlite_engine.dispose()
+
+@pytest_asyncio.fixture
+async def sqlite_engine(make_sqlite_engine):
+    """A file-backed SQLite database with the full schema."""
+    return await make_sqlite_engine()
+
+@pytest.fixture
+def seed_users():
+    """Seed a database with users and other rows: `await seed_users(engine, {user_id: counters}, *rows)`.
+
+    Each user gets an auth reference and a user_stats row with the given
+    counters (zero by default), or no user_stats row if the counters are None.
+    """
+    async def seed_users(sqlite_engine, users, *rows):
+        async with AsyncSession(sqlite_engine) as db:
+            for user_id, counters in users.items():
+                db.add(AuthUserReference(id=user_id))
+                if counters is not None:
+                    db.add(UserStats(user_id=user_id, **{"badge_count": 0, "goal_count": 0, **counters}))
+            db.add_all(rows)
+            await db.commit()
+
+    return seed_users
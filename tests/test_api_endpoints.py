@@ -120,7 +120,7 @@ async def test_read_user_badges(client: AsyncClient):
         }
         
         mock_user_service = AsyncMock()
-        mock_user_service.get_user_badges.return_value = badges_data
+        mock_user_service.get_user_badges_page.return_value = (badges_data, None)
         mock_get_user_service.return_value = mock_user_service
         
         # Make the request
@@ -231,7 +231,7 @@ async def test_read_user_learning_goals(client: AsyncClient):
         }
         
         mock_user_service = AsyncMock()
-        mock_user_service.get_user_learning_goals.return_value = goals_data
+        mock_user_service.get_user_learning_goals_page.return_value = (goals_data, None)
         mock_get_user_service.return_value = mock_user_service
         
         # Make the request
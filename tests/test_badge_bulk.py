@@ -0,0 +1,87 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.crud import badge, user_stats
+from app.models.auth_user_reference import AuthUserReference
+from app.schemas.badge import BadgeAward
+from app.services.auth_service import auth_service_client
+from app.services.user import UserService
+from tests.test_utils import SAMPLE_BADGE_DATA
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_engine, seed_users):
+    """A SQLite session with two known users."""
+    await seed_users(sqlite_engine, {1: None, 2: {"badge_count": 1}})
+    session_factory = sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_create_badges_bulk_per_item_results(db):
+    """Test that each award is accepted or rejected on its own."""
+    awards = [BadgeAward(**SAMPLE_BADGE_DATA, user_id=user_id) for user_id in (1, 2, 3, 2, 1)]
+    
+    results = await badge.create_badges_bulk(db, awards, max_badges=2)
+    
+    assert [r["status"] for r in results] == ["created", "created", "rejected", "rejected", "created"]
+    assert results[2]["error"] == "User not found"
+    assert results[3]["error"] == "Maximum number of badges (2) reached"
+    assert results[0]["badge"].id is not None
+    assert results[0]["badge"].user_id == 1
+    
+    # Counters reflect exactly the accepted awards
+    assert (await user_stats.get_user_stats(db, 1)).badge_count == 2
+    assert (await user_stats.get_user_stats(db, 2)).badge_count == 2
+
+
+@pytest.mark.asyncio
+async def test_create_badges_bulk_rejects_blank_names_and_unknown_users(db):
+    """Test that blank names and users outside known_user_ids are rejected like create_badge does."""
+    awards = [
+        BadgeAward(**{**SAMPLE_BADGE_DATA, "name": "   "}, user_id=1),
+        BadgeAward(**SAMPLE_BADGE_DATA, user_id=2),
+        BadgeAward(**SAMPLE_BADGE_DATA, user_id=1),
+    ]
+    
+    results = await badge.create_badges_bulk(db, awards, known_user_ids={1})
+    
+    assert [r["status"] for r in results] == ["rejected", "rejected", "created"]
+    assert results[0]["error"] == "Badge name is required"
+    assert results[1]["error"] == "User not found"
+    assert (await user_stats.get_user_stats(db, 1)).badge_count == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_award_creates_references_for_new_users(db):
+    """Test that users the auth service knows are awarded even before their first visit."""
+    awards = [BadgeAward(**SAMPLE_BADGE_DATA, user_id=user_id) for user_id in (5, 6)]
+    users = {5: {"id": 5}}
+    
+    with patch.object(auth_service_client, "get_users", new_callable=AsyncMock, return_value=users) as mock_get_users, \
+         patch("app.services.user.leaderboard"):
+        response = await UserService(db).create_badges_bulk(awards)
+    
+    mock_get_users.assert_awaited_once_with({5, 6})
+    assert [r["status"] for r in response["results"]] == ["created", "rejected"]
+    assert response["results"][1]["error"] == "User not found"
+    assert (await db.get(AuthUserReference, 5)) is not None
+    assert (await db.get(AuthUserReference, 6)) is None
+
+
+@pytest.mark.asyncio
+async def test_create_badges_bulk_requires_service_token(client: AsyncClient):
+    """Test that the bulk endpoint rejects callers without the service token."""
+    payload = {"badges": [{**SAMPLE_BADGE_DATA, "user_id": 1}]}
+    with patch("app.api.routes.settings") as mock_settings:
+        mock_settings.SERVICE_API_TOKEN = "secret"
+        
+        response = await client.post("/users/badges/bulk", json=payload)
+        assert response.status_code == 403
+        
+        response = await client.post("/users/badges/bulk", json=payload, headers={"X-Service-Token": "wrong"})
+        assert response.status_code == 403
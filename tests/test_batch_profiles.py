@@ -0,0 +1,207 @@
+import httpx
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.cache import MemoryCache
+from app.db.database import get_read_db
+from app.db.query_stats import instrument_engine, query_budget
+from app.main import app
+from app.models.auth_user_reference import AuthUserReference
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.services.auth_service import AuthServiceClient, AuthServiceUnavailable, auth_service_client
+from app.services.profile_cache import ProfileCache
+from app.services.user import MAX_PROFILES_PER_BATCH
+
+USERS = {user_id: {"id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com"} for user_id in (1, 2, 3, 4)}
+
+
+async def get_users(user_ids):
+    return {user_id: USERS[user_id] for user_id in user_ids if user_id in USERS}
+
+
+@pytest_asyncio.fixture
+async def engine(sqlite_engine, seed_users):
+    """An instrumented SQLite database; users 1 and 2 have data, user 3 has none and user 4 no reference either."""
+    instrument_engine(sqlite_engine)
+    await seed_users(
+        sqlite_engine,
+        {1: {"badge_count": 2, "goal_count": 1}, 2: {"badge_count": 2, "goal_count": 1}, 3: None},
+        *[
+            Badge(name=f"Badge {n}", description="d", icon_url="i", date_achieved=datetime(2026, 1, n + 1), user_id=user_id)
+            for user_id in (1, 2) for n in range(2)
+        ],
+        *[LearningGoal(title=f"Goal of {user_id}", status="in_progress", streak_count=0, user_id=user_id) for user_id in (1, 2)],
+    )
+    return sqlite_engine
+
+
+@pytest_asyncio.fixture
+async def client(engine):
+    """A client for the app whose read routes use the test database, without a profile cache."""
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_read_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    with patch("app.services.user.SessionLocal", session_factory), \
+         patch("app.services.user.profile_cache", ProfileCache(max_entries=0, ttl_seconds=0)), \
+         patch.object(auth_service_client, "get_user", new_callable=AsyncMock, side_effect=lambda user_id: USERS.get(user_id)), \
+         patch.object(auth_service_client, "get_users", new_callable=AsyncMock, side_effect=get_users) as mock_get_users:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            ac.get_users = mock_get_users
+            yield ac
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_batch_returns_profiles_keyed_by_id_and_missing_ids(client):
+    """Test that known users get profiles, unknown users are listed, with one auth call and one query per table."""
+    with query_budget(3):
+        response = await client.get("/users/batch", params={"ids": "2,99,1,3,1"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["profiles"]) == ["2", "1", "3"]
+    assert body["missing"] == [99]
+    assert [badge["name"] for badge in body["profiles"]["1"]["badges"]] == ["Badge 1", "Badge 0"]
+    assert body["profiles"]["2"]["learning_goals"][0]["title"] == "Goal of 2"
+    assert body["profiles"]["3"]["statistics"] == {"total_badges": 0, "total_goals": 0, "level": 1}
+    client.get_users.assert_awaited_once_with([2, 99, 1, 3])
+
+
+@pytest.mark.asyncio
+async def test_missing_auth_user_references_are_backfilled(client, engine):
+    """Test that users known to the auth service get their auth user reference created, as with single profiles."""
+    response = await client.get("/users/batch", params={"ids": "1,4"})
+    assert response.status_code == 200
+    assert response.json()["profiles"]["4"]["badges"] == []
+
+    async with AsyncSession(engine) as db:
+        assert await db.get(AuthUserReference, 4) is not None
+
+
+@pytest.mark.asyncio
+async def test_batch_profiles_match_single_profiles(client):
+    """Test that a profile looks the same whether it is fetched alone or in a batch."""
+    single = (await client.get("/users/1")).json()
+    batch = (await client.get("/users/batch", params={"ids": "1"})).json()
+    assert batch["profiles"]["1"] == single
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ids", ["1,a", ",", ",".join(str(n) for n in range(MAX_PROFILES_PER_BATCH + 1))])
+async def test_invalid_batches_are_rejected(client, ids):
+    """Test that malformed, empty and oversized ID lists get a 400."""
+    response = await client.get("/users/batch", params={"ids": ids})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_cached_profiles_are_reused(client):
+    """Test that profiles in the profile cache are served without asking the auth service."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60)
+    await cache.store(1, b'{"id":1,"cached":true}', cache.token())
+
+    with patch("app.services.user.profile_cache", cache):
+        response = await client.get("/users/batch", params={"ids": "1,2"})
+
+    assert response.json()["profiles"]["1"] == {"id": 1, "cached": True}
+    client.get_users.assert_awaited_once_with([2])
+    assert await cache.get(2) is not None
+
+
+@pytest.mark.asyncio
+async def test_auth_client_fetches_uncached_users_in_one_request():
+    """Test that get_users serves cached users and fetches the rest with a single batch request."""
+    client = AuthServiceClient(cache=MemoryCache(max_entries=10), user_ttl_seconds=30)
+    response = MagicMock()
+    response.json.return_value = [USERS[1], USERS[2]]
+
+    with patch.object(client.client, "get", return_value=response) as mock_get:
+        assert await client.get_users([1, 2, 99]) == {1: USERS[1], 2: USERS[2]}
+        assert await client.get_users([2, 1]) == {1: USERS[1], 2: USERS[2]}
+
+    mock_get.assert_awaited_once()
+    assert mock_get.await_args.kwargs["params"] == {"ids": "1,2,99"}
+
+
+def status_error(status_code):
+    """A response whose raise_for_status fails with the given status code."""
+    response = MagicMock()
+    response.raise_for_status.side_effect = httpx.HTTPStatusError("error", request=MagicMock(), response=MagicMock(status_code=status_code))
+    return response
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failure", [status_error(503), httpx.ConnectError("connection refused")])
+async def test_auth_client_raises_when_the_auth_service_is_unavailable(failure):
+    """Test that server errors and connection errors are not mistaken for unknown users."""
+    client = AuthServiceClient(cache=MemoryCache(max_entries=10), user_ttl_seconds=30)
+    mock_get = AsyncMock(side_effect=failure) if isinstance(failure, Exception) else AsyncMock(return_value=failure)
+
+    with patch.object(client.client, "get", mock_get):
+        with pytest.raises(AuthServiceUnavailable):
+            await client.get_users([1, 2])
+
+
+@pytest.mark.asyncio
+async def test_auth_client_falls_back_to_single_user_requests():
+    """Test that get_users looks users up one by one when the auth service has no batch endpoint."""
+    client = AuthServiceClient(cache=MemoryCache(max_entries=10), user_ttl_seconds=30)
+
+    async def get(url, params=None):
+        if url.endswith("/users/batch"):
+            return status_error(404)
+        user_id = int(url.rsplit("/", 1)[1])
+        if user_id not in USERS:
+            return status_error(404)
+        response = MagicMock()
+        response.json.return_value = USERS[user_id]
+        return response
+
+    with patch.object(client.client, "get", side_effect=get) as mock_get:
+        assert await client.get_users([1, 99, 2]) == {1: USERS[1], 2: USERS[2]}
+        assert mock_get.await_count == 4
+
+        # The missing endpoint is remembered, so it is not probed again
+        assert await client.get_users([3]) == {3: USERS[3]}
+        assert mock_get.await_count == 5
+
+
+@pytest.mark.asyncio
+async def test_auth_client_falls_back_for_a_rejected_batch_only():
+    """Test that a 422 (e.g. /users/batch routed to /users/{user_id}) falls back for that call, not for later ones."""
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        user_id = request.url.path.rsplit("/", 1)[1]
+        if not user_id.isdigit():
+            return httpx.Response(422, json={"detail": "user_id must be an integer"})
+        if int(user_id) not in USERS:
+            return httpx.Response(404, json={"detail": "User not found"})
+        return httpx.Response(200, json=USERS[int(user_id)])
+
+    client = AuthServiceClient(cache=MemoryCache(max_entries=10), user_ttl_seconds=0)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    assert await client.get_users([1, 99]) == {1: USERS[1]}
+    assert await client.get_users([2]) == {2: USERS[2]}
+
+    assert requests.count("/users/batch") == 2
+    assert client.batch_supported
+    await client.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batch_answers_503_when_the_auth_service_is_unavailable(client):
+    """Test that an auth service outage fails the batch instead of listing every user as missing."""
+    client.get_users.side_effect = AuthServiceUnavailable("Auth service unavailable")
+    response = await client.get("/users/batch", params={"ids": "1,2"})
+    assert response.status_code == 503
@@ -0,0 +1,170 @@
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from app.cache import CacheBackend, MemoryCache, NullCache, RedisCache, create_cache
+from app.services.auth_service import AuthServiceClient
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int) -> subprocess.Popen:
+    """Start a local Redis server, or fakeredis's TCP server when redis-server is not installed."""
+    if shutil.which("redis-server"):
+        command = ["redis-server", "--port", str(port), "--bind", "127.0.0.1", "--save", "", "--appendonly", "no"]
+    else:
+        pytest.importorskip("fakeredis")
+        command = [sys.executable, "-c", f"from fakeredis import TcpFakeServer; TcpFakeServer(('127.0.0.1', {port})).serve_forever()"]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                pytest.skip("Could not start a local Redis server")
+            time.sleep(0.05)
+
+
+@pytest.fixture
+def redis_server():
+    """A Redis-compatible server in a separate local process, and its URL."""
+    port = _free_port()
+    process = _start_server(port)
+    yield process, f"redis://127.0.0.1:{port}/0"
+    process.terminate()
+    process.wait()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_backends_must_implement_the_interface():
+    """Test that a backend missing one of the abstract methods cannot be created."""
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_expires_and_evicts():
+    """Test that the in-process cache honours TTLs and evicts the least recently used entry."""
+    clock = Clock()
+    cache = MemoryCache(max_entries=2)
+    with patch("app.cache.memory.time.monotonic", clock):
+        await cache.set("a", b"1", ttl_seconds=10)
+        await cache.set("b", b"2")
+        assert await cache.get("a") == b"1"
+        await cache.set("c", b"3")  # evicts b, read least recently
+        assert await cache.get_many(["a", "b", "c"]) == {"a": b"1", "c": b"3"}
+
+        clock.now += 10
+        assert await cache.get("a") is None
+        await cache.delete("c")
+        assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_null_cache_stores_nothing():
+    """Test that the null backend always misses."""
+    cache = NullCache()
+    await cache.set_many({"a": b"1"}, ttl_seconds=10)
+    assert await cache.get_many(["a"]) == {}
+    await cache.delete("a")
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_round_trip(redis_server):
+    """Test get/set/delete and the batched operations against a local server."""
+    _, url = redis_server
+    cache = RedisCache(url, key_prefix="test:")
+
+    await cache.set("a", b"1", ttl_seconds=1.5)
+    await cache.set_many({"b": b"2", "c": b"\r\n binary \x00"})
+    assert await cache.get("a") == b"1"
+    assert await cache.get_many(["a", "b", "c", "d"]) == {"a": b"1", "b": b"2", "c": b"\r\n binary \x00"}
+    assert 0 < await cache.client.pttl("test:a") <= 1500
+    assert await cache.client.pttl("test:b") == -1
+
+    await cache.delete_many(["a", "b"])
+    assert await cache.get("a") is None
+    assert await cache.client.keys("*") == [b"test:c"]
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_behaves_like_a_miss(redis_server):
+    """Test that an unavailable server turns lookups into misses instead of errors."""
+    process, url = redis_server
+    process.terminate()
+    process.wait()
+    cache = RedisCache(url, timeout_seconds=0.2)
+
+    assert await cache.get("a") is None
+    assert await cache.get_many(["a"]) == {}
+    await cache.set("a", b"1")
+    await cache.set_many({"a": b"1"})
+    await cache.delete("a")
+    await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_authenticates(redis_server):
+    """Test that the password and database from the URL are used, and a wrong password is a miss."""
+    _, url = redis_server
+    admin = RedisCache(url)
+    await admin.client.config_set("requirepass", "secret")
+
+    cache = RedisCache(url.replace("redis://", "redis://:secret@").replace("/0", "/2"))
+    await cache.set("a", b"1")
+    assert await cache.get("a") == b"1"
+
+    rejected = RedisCache(url.replace("redis://", "redis://:wrong@"), timeout_seconds=0.2)
+    assert await rejected.get("a") is None
+    assert await rejected.get_many(["a"]) == {}
+    await rejected.set("b", b"1")
+    assert await cache.get("b") is None
+
+    for backend in (admin, cache, rejected):
+        await backend.close()
+
+
+def test_create_cache_follows_the_setting():
+    """Test that each configured backend name builds the matching backend."""
+    assert isinstance(create_cache("memory"), MemoryCache)
+    assert isinstance(create_cache("redis"), RedisCache)
+    assert isinstance(create_cache("none"), NullCache)
+    with pytest.raises(ValueError):
+        create_cache("memcached")
+
+
+@pytest.mark.asyncio
+async def test_auth_client_caches_found_users():
+    """Test that users found by the auth service are cached, and failed lookups are not."""
+    client = AuthServiceClient(cache=MemoryCache(max_entries=10), user_ttl_seconds=30)
+    response = MagicMock()
+    response.json.return_value = {"id": 1, "username": "ada"}
+
+    with patch.object(client.client, "get", side_effect=[Exception("down"), response]) as mock_get:
+        assert await client.get_user(1) is None
+        assert await client.get_user(1) == {"id": 1, "username": "ada"}
+        assert await client.get_user(1) == {"id": 1, "username": "ada"}
+
+    assert mock_get.await_count == 2
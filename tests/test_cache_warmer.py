@@ -0,0 +1,91 @@
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from app.main import app
+from app.services.cache_warmer import CacheWarmer
+from app.services.user import UserService
+
+
+@pytest_asyncio.fixture
+async def shard_engines(make_sqlite_engine, seed_users):
+    """Two SQLite databases with users active at different times."""
+    now = datetime(2026, 10, 19, 12, 0)
+    activity = {"a": [(1, 5), (2, 1)], "b": [(3, 3), (4, 2)]}
+    engines = []
+    for name, users in activity.items():
+        engine = await make_sqlite_engine(name)
+        await seed_users(engine, {user_id: {"updated_at": now - timedelta(minutes=minutes_ago)} for user_id, minutes_ago in users})
+        engines.append(engine)
+    return engines
+
+
+@pytest.mark.asyncio
+async def test_recently_active_users_are_merged_across_shards(shard_engines):
+    """Test that the most recently active users are picked from every shard."""
+    warmer = CacheWarmer(shard_engines, user_count=3, concurrency=2, budget_seconds=5)
+    assert await warmer.recently_active_user_ids() == [2, 4, 3]
+
+
+@pytest.mark.asyncio
+async def test_users_are_warmed_in_bounded_batches(shard_engines):
+    """Test that no more than `concurrency` users are warmed at once, and unknown users are skipped."""
+    warmer = CacheWarmer(shard_engines, user_count=10, concurrency=2, budget_seconds=5)
+    in_flight = []
+    peak = 0
+
+    async def get_user_profile_json(self, user_id):
+        nonlocal peak
+        in_flight.append(user_id)
+        peak = max(peak, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(user_id)
+        if user_id == 3:
+            raise HTTPException(status_code=404, detail="User not found")
+        return b"{}"
+
+    with patch.object(UserService, "get_user_profile_json", get_user_profile_json):
+        assert await warmer.warm_once() == 3
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_warm_up_stops_at_the_time_budget(shard_engines):
+    """Test that the warm-up gives up once its budget is spent."""
+    warmer = CacheWarmer(shard_engines, user_count=10, concurrency=1, budget_seconds=0.3)
+
+    async def slow_warm_user(user_id):
+        await asyncio.sleep(0.2)
+        return True
+
+    with patch.object(warmer, "warm_user", side_effect=slow_warm_user):
+        started = asyncio.get_running_loop().time()
+        warmed = await warmer.warm_once()
+
+    assert warmed == 1
+    assert asyncio.get_running_loop().time() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_waits_for_the_warm_up():
+    """Test that /ready answers 503 while warming up and 200 afterwards."""
+    warmer = CacheWarmer([], user_count=10, concurrency=1, budget_seconds=5)
+    with patch("app.main.cache_warmer", warmer):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/ready")).status_code == 503
+            with patch.object(warmer, "warm_once", new_callable=AsyncMock, return_value=7):
+                await warmer.run()
+            response = await client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "warmed_users": 7}
+
+
+def test_disabled_warm_up_is_ready_at_once():
+    """Test that an instance without a warm-up is ready immediately."""
+    warmer = CacheWarmer([], user_count=0, concurrency=1, budget_seconds=5)
+    warmer.start()
+    assert warmer.ready and warmer.task is None
@@ -0,0 +1,147 @@
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app import crud
+from app.api.routes import _etag_matches
+from app.db.database import get_db, get_read_db
+from app.db.query_stats import instrument_engine, query_budget
+from app.main import app
+from app.models.auth_user_reference import AuthUserReference
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.schemas.badge import BadgeCreate
+from app.schemas.learning_goal import LearningGoalUpdate
+from app.services.auth_service import auth_service_client
+
+USER = {"id": 1, "username": "ada", "email": "ada@example.com"}
+
+
+@pytest_asyncio.fixture
+async def session_factory(sqlite_engine, seed_users):
+    """An instrumented SQLite database with one badge and one goal for user 1."""
+    instrument_engine(sqlite_engine)
+    await seed_users(
+        sqlite_engine,
+        {1: {"badge_count": 1, "goal_count": 1}},
+        Badge(name="Badge", description="d", icon_url="i", user_id=1),
+        LearningGoal(id=1, title="Goal", status="in_progress", streak_count=0, user_id=1),
+    )
+    return sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    """A client for the app backed by the test database."""
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    with patch("app.services.user.SessionLocal", session_factory), \
+         patch.object(auth_service_client, "get_user", new_callable=AsyncMock, return_value=USER):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            yield ac
+    app.dependency_overrides.clear()
+
+
+def test_etag_matching():
+    """Test If-None-Match parsing: lists, weak tags and the wildcard."""
+    assert _etag_matches('"a", "b"', '"b"')
+    assert _etag_matches('W/"b"', '"b"')
+    assert _etag_matches("*", '"b"')
+    assert not _etag_matches('"a"', '"b"')
+    assert not _etag_matches(None, '"b"')
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/users/1/badges", "/users/1/goals"])
+async def test_matching_etag_returns_304_without_list_queries(client, path):
+    """Test that revalidating an unchanged list costs one query and returns no body."""
+    first = await client.get(path)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    etag = first.headers["ETag"]
+
+    with query_budget(1):
+        second = await client.get(path, headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_etag_differs_per_page(client):
+    """Test that different pages of the same list get different ETags."""
+    first = await client.get("/users/1/badges", params={"limit": 1})
+    second = await client.get("/users/1/badges", params={"limit": 2})
+    assert first.headers["ETag"] != second.headers["ETag"]
+
+
+@pytest.mark.asyncio
+async def test_writes_change_the_etag(client, session_factory):
+    """Test that badge creates, goal updates and goal deletes all bump the version stamp."""
+    async def version():
+        async with session_factory() as db:
+            return await crud.user_stats.get_version(db, user_id=1)
+
+    before = await version()
+    etag = (await client.get("/users/1/goals")).headers["ETag"]
+
+    async with session_factory() as db:
+        await crud.learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(title="Renamed"))
+    after_update = await version()
+    assert after_update > before
+
+    response = await client.get("/users/1/goals", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "Renamed"
+
+    async with session_factory() as db:
+        await crud.learning_goal.delete_learning_goal(db, 1, 1)
+    after_delete = await version()
+    assert after_delete > after_update
+
+    async with session_factory() as db:
+        await crud.badge.create_user_badge(db, BadgeCreate(name="New", description="d", icon_url="i"), auth_user_id=1)
+    assert await version() > after_delete
+
+
+@pytest.mark.asyncio
+async def test_version_is_zero_without_stats(session_factory):
+    """Test that users without a counters row get version 0."""
+    async with session_factory() as db:
+        assert await crud.user_stats.get_version(db, user_id=999) == 0
+
+
+@pytest.mark.asyncio
+async def test_list_read_creates_a_missing_auth_user_reference(client, session_factory):
+    """Test that reading the list of a user seen for the first time creates their auth reference."""
+    response = await client.get("/users/2/goals")
+
+    assert response.status_code == 200
+    async with session_factory() as db:
+        assert await db.get(AuthUserReference, 2) is not None
+
+
+@pytest.mark.asyncio
+async def test_unknown_users_get_no_etag(client):
+    """Test that a user the auth service does not know gets a 404, even when revalidating."""
+    with patch.object(auth_service_client, "get_user", new_callable=AsyncMock, return_value=None):
+        response = await client.get("/users/2/badges", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/users/1/badges", "/users/1/goals"])
+async def test_invalid_cursor_is_rejected_before_revalidation(client, path):
+    """Test that an invalid cursor gets a 400 rather than a 304."""
+    response = await client.get(path, params={"cursor": "not-a-cursor"}, headers={"If-None-Match": "*"})
+
+    assert response.status_code == 400
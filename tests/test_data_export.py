@@ -0,0 +1,119 @@
+import gzip
+import json
+import zlib
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.badge import Badge
+from app.models.user import User
+from app.services import data_export
+from app.services.data_export import GzipMembers, export_records, parse_entities, stream_ndjson
+
+
+@pytest_asyncio.fixture
+async def sources(make_sqlite_engine, seed_users):
+    """Users on the primary, and badges spread over two shards."""
+    primary = await make_sqlite_engine("primary")
+    await seed_users(primary, {}, *[User(id=user_id, username=f"user{user_id}") for user_id in range(1, 8)])
+    shards = []
+    for name, badges in (("a", [(1, 101), (1, 102), (3, 103)]), ("b", [(2, 201)])):
+        shard = await make_sqlite_engine(name)
+        await seed_users(
+            shard,
+            {user_id: None for user_id, _ in badges},
+            *[Badge(id=badge_id, name=f"Badge {badge_id}", user_id=user_id) for user_id, badge_id in badges],
+        )
+        shards.append(shard)
+    return {"users": [primary], "badges": shards, "learning_goals": shards}
+
+
+async def _collect(entities, sources, checkpoint=None, **options):
+    records, checkpoints = [], []
+    async for chunk in export_records(entities, checkpoint, sources=sources, **options):
+        records.extend(json.loads(line) for line in chunk.data.splitlines())
+        if chunk.checkpoint:
+            checkpoints.append((len(records), chunk.checkpoint))
+    return records, checkpoints
+
+
+def test_parse_entities():
+    """Test that entities keep the export order, and unknown ones or an empty selection are rejected."""
+    assert parse_entities(None) == ["users", "badges", "learning_goals"]
+    assert parse_entities("learning_goals, users") == ["users", "learning_goals"]
+    with pytest.raises(ValueError):
+        parse_entities("users,passwords")
+    with pytest.raises(ValueError):
+        parse_entities(",")
+
+
+@pytest.mark.asyncio
+async def test_export_streams_every_source_in_id_order(sources):
+    """Test that users come from the primary and badges from every shard."""
+    records, checkpoints = await _collect(["users", "badges"], sources, batch_size=3, checkpoint_every=3)
+
+    assert [(record["type"], record["id"]) for record in records] == (
+        [("user", user_id) for user_id in range(1, 8)] + [("badge", 101), ("badge", 102), ("badge", 103), ("badge", 201)]
+    )
+    assert records[0]["username"] == "user1"
+    assert isinstance(records[-1]["date_achieved"], str)
+    # Every 3 rows, plus the end of each source
+    assert [count for count, _ in checkpoints] == [3, 6, 7, 10, 10, 11]
+
+
+@pytest.mark.asyncio
+async def test_export_resumes_from_every_checkpoint(sources):
+    """Test that resuming from a checkpoint yields exactly the records after it."""
+    entities = ["users", "badges"]
+    records, checkpoints = await _collect(entities, sources, batch_size=2, checkpoint_every=2)
+
+    for count, token in checkpoints:
+        resumed, _ = await _collect(entities, sources, token, batch_size=2, checkpoint_every=2)
+        assert resumed == records[count:]
+
+
+@pytest.mark.asyncio
+async def test_gzip_stream_delivers_whole_lines_at_checkpoints(sources):
+    """Test that the gzip stream is flushed at each checkpoint line."""
+    chunks = [chunk async for chunk in stream_ndjson(["users"], compress=True, sources=sources, batch_size=2, checkpoint_every=4)]
+
+    full = gzip.decompress(b"".join(chunks)).decode().splitlines()
+    assert [json.loads(line)["type"] for line in full].count("user") == 7
+
+    # The bytes received up to the first checkpoint decode to whole lines
+    partial = zlib.decompressobj(31).decompress(b"".join(chunks[:2])).decode()
+    lines = [json.loads(line) for line in partial.splitlines()]
+    assert partial.endswith("\n")
+    assert lines[-1]["type"] == "checkpoint"
+    assert [line["id"] for line in lines[:-1]] == [1, 2, 3, 4]
+
+
+def test_gzip_members_concatenate():
+    """Test that ended gzip members concatenate into one valid gzip file."""
+    compressor = GzipMembers()
+    first = compressor.compress(b"a\n") + compressor.end_member()
+    second = compressor.compress(b"b\n") + compressor.end_member()
+
+    assert gzip.decompress(first) == b"a\n"
+    assert gzip.decompress(first + second) == b"a\nb\n"
+
+
+def test_export_endpoint(sources):
+    """Test the admin export endpoint's auth, validation and streamed output."""
+    with patch.object(data_export, "export_sources", lambda entity: sources[entity]), \
+         patch("app.api.routes.settings.SERVICE_API_TOKEN", "secret"):
+        client = TestClient(app)
+        assert client.get("/admin/export").status_code == 403
+
+        headers = {"X-Service-Token": "secret"}
+        assert client.get("/admin/export?entities=secrets", headers=headers).status_code == 400
+        assert client.get("/admin/export?checkpoint=garbage", headers=headers).status_code == 400
+
+        response = client.get("/admin/export?entities=badges", headers={**headers, "Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["content-encoding"] == "gzip"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines if line["type"] == "badge"] == [101, 102, 103, 201]
+        assert lines[-1]["type"] == "checkpoint"
@@ -0,0 +1,86 @@
+import gzip
+import json
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.auth_user_reference import AuthUserReference
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.models.user_stats import UserStats
+from app.services.data_import import IMPORT_SPECS, import_records, read_records, validate_chunk
+
+
+@pytest_asyncio.fixture
+async def engine(sqlite_engine, seed_users):
+    """A SQLite database where user 1 already has a badge."""
+    await seed_users(sqlite_engine, {1: {"badge_count": 1}}, Badge(name="Existing", description="d", icon_url="i", user_id=1))
+    return sqlite_engine
+
+
+def badge(user_id, name="Streak", **extra):
+    return {"name": name, "description": "Kept a streak", "icon_url": "https://example.com/b.png", "user_id": user_id, **extra}
+
+
+def test_read_records_csv_and_gzipped_ndjson(tmp_path):
+    """Test reading both file formats; empty CSV cells are missing values."""
+    csv_path = tmp_path / "goals.csv"
+    csv_path.write_text("title,description,status,user_id\nLearn SQL,,in_progress,1\n")
+    assert list(read_records(str(csv_path))) == [{"title": "Learn SQL", "status": "in_progress", "user_id": "1"}]
+
+    ndjson_path = tmp_path / "badges.ndjson.gz"
+    with gzip.open(ndjson_path, "wt") as output:
+        output.write(json.dumps(badge(1)) + "\n\n" + json.dumps(badge(2)) + "\n")
+    assert [record["user_id"] for record in read_records(str(ndjson_path))] == [1, 2]
+
+
+def test_validate_chunk_separates_invalid_rows():
+    """Test that bad rows are rejected with their row numbers and the rest are kept."""
+    records = [badge(1), badge("not a user"), badge(3, name="")]
+
+    valid, errors = validate_chunk(IMPORT_SPECS["badges"], records, row_numbers=[101, 102, 103])
+
+    assert [item.user_id for item in valid] == [1]
+    assert [error["row"] for error in errors] == [102, 103]
+    assert errors[0]["errors"][0].startswith("user_id:")
+
+
+@pytest.mark.asyncio
+async def test_import_loads_rows_and_counters(engine):
+    """Test loading badges in chunks, creating references and counters for new users."""
+    records = [badge(1), badge(2), badge(2), {"type": "checkpoint", "token": "x"}, badge(2, name=""), badge(3)]
+    progress = []
+
+    stats = await import_records("badges", records, chunk_size=2, targets=lambda items: {engine: items}, progress=progress.append)
+
+    assert (stats.read, stats.loaded, stats.rejected) == (5, 4, 1)
+    assert stats.errors == [{"row": 5, "errors": ["name: String should have at least 1 character"]}]
+    assert len(progress) == 3
+    async with AsyncSession(engine) as db:
+        badges = (await db.execute(select(Badge.user_id).order_by(Badge.id))).scalars().all()
+        counts = dict((await db.execute(select(UserStats.user_id, UserStats.badge_count))).all())
+        references = (await db.execute(select(AuthUserReference.id).order_by(AuthUserReference.id))).scalars().all()
+        dates = (await db.execute(select(Badge.date_achieved))).scalars().all()
+    assert badges == [1, 1, 2, 2, 3]
+    assert counts == {1: 2, 2: 2, 3: 1}
+    assert references == [1, 2, 3]
+    assert all(date is not None for date in dates)
+
+
+@pytest.mark.asyncio
+async def test_import_learning_goals_from_export_records(engine):
+    """Test that records from an NDJSON export load as new goals with fresh IDs and versions."""
+    records = [
+        {"type": "learning_goal", "id": 99, "title": "Learn SQL", "description": None, "status": "completed",
+         "streak_count": 4, "version": 7, "status_changed_at": "2026-01-02T03:04:05", "user_id": 1},
+    ]
+
+    stats = await import_records("learning_goals", records, targets=lambda items: {engine: items})
+
+    assert stats.loaded == 1
+    async with AsyncSession(engine) as db:
+        goal = (await db.execute(select(LearningGoal))).scalar_one()
+        goal_count = (await db.execute(select(UserStats.goal_count).where(UserStats.user_id == 1))).scalar_one()
+    assert (goal.id, goal.title, goal.version, goal.streak_count) == (1, "Learn SQL", 1, 4)
+    assert goal.status_changed_at.isoformat() == "2026-01-02T03:04:05"
+    assert goal_count == 1
@@ -319,8 +319,8 @@ async def test_empty_results_handling(client: AsyncClient):
     """Test handling of empty results from database queries."""
     with patch("app.api.routes.get_user_service") as mock_get_user_service:
         mock_user_service = AsyncMock()
-        mock_user_service.get_user_badges.return_value = []  # Empty list
-        mock_user_service.get_user_learning_goals.return_value = []  # Empty list
+        mock_user_service.get_user_badges_page.return_value = ([], None)  # Empty list
+        mock_user_service.get_user_learning_goals_page.return_value = ([], None)  # Empty list
         mock_get_user_service.return_value = mock_user_service
         
         # Test getting badges when none exist
@@ -353,7 +353,7 @@ async def test_large_data_handling(client: AsyncClient):
     
     with patch("app.api.routes.get_user_service") as mock_get_user_service:
         mock_user_service = AsyncMock()
-        mock_user_service.get_user_badges.return_value = many_badges
+        mock_user_service.get_user_badges_page.return_value = (many_badges, None)
         mock_get_user_service.return_value = mock_user_service
         
         # Test getting many badges
@@ -372,7 +372,7 @@ async def test_concurrent_requests_handling(client: AsyncClient):
     # Mock the user service
     with patch("app.api.routes.get_user_service") as mock_get_user_service:
         mock_user_service = AsyncMock()
-        mock_user_service.get_user_badges.return_value = [
+        mock_user_service.get_user_badges_page.return_value = ([
             {
                 "id": 1,
                 "name": "Test Badge",
@@ -381,7 +381,7 @@ async def test_concurrent_requests_handling(client: AsyncClient):
                 "date_achieved": "2023-01-01T00:00:00",
                 "auth_user_id": SAMPLE_USER_ID
             }
-        ]
+        ], None)
         mock_get_user_service.return_value = mock_user_service
         
         # Simulate concurrent requests
@@ -0,0 +1,76 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import learning_goal, learning_goal_archive
+from app.models.learning_goal import LearningGoal
+from app.models.learning_goal_archive import LearningGoalArchive
+from app.models.user_stats import UserStats
+from app.schemas.learning_goal import LearningGoalUpdate
+from app.services.goal_archiver import GoalArchiver
+
+OLD = datetime.utcnow() - timedelta(days=60)
+RECENT = datetime.utcnow() - timedelta(days=1)
+
+
+@pytest_asyncio.fixture
+async def engine(sqlite_engine, seed_users):
+    """A SQLite database with goals of every age and status."""
+    await seed_users(
+        sqlite_engine,
+        {1: {"goal_count": 5}, 2: {"goal_count": 1}},
+        LearningGoal(id=1, title="Old archived", status="archived", streak_count=0, user_id=1, status_changed_at=OLD),
+        LearningGoal(id=2, title="Old completed", status="completed", streak_count=0, user_id=1, status_changed_at=OLD),
+        LearningGoal(id=3, title="Old in progress", status="in_progress", streak_count=0, user_id=1, status_changed_at=OLD),
+        LearningGoal(id=4, title="Recently archived", status="archived", streak_count=0, user_id=1, status_changed_at=RECENT),
+        LearningGoal(id=5, title="Old archived", status="archived", streak_count=0, user_id=1, status_changed_at=OLD),
+        LearningGoal(id=6, title="Other user", status="archived", streak_count=0, user_id=2, status_changed_at=OLD),
+    )
+    return sqlite_engine
+
+
+def make_archiver(engine, batch_size=2):
+    return GoalArchiver([engine], statuses=["archived", "completed"], max_age=timedelta(days=30), batch_size=batch_size, interval_seconds=0)
+
+
+@pytest.mark.asyncio
+async def test_archive_moves_only_old_terminal_goals(engine):
+    """Test that old archived/completed goals move in batches and counters follow."""
+    assert await make_archiver(engine).archive_once() == 4
+    
+    async with AsyncSession(engine) as db:
+        hot = (await db.execute(select(LearningGoal.id).order_by(LearningGoal.id))).scalars().all()
+        archived = (await db.execute(select(LearningGoalArchive).order_by(LearningGoalArchive.id))).scalars().all()
+        counts = dict((await db.execute(select(UserStats.user_id, UserStats.goal_count))).all())
+    
+    assert hot == [3, 4]
+    assert [goal.id for goal in archived] == [1, 2, 5, 6]
+    assert all(goal.archived_at is not None and goal.status_changed_at == OLD for goal in archived)
+    assert counts == {1: 2, 2: 0}
+    
+    # Nothing is left to archive
+    assert await make_archiver(engine).archive_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_archived_goals_read_path(engine):
+    """Test paging through a user's archived goals, newest first."""
+    await make_archiver(engine, batch_size=500).archive_once()
+    
+    async with AsyncSession(engine) as db:
+        page, cursor = await learning_goal_archive.get_archived_learning_goals_page_by_user(db, user_id=1, limit=2)
+        assert [goal.id for goal in page] == [5, 2]
+        page, cursor = await learning_goal_archive.get_archived_learning_goals_page_by_user(db, user_id=1, limit=2, cursor=cursor)
+        assert [goal.id for goal in page] == [1]
+        assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_status_change_restarts_the_clock(engine):
+    """Test that changing a goal's status records when it happened."""
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        goal = await learning_goal.update_learning_goal(db, 3, 1, LearningGoalUpdate(status="completed"))
+    
+    assert goal.status_changed_at > RECENT
+    assert await make_archiver(engine).archive_once() == 4
@@ -141,7 +141,7 @@ async def test_create_and_manage_badge_flow(client: AsyncClient):
         assert data["name"] == "Test Badge"
         
         # Step 2: Retrieve the user's badges
-        mock_user_service.get_user_badges.return_value = [created_badge]
+        mock_user_service.get_user_badges_page.return_value = ([created_badge], None)
         
         response = await client.get(f"/users/{SAMPLE_USER_ID}/badges")
         
@@ -199,7 +199,7 @@ async def test_create_and_manage_learning_goal_flow(client: AsyncClient):
         assert data["title"] == "Test Learning Goal"
         
         # Step 2: Retrieve the user's learning goals
-        mock_user_service.get_user_learning_goals.return_value = [created_goal]
+        mock_user_service.get_user_learning_goals_page.return_value = ([created_goal], None)
         
         response = await client.get(f"/users/{SAMPLE_USER_ID}/goals")
         
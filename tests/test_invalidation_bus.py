@@ -0,0 +1,109 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.learning_goal import LearningGoal
+from app.schemas.learning_goal import LearningGoalUpdate
+from app.services.auth_service import auth_service_client
+from app.services.invalidation_bus import InvalidationBus
+from app.services.profile_cache import ProfileCache
+from app.services.user import UserService
+
+
+def make_bus(handler=None, connected=True):
+    consumer = MagicMock()
+    consumer.connection = AsyncMock() if connected else None
+    if connected:
+        channel = AsyncMock()
+        channel.queue_declare.return_value = MagicMock(queue="amq.gen-1")
+        consumer.connection.channel.return_value = channel
+    return InvalidationBus(consumer, exchange="invalidations", handlers={"profile": handler or AsyncMock()}, coalesce_seconds=0.01)
+
+
+@pytest.mark.asyncio
+async def test_start_subscribes_with_an_exclusive_queue():
+    """Test that each instance binds its own exclusive queue to the fanout exchange."""
+    bus = make_bus()
+    await bus.start()
+    channel = bus.channel
+
+    channel.exchange_declare.assert_awaited_once_with("invalidations", exchange_type="fanout")
+    channel.queue_declare.assert_awaited_once_with("", exclusive=True, auto_delete=True)
+    channel.queue_bind.assert_awaited_once_with("amq.gen-1", "invalidations")
+    channel.basic_consume.assert_awaited_once_with("amq.gen-1", bus.handle_message, no_ack=True)
+    await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_bursts_are_coalesced_into_one_message():
+    """Test that invalidations published close together go out as a single message."""
+    bus = make_bus()
+    await bus.start()
+    channel = bus.channel
+
+    for user_id in (3, 1, 3, 2):
+        bus.publish("profile", user_id)
+    await asyncio.sleep(0.05)
+
+    channel.basic_publish.assert_awaited_once()
+    body = channel.basic_publish.await_args.args[0]
+    assert json.loads(body) == {"origin": bus.instance_id, "keys": {"profile": [1, 2, 3]}}
+    await bus.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_publishes_pending_invalidations():
+    """Test that invalidations queued at shutdown are still sent."""
+    bus = make_bus()
+    bus.coalesce_seconds = 60
+    await bus.start()
+    channel = bus.channel
+    bus.publish("profile", 1)
+    await bus.stop()
+
+    channel.basic_publish.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_messages_from_other_instances_are_applied():
+    """Test that other instances' keys are evicted once each, and our own messages are skipped."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60)
+    for user_id in (1, 2, 3):
+        await cache.store(user_id, b"{}", cache.token())
+    bus = make_bus(handler=cache.invalidate)
+    other = make_bus()
+
+    assert await bus.apply(other.encode({"profile": {1, 2}, "unknown": {3}})) == 2
+    assert await bus.apply(bus.encode({"profile": {3}})) == 0
+
+    assert await cache.get(1) is None and await cache.get(2) is None
+    assert await cache.get(3) == b"{}"
+
+
+@pytest.mark.asyncio
+async def test_without_a_connection_invalidations_stay_local():
+    """Test that the bus does nothing when the message queue is unavailable."""
+    bus = make_bus(connected=False)
+    await bus.start()
+    bus.publish("profile", 1)
+
+    assert bus.task is None
+    assert bus._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_user_service_writes_publish_invalidations():
+    """Test that UserService broadcasts a profile invalidation when it updates a goal."""
+    bus = MagicMock()
+    user_service = UserService(AsyncMock(spec=AsyncSession))
+
+    with patch("app.services.invalidation_bus.invalidation_bus", bus), \
+         patch("app.services.invalidation_bus.profile_cache", ProfileCache(max_entries=10, ttl_seconds=60)), \
+         patch.object(auth_service_client, "get_user", new_callable=AsyncMock, return_value={"id": 1}), \
+         patch("app.services.user.crud.profile.ensure_auth_user_references", new_callable=AsyncMock), \
+         patch("app.services.user.crud.learning_goal.update_learning_goal", new_callable=AsyncMock) as mock_update:
+        mock_update.return_value = LearningGoal(id=1, title="Goal", status="in_progress", user_id=1)
+        await user_service.update_learning_goal(1, 1, LearningGoalUpdate(title="Goal"), {"id": 1})
+
+    bus.publish.assert_called_once_with("profile", 1)
@@ -0,0 +1,52 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.db import database
+from app.db.pool_metrics import InstrumentedAsyncAdaptedQueuePool
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """A session factory bound to an instrumented file-backed SQLite pool."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'lazy.db'}",
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_unused_session_never_touches_pool(session_factory):
+    """Test that a request which never queries checks out no connection."""
+    with patch("app.db.database.SessionLocal", session_factory):
+        dependency = database.get_db()
+        session = await dependency.__anext__()
+        assert isinstance(session, AsyncSession)
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+    assert session_factory.kw["bind"].sync_engine.pool.metrics.checkouts == 0
+
+
+@pytest.mark.asyncio
+async def test_first_query_checks_out_connection(session_factory):
+    """Test that the connection is acquired on the first query and returned when the request ends."""
+    pool = session_factory.kw["bind"].sync_engine.pool
+    with patch("app.db.database.SessionLocal", session_factory):
+        dependency = database.get_db()
+        session = await dependency.__anext__()
+        result = await session.execute(text("SELECT 1"))
+
+        assert result.scalar() == 1
+        assert pool.metrics.checkouts == 1
+
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+    assert pool.checkedout() == 0
@@ -0,0 +1,164 @@
+import random
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import leaderboard as leaderboard_crud
+from app.main import app
+from app.models.leaderboard_snapshot import LeaderboardSnapshot
+from app.services.leaderboard import FenwickTree, Leaderboard, LeaderboardRefresher, user_level
+
+
+def expected_ranking(counts):
+    ranked = sorted(((-badge_count, user_id) for user_id, badge_count in counts.items() if badge_count > 0))
+    return [
+        {"rank": rank, "user_id": user_id, "badge_count": -negative, "level": user_level(-negative)}
+        for rank, (negative, user_id) in enumerate(ranked, 1)
+    ]
+
+
+def test_user_level():
+    """Test the level formula: one level per 5 badges, from 1 up to 10."""
+    assert [user_level(count) for count in (0, 4, 5, 49, 50, 500)] == [1, 1, 2, 10, 10, 10]
+
+
+def test_fenwick_tree_prefix_sums_and_lower_bound():
+    """Test prefix sums and finding the slot where a running total is reached."""
+    tree = FenwickTree(10)
+    for index, value in [(0, 2), (3, 1), (7, 4)]:
+        tree.add(index, value)
+
+    assert [tree.prefix_sum(index) for index in (-1, 0, 2, 3, 6, 7, 9)] == [0, 2, 2, 3, 3, 7, 7]
+    assert [tree.lower_bound(target) for target in (1, 2, 3, 4, 7)] == [0, 0, 3, 7, 7]
+
+
+def test_leaderboard_matches_a_full_sort_under_random_updates():
+    """Test that incremental updates keep ranks and pages identical to sorting from scratch."""
+    rng = random.Random(42)
+    board = Leaderboard(capacity=4)
+    counts = {}
+    for _ in range(2000):
+        user_id = rng.randint(1, 60)
+        delta = rng.choice([1, 1, 2, 5, -1, -3])
+        board.apply(user_id, delta)
+        counts[user_id] = max(counts.get(user_id, 0) + delta, 0)
+
+    expected = expected_ranking(counts)
+    assert len(board) == len(expected)
+    assert board.entries() == expected
+    assert board.top(7, offset=5) == expected[5:12]
+    assert board.top(10, offset=len(expected)) == []
+    for entry in expected:
+        assert board.rank_of(entry["user_id"]) == entry
+    assert all(board.rank_of(user_id) is None for user_id, count in counts.items() if count == 0)
+
+
+def test_replace_ignores_users_without_badges():
+    """Test loading counts in bulk."""
+    board = Leaderboard()
+    board.apply(9, 3)
+    board.replace([(1, 2), (2, 0), (3, 300)])
+
+    assert board.loaded
+    assert [(entry["user_id"], entry["rank"]) for entry in board.entries()] == [(3, 1), (1, 2)]
+    assert board.rank_of(9) is None
+
+
+@pytest_asyncio.fixture
+async def engine(sqlite_engine, seed_users):
+    """A SQLite database with badge counters for three users."""
+    await seed_users(sqlite_engine, {1: {"badge_count": 4}, 2: {"badge_count": 12}, 3: {}})
+    return sqlite_engine
+
+
+@pytest.mark.asyncio
+async def test_refresh_rebuilds_from_counters_and_snapshots(engine):
+    """Test that a refresh replaces drifted in-memory counts and a new instance loads the snapshot."""
+    board = Leaderboard()
+    board.apply(1, 50)
+    refresher = LeaderboardRefresher(board, [engine], snapshot_engine=engine, interval_seconds=0)
+
+    assert await refresher.refresh_once() == 2
+    assert [(entry["user_id"], entry["badge_count"]) for entry in board.entries()] == [(2, 12), (1, 4)]
+
+    async with AsyncSession(engine) as db:
+        snapshot = (await db.execute(select(LeaderboardSnapshot).order_by(LeaderboardSnapshot.rank))).scalars().all()
+    assert [(row.user_id, row.rank, row.level) for row in snapshot] == [(2, 1, 3), (1, 2, 1)]
+
+    fresh = Leaderboard()
+    assert await LeaderboardRefresher(fresh, [], snapshot_engine=engine, interval_seconds=0).load_snapshot() == 2
+    assert fresh.entries() == board.entries()
+
+
+@pytest.mark.asyncio
+async def test_awards_during_a_rebuild_are_kept(engine):
+    """Test that deltas applied while the counters are read survive the rebuild."""
+    board = Leaderboard()
+    refresher = LeaderboardRefresher(board, [engine], snapshot_engine=engine, interval_seconds=0)
+
+    async def get_badge_counts(db):
+        # Awarded through this instance after the counters were read
+        board.apply(3, 2)
+        board.apply(1, 1)
+        return [(1, 4), (2, 12)]
+
+    with patch("app.services.leaderboard.crud.leaderboard.get_badge_counts", side_effect=get_badge_counts):
+        await refresher.refresh_once()
+
+    assert [(entry["user_id"], entry["badge_count"]) for entry in board.entries()] == [(2, 12), (1, 5), (3, 2)]
+    board.apply(3, 1)
+    board.replace([(3, 1)])
+    assert board.rank_of(3)["badge_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_writes_only_changed_rows(engine):
+    """Test that an unchanged ranking rewrites nothing and a change writes only the rows it moved."""
+    board = Leaderboard()
+    board.replace([(1, 4), (2, 12), (3, 1)])
+    async with AsyncSession(engine) as db:
+        assert await leaderboard_crud.update_leaderboard_snapshot(db, board.entries()) == 3
+        assert await leaderboard_crud.update_leaderboard_snapshot(db, board.entries()) == 0
+
+        board.apply(3, 20)
+        board.set(1, 0)
+        assert await leaderboard_crud.update_leaderboard_snapshot(db, board.entries()) == 3
+        snapshot = (await db.execute(select(LeaderboardSnapshot.user_id, LeaderboardSnapshot.rank).order_by(LeaderboardSnapshot.rank))).all()
+    assert [tuple(row) for row in snapshot] == [(3, 1), (2, 2)]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_skipped_while_another_instance_writes_it():
+    """Test that only the holder of the advisory lock writes the snapshot on PostgreSQL."""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_db.bind = MagicMock()
+    mock_db.bind.dialect.name = "postgresql"
+    result = MagicMock()
+    result.scalar_one.return_value = False
+    mock_db.execute.return_value = result
+
+    assert await leaderboard_crud.update_leaderboard_snapshot(mock_db, [{"user_id": 1, "badge_count": 1, "level": 1, "rank": 1}]) is None
+    mock_db.execute.assert_awaited_once()
+    assert "pg_try_advisory_xact_lock" in str(mock_db.execute.await_args.args[0])
+    mock_db.commit.assert_not_awaited()
+
+
+def test_leaderboard_endpoint(monkeypatch):
+    """Test the leaderboard route, which is not shadowed by /users/{auth_user_id}."""
+    board = Leaderboard()
+    board.replace([(1, 3), (2, 8), (3, 5)])
+    monkeypatch.setattr("app.services.user.leaderboard", board)
+
+    response = TestClient(app).get("/users/leaderboard?limit=2&auth_user_id=1")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 3,
+        "entries": [
+            {"rank": 1, "user_id": 2, "badge_count": 8, "level": 2},
+            {"rank": 2, "user_id": 3, "badge_count": 5, "level": 2},
+        ],
+        "user": {"rank": 3, "user_id": 1, "badge_count": 3, "level": 1},
+    }
@@ -0,0 +1,144 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.crud import learning_goal
+from app.crud.learning_goal import InvalidStatusTransition, LearningGoalNotDeletable, StaleLearningGoal
+from app.models.learning_goal import LearningGoal
+from app.models.user_stats import UserStats
+from app.schemas.learning_goal import LearningGoalUpdate
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_engine, seed_users):
+    """A SQLite session holding one in-progress goal, counting its statements."""
+    await seed_users(sqlite_engine, {1: None}, LearningGoal(id=1, title="Goal", description="d", status="in_progress", streak_count=0, user_id=1))
+    session_factory = sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        statements = []
+        event.listen(sqlite_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        session.statements = statements
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_valid_transition_is_one_statement(db):
+    """Test that a valid update is a single UPDATE ... RETURNING that bumps the version."""
+    result = await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(status="completed"))
+    
+    assert result.status == "completed"
+    assert result.version == 2
+    assert len(db.statements) == 1
+    assert db.statements[0].startswith("UPDATE learning_goals")
+
+
+@pytest.mark.asyncio
+async def test_invalid_transition_is_refused(db):
+    """Test that a transition not allowed from the current status leaves the goal unchanged."""
+    await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(status="completed"))
+    
+    with pytest.raises(InvalidStatusTransition) as exc_info:
+        await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(status="in_progress"))
+    
+    assert exc_info.value.current_status == "completed"
+    assert exc_info.value.new_status == "in_progress"
+    goal = await learning_goal.get_learning_goal(db, 1, 1)
+    assert goal.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_stale_version_is_refused(db):
+    """Test that an update against an old version is rejected."""
+    await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(title="Renamed", version=1))
+    
+    with pytest.raises(StaleLearningGoal) as exc_info:
+        await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(title="Lost update", version=1))
+    
+    assert exc_info.value.current_version == 2
+    goal = await learning_goal.get_learning_goal(db, 1, 1)
+    assert goal.title == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_missing_or_foreign_goal_is_not_found(db):
+    """Test that goals that do not exist or belong to someone else return None."""
+    assert await learning_goal.update_learning_goal(db, 999, 1, LearningGoalUpdate(title="x")) is None
+    assert await learning_goal.update_learning_goal(db, 1, 2, LearningGoalUpdate(title="x")) is None
+
+
+def test_statuses_allowed_to_move_to():
+    """Test the reverse lookup of the status transition table."""
+    assert set(learning_goal.statuses_allowed_to_move_to("archived")) == {"not_started", "in_progress", "paused", "completed"}
+    assert learning_goal.statuses_allowed_to_move_to("not_started") == []
+
+
+@pytest.mark.asyncio
+async def test_delete_is_conditional_and_decrements_counter(db):
+    """Test that deleting a goal is a DELETE ... RETURNING plus the counter decrement."""
+    db.add(UserStats(user_id=1, badge_count=0, goal_count=1))
+    await db.commit()
+    db.statements.clear()
+    
+    deleted = await learning_goal.delete_learning_goal(db, 1, 1)
+    
+    assert deleted.id == 1
+    assert [statement.split()[0] for statement in db.statements] == ["DELETE", "UPDATE"]
+    assert await learning_goal.get_learning_goal(db, 1, 1) is None
+    stats = await db.get(UserStats, 1)
+    assert stats.goal_count == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_completed_goal_is_refused(db):
+    """Test that a completed goal is not deleted and the refusal is reported."""
+    await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(status="completed"))
+    
+    with pytest.raises(LearningGoalNotDeletable) as exc_info:
+        await learning_goal.delete_learning_goal(db, 1, 1)
+    
+    assert exc_info.value.status == "completed"
+    assert await learning_goal.get_learning_goal(db, 1, 1) is not None
+
+
+@pytest.mark.asyncio
+async def test_delete_missing_goal_returns_none(db):
+    """Test that deleting a goal that does not exist or belongs to someone else returns None."""
+    assert await learning_goal.delete_learning_goal(db, 999, 1) is None
+    assert await learning_goal.delete_learning_goal(db, 1, 2) is None
+
+
+def test_postgres_delete_is_one_statement():
+    """Test that the PostgreSQL delete folds the status check and counter update into one statement."""
+    sql = str(learning_goal._delete_learning_goal_statement(1, 1).compile(dialect=postgresql.dialect()))
+    
+    assert sql.startswith("WITH target AS")
+    assert "DELETE FROM learning_goals" in sql
+    assert "IS DISTINCT FROM" in sql
+    assert "UPDATE user_stats" in sql
+
+
+def test_postgres_update_bumps_the_list_version_in_the_same_statement():
+    """Test that the PostgreSQL update also bumps the owner's user_stats.version, in one statement."""
+    conditions = [LearningGoal.id == 1, LearningGoal.user_id == 1]
+    statement = learning_goal._update_learning_goal_statement(conditions, {"title": "Renamed"}, 1)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("WITH updated AS")
+    assert "UPDATE learning_goals" in sql
+    assert "RETURNING" in sql
+    assert "UPDATE user_stats SET version=(user_stats.version + " in sql
+
+
+@pytest.mark.asyncio
+async def test_sqlite_trigger_bumps_the_list_version(db):
+    """Test that on SQLite a goal update bumps the owner's list version without a second statement."""
+    db.add(UserStats(user_id=1, goal_count=1))
+    await db.commit()
+    db.statements.clear()
+
+    await learning_goal.update_learning_goal(db, 1, 1, LearningGoalUpdate(title="Renamed"))
+
+    assert len(db.statements) == 1
+    assert await learning_goal.user_stats.get_version(db, user_id=1) == 2
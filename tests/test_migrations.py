@@ -0,0 +1,47 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from app.db.migrations import SchemaRevisionError, check_schema_revision, expected_revisions
+
+
+@pytest_asyncio.fixture
+async def engine(make_sqlite_engine):
+    """An empty SQLite database."""
+    return await make_sqlite_engine("schema", create_schema=False)
+
+
+async def set_revision(engine, revision):
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        await conn.execute(text("DELETE FROM alembic_version"))
+        await conn.execute(text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": revision})
+
+
+def test_migrations_have_a_single_head():
+    """Test that the alembic scripts have not branched."""
+    assert len(expected_revisions()) == 1
+
+
+@pytest.mark.asyncio
+async def test_check_passes_at_head(engine):
+    """Test that startup proceeds when the database is at head."""
+    head, = expected_revisions()
+    await set_revision(engine, head)
+    
+    assert await check_schema_revision(engine) == head
+
+
+@pytest.mark.asyncio
+async def test_check_fails_when_behind(engine):
+    """Test that startup refuses a database that still needs migrating."""
+    await set_revision(engine, "1")
+    
+    with pytest.raises(SchemaRevisionError, match="revision 1 but the code expects"):
+        await check_schema_revision(engine)
+
+
+@pytest.mark.asyncio
+async def test_check_fails_without_alembic_version(engine):
+    """Test that startup refuses a database alembic has never touched."""
+    with pytest.raises(SchemaRevisionError, match="apply_migrations.py"):
+        await check_schema_revision(engine)
@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from app.crud import badge, learning_goal
+from app.crud.pagination import encode_cursor, decode_cursor, split_page, InvalidCursorError
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.services.user import UserService
+from app.services.auth_service import auth_service_client
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes back to the sort key it was built from."""
+    achieved = datetime(2024, 5, 1, 12, 30)
+    cursor = encode_cursor(achieved, 42)
+    
+    assert decode_cursor(cursor, datetime, int) == (achieved, 42)
+
+
+def test_decode_cursor_rejects_garbage():
+    """Test that malformed or mismatched cursors raise InvalidCursorError."""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", int)
+    
+    # A goal cursor is not a valid badge cursor
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor(7), datetime, int)
+
+
+def test_split_page():
+    """Test splitting the limit + 1 rows of a keyset query."""
+    assert split_page([1, 2, 3], 2) == ([1, 2], True)
+    assert split_page([1, 2], 2) == ([1, 2], False)
+
+
+@pytest.mark.asyncio
+async def test_get_badges_page_by_user_returns_next_cursor():
+    """Test that a full page of badges comes back with a cursor pointing at its last row."""
+    mock_db = AsyncMock(spec=AsyncSession)
+    rows = [
+        Badge(id=3, name="C", description="C", icon_url="http://example.com/c.png", date_achieved=datetime(2024, 1, 3), user_id=1),
+        Badge(id=2, name="B", description="B", icon_url="http://example.com/b.png", date_achieved=datetime(2024, 1, 2), user_id=1),
+        Badge(id=1, name="A", description="A", icon_url="http://example.com/a.png", date_achieved=datetime(2024, 1, 1), user_id=1),
+    ]
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = rows
+    mock_db.execute.return_value = mock_result
+    
+    badges, next_cursor = await badge.get_badges_page_by_user(mock_db, 1, limit=2)
+    
+    assert [b.id for b in badges] == [3, 2]
+    assert decode_cursor(next_cursor, datetime, int) == (datetime(2024, 1, 2), 2)
+    
+    # The query must be keyset-ordered and must not use OFFSET
+    compiled = str(mock_db.execute.call_args[0][0])
+    assert "OFFSET" not in compiled
+    assert "ORDER BY badges.date_achieved DESC, badges.id DESC" in compiled
+
+
+@pytest.mark.asyncio
+async def test_get_learning_goals_page_by_user_last_page():
+    """Test that the last page of learning goals has no next cursor."""
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = [
+        LearningGoal(id=1, title="Goal", description="Desc", status="in_progress", streak_count=0, user_id=1)
+    ]
+    mock_db.execute.return_value = mock_result
+    
+    goals, next_cursor = await learning_goal.get_learning_goals_page_by_user(mock_db, 1, limit=10, cursor=encode_cursor(5))
+    
+    assert len(goals) == 1
+    assert next_cursor is None
+    compiled = str(mock_db.execute.call_args[0][0])
+    assert "learning_goals.id <" in compiled
+
+
+@pytest.mark.asyncio
+async def test_get_user_badges_page_invalid_cursor():
+    """Test that an invalid cursor is reported as a 400 by the service."""
+    user_service = UserService(AsyncMock(spec=AsyncSession))
+    with patch('app.services.user.auth_service_client', auth_service_client):
+        with patch.object(auth_service_client, 'get_user') as mock_get_user:
+            mock_get_user.return_value = {"id": 1, "username": "testuser"}
+            
+            with pytest.raises(HTTPException) as exc_info:
+                await user_service.get_user_badges_page(1, limit=10, cursor="garbage")
+            
+            assert exc_info.value.status_code == 400
+            assert exc_info.value.detail == "Invalid cursor"
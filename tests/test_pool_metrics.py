@@ -0,0 +1,74 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.pool_metrics import InstrumentedAsyncAdaptedQueuePool, PoolMetrics, pool_snapshot
+
+
+@pytest_asyncio.fixture
+async def pool_engine(tmp_path):
+    """A file-backed SQLite engine with a one-connection instrumented pool."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    yield engine
+    await engine.dispose()
+
+
+def test_wait_percentiles():
+    """Test percentile lookup over the recorded checkout waits."""
+    metrics = PoolMetrics()
+    assert metrics.wait_percentile(95) is None
+    for wait in range(1, 101):
+        metrics.record_checkout(wait / 1000, 1)
+    
+    assert metrics.checkouts == 100
+    assert metrics.wait_percentile(50) == pytest.approx(0.051, abs=0.001)
+    assert metrics.wait_percentile(99) == pytest.approx(0.099, abs=0.001)
+    assert metrics.max_wait_seconds == pytest.approx(0.1)
+
+
+@pytest.mark.asyncio
+async def test_checkouts_and_in_use_are_reported(pool_engine):
+    """Test that checkouts are counted and in-use connections are visible."""
+    async with pool_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        snapshot = pool_snapshot(pool_engine.sync_engine.pool)
+        assert snapshot["checked_out"] == 1
+        assert snapshot["utilization"] == 1.0
+    
+    snapshot = pool_snapshot(pool_engine.sync_engine.pool)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 1
+    assert snapshot["peak_checked_out"] == 1
+    assert snapshot["timeouts"] == 0
+    assert snapshot["wait_seconds"]["max"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_pool_exhaustion_counts_timeout(pool_engine, caplog):
+    """Test that a checkout timing out on an exhausted pool is recorded and logged."""
+    async with pool_engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            async with pool_engine.connect():
+                pass
+    
+    metrics = pool_engine.sync_engine.pool.metrics
+    assert metrics.timeouts == 1
+    assert metrics.max_wait_seconds >= 0.1
+    assert any(record.levelname == "WARNING" and "Connection pool exhausted" in record.message for record in caplog.records)
+
+
+@pytest.mark.asyncio
+async def test_metrics_survive_dispose(pool_engine):
+    """Test that counters carry over when the engine rebuilds its pool."""
+    async with pool_engine.connect():
+        pass
+    await pool_engine.dispose()
+    
+    assert pool_engine.sync_engine.pool.metrics.checkouts == 1
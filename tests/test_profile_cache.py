@@ -0,0 +1,163 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import NullCache, RedisCache
+from app.models.learning_goal import LearningGoal
+from app.schemas.learning_goal import LearningGoalUpdate
+from app.services.auth_service import auth_service_client
+from app.services.profile_cache import ProfileCache
+from app.services.user import UserService
+from tests.test_cache import redis_server  # noqa: F401
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    clock = Clock()
+    with patch("app.services.profile_cache.time.time", clock), patch("app.cache.memory.time.monotonic", clock):
+        yield clock
+
+
+@pytest.mark.asyncio
+async def test_hits_misses_and_expiry(clock):
+    """Test that entries are served until their TTL and the metrics follow."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60)
+    assert await cache.get(1) is None
+    assert await cache.store(1, b"{}", cache.token())
+
+    clock.now += 30
+    assert await cache.get(1) == b"{}"
+    clock.now += 30
+    assert await cache.get(1) is None
+
+    snapshot = cache.snapshot()
+    assert (snapshot["hits"], snapshot["misses"]) == (1, 2)
+    assert snapshot["hit_ratio"] == round(1 / 3, 4)
+    assert snapshot["hit_age_seconds"]["max"] == 30
+    assert snapshot["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_are_evicted(clock):
+    """Test that the cache keeps at most max_entries, evicting the least recently read."""
+    cache = ProfileCache(max_entries=2, ttl_seconds=60)
+    for user_id in (1, 2):
+        await cache.store(user_id, b"%d" % user_id, cache.token())
+    await cache.get(1)
+    await cache.store(3, b"3", cache.token())
+
+    assert await cache.get(2) is None
+    assert await cache.get_many([1, 2, 3]) == {1: b"1", 3: b"3"}
+
+
+@pytest.mark.asyncio
+async def test_invalidation_drops_the_entry_and_refuses_racing_fills(clock):
+    """Test that a profile built before an invalidation is not cached after it."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60)
+    await cache.store(1, b"old", cache.token())
+
+    token = cache.token()     # a read starts building user 1's profile
+    await cache.invalidate(1)  # a write lands meanwhile
+    assert await cache.get(1) is None
+    assert not await cache.store(1, b"stale", token)
+
+    # Other users are unaffected, and fills started after the write are kept
+    assert await cache.store(2, b"two", token)
+    assert await cache.store_many({1: b"new", 3: b"three"}, cache.token()) == {1: b"new", 3: b"three"}
+    assert cache.snapshot()["discarded_fills"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fills_older_than_forgotten_invalidations_are_refused(clock):
+    """Test that bounding the invalidation log errs on the side of not caching."""
+    cache = ProfileCache(max_entries=1, ttl_seconds=60)
+    token = cache.token()
+    await cache.invalidate(1)
+    await cache.invalidate(2)  # forgets user 1's invalidation
+
+    assert not await cache.store(1, b"stale", token)
+    assert await cache.store(1, b"fresh", cache.token())
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_stores_nothing():
+    """Test that a zero TTL disables caching."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=0)
+    assert not await cache.store(1, b"{}", cache.token())
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_shared_through_the_cache_backend(redis_server):
+    """Test that with a shared backend one instance serves profiles another cached, until it invalidates them."""
+    _, url = redis_server
+    first = ProfileCache(max_entries=10, ttl_seconds=60, backend=RedisCache(url))
+    second = ProfileCache(max_entries=10, ttl_seconds=60, backend=RedisCache(url))
+
+    await first.store(1, b'{"id":1}', first.token())
+    assert await second.get(1) == b'{"id":1}'
+    assert 59000 < await first.backend.client.pttl("user-service:profile:1") <= 60000
+
+    await first.invalidate(1)
+    assert await second.get(1) is None
+    assert second.snapshot()["entries"] is None
+    await first.backend.close()
+    await second.backend.close()
+
+
+@pytest.mark.asyncio
+async def test_null_backend_disables_the_profile_cache():
+    """Test that CACHE_BACKEND=none leaves the profile cache empty."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60, backend=NullCache())
+    await cache.store(1, b"{}", cache.token())
+    assert await cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_service_serves_cached_profiles_until_a_write(clock):
+    """Test that UserService caches serialized profiles and drops them on goal updates."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60)
+    user_service = UserService(AsyncMock(spec=AsyncSession))
+    profile = {"id": 1, "username": "testuser", "badges": [], "learning_goals": []}
+
+    with patch("app.services.user.profile_cache", cache), \
+         patch("app.services.invalidation_bus.profile_cache", cache), \
+         patch("app.services.user.should_read_from_primary", new_callable=AsyncMock, return_value=False), \
+         patch.object(UserService, "get_user_profile", new_callable=AsyncMock, return_value=profile) as mock_get_profile:
+        first = await user_service.get_user_profile_json(1)
+        second = await user_service.get_user_profile_json(1)
+
+        assert json.loads(first) == profile
+        assert second == first
+        assert mock_get_profile.await_count == 1
+
+        with patch("app.services.user.auth_service_client", auth_service_client), \
+             patch.object(auth_service_client, "get_user", new_callable=AsyncMock, return_value={"id": 1}), \
+             patch("app.services.user.crud.profile.ensure_auth_user_references", new_callable=AsyncMock), \
+             patch("app.services.user.crud.learning_goal.update_learning_goal", new_callable=AsyncMock) as mock_update:
+            mock_update.return_value = LearningGoal(id=1, title="Goal", status="in_progress", user_id=1)
+            await user_service.update_learning_goal(1, 1, LearningGoalUpdate(title="Goal"), {"id": 1})
+
+        await user_service.get_user_profile_json(1)
+        assert mock_get_profile.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_service_does_not_cache_right_after_a_write(clock):
+    """Test that profiles read while the user's reads are pinned to the primary are not cached."""
+    cache = ProfileCache(max_entries=10, ttl_seconds=60)
+    user_service = UserService(AsyncMock(spec=AsyncSession))
+
+    with patch("app.services.user.profile_cache", cache), \
+         patch("app.services.user.should_read_from_primary", new_callable=AsyncMock, return_value=True), \
+         patch.object(UserService, "get_user_profile", new_callable=AsyncMock, return_value={"id": 1}):
+        await user_service.get_user_profile_json(1)
+
+    assert cache.snapshot()["entries"] == 0
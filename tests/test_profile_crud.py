@@ -0,0 +1,66 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.crud import profile
+from app.models.auth_user_reference import AuthUserReference
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.models.user_stats import UserStats
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_engine):
+    """A SQLite session with the full schema."""
+    session_factory = sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_get_profile_data(db):
+    """Test that badges, goals and counters are loaded, with lists ordered newest first."""
+    db.add(AuthUserReference(id=1))
+    db.add(UserStats(user_id=1, badge_count=2, goal_count=1))
+    db.add_all([
+        Badge(id=1, name="First", description="d", icon_url="http://example.com/1.png", date_achieved=datetime(2024, 1, 1), user_id=1),
+        Badge(id=2, name="Second", description="d", icon_url="http://example.com/2.png", date_achieved=datetime(2024, 1, 2), user_id=1),
+        LearningGoal(id=1, title="Goal", description="d", status="in_progress", streak_count=3, user_id=1),
+        # Another user's rows must not leak into the profile
+        Badge(id=3, name="Other", description="d", icon_url="http://example.com/3.png", date_achieved=datetime(2024, 1, 3), user_id=2),
+    ])
+    await db.commit()
+    
+    result = await profile.get_profile_data(db, user_id=1)
+    
+    assert result["reference_exists"] is True
+    assert [b["name"] for b in result["badges"]] == ["Second", "First"]
+    assert result["badges"][0]["date_achieved"] == "2024-01-02T00:00:00"
+    assert result["learning_goals"][0]["title"] == "Goal"
+    assert result["total_badges"] == 2
+    assert result["total_goals"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_profile_data_unknown_user(db):
+    """Test that an unknown user gets empty lists and a missing reference."""
+    result = await profile.get_profile_data(db, user_id=99)
+    
+    assert result == {
+        "reference_exists": False,
+        "badges": [],
+        "learning_goals": [],
+        "total_badges": 0,
+        "total_goals": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_auth_user_reference_exists(db):
+    """Test checking for a user's auth reference."""
+    db.add(AuthUserReference(id=1))
+    await db.commit()
+    
+    assert await profile.auth_user_reference_exists(db, user_id=1) is True
+    assert await profile.auth_user_reference_exists(db, user_id=2) is False
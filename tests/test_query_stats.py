@@ -0,0 +1,112 @@
+import httpx
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, patch
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db.database import get_read_db
+from app.db.query_stats import instrument_engine, query_budget, track_queries
+from app.main import add_query_stats_headers, app
+from app.models.badge import Badge
+from app.models.learning_goal import LearningGoal
+from app.services.auth_service import auth_service_client
+from app.services.profile_cache import ProfileCache
+
+USER = {"id": 1, "username": "ada", "email": "ada@example.com"}
+
+
+@pytest_asyncio.fixture
+async def engine(sqlite_engine, seed_users):
+    """An instrumented SQLite database with one user's badges and goals."""
+    instrument_engine(sqlite_engine)
+    await seed_users(
+        sqlite_engine,
+        {1: {"badge_count": 3, "goal_count": 3}},
+        *[Badge(name=f"Badge {n}", description="d", icon_url="i", user_id=1) for n in range(3)],
+        *[LearningGoal(title=f"Goal {n}", status="in_progress", streak_count=0, user_id=1) for n in range(3)],
+    )
+    return sqlite_engine
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_statements_and_repeats(engine):
+    """Test that statements are counted inside the block only, and repeats are reported."""
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            for _ in range(5):
+                await conn.execute(text("SELECT 2"))
+            await conn.execute(text("SELECT 3"))
+
+    assert stats.count == 6
+    assert stats.seconds > 0
+    assert stats.repeated() == {"SELECT 2": 5}
+
+
+@pytest.mark.asyncio
+async def test_query_budget_fails_when_exceeded(engine):
+    """Test that the budget helper lists the statements when it is exceeded."""
+    async with engine.connect() as conn:
+        with query_budget(2):
+            await conn.execute(text("SELECT 1"))
+        with pytest.raises(AssertionError, match="at most 1 queries, got 2"):
+            with query_budget(1):
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+
+
+@pytest_asyncio.fixture
+async def client(engine):
+    """A client for the app whose read routes use the instrumented database."""
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_read_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    # Budgets are for the uncached path
+    with patch("app.services.user.profile_cache", ProfileCache(max_entries=0, ttl_seconds=0)), \
+         patch.object(auth_service_client, "get_user", new_callable=AsyncMock, return_value=USER):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as ac:
+            yield ac
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path, budget", [
+    ("/users/1", 1),
+    ("/users/1/badges", 2),
+    ("/users/1/goals", 2),
+    ("/users/leaderboard", 0),
+])
+async def test_read_endpoint_query_budgets(client, path, budget):
+    """Test that read endpoints stay within their query budgets."""
+    with query_budget(budget):
+        response = await client.get(path)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_debug_middleware_adds_headers(engine):
+    """Test that the debug middleware reports each request's statements in headers."""
+    debug_app = FastAPI()
+    debug_app.middleware("http")(add_query_stats_headers)
+
+    async def db():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    @debug_app.get("/work")
+    async def work(session: AsyncSession = Depends(db)):
+        for _ in range(3):
+            await session.execute(text("SELECT 1"))
+        return {}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=debug_app), base_url="http://test") as ac:
+        response = await ac.get("/work")
+
+    assert response.headers["X-DB-Query-Count"] == "3"
+    assert float(response.headers["X-DB-Query-Time-Ms"]) > 0
@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.cache import MemoryCache, NullCache, RedisCache
+from app.db import database
+from tests.test_cache import redis_server  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def clear_recent_writes():
+    """Start every test without any recorded writes, in this process or the shared cache."""
+    database._recent_writes.clear()
+    with patch("app.db.database.cache", MemoryCache(max_entries=100)):
+        yield
+    database._recent_writes.clear()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_without_recent_write():
+    """Test that a user who has not written reads from the replica."""
+    assert await database.should_read_from_primary(1) is False
+
+
+@pytest.mark.asyncio
+async def test_recent_write_sticks_reads_to_primary():
+    """Test read-your-writes stickiness after a mutation."""
+    await database.mark_user_write(1)
+    
+    assert await database.should_read_from_primary(1) is True
+    assert await database.should_read_from_primary(2) is False
+    assert await database.users_reading_from_primary([1, 2]) == {1}
+
+
+@pytest.mark.asyncio
+async def test_stickiness_expires():
+    """Test that stickiness ends after DATABASE_READ_YOUR_WRITES_SECONDS."""
+    with patch("app.db.database.cache", NullCache()):
+        with patch("app.db.database.time.monotonic", return_value=100.0):
+            await database.mark_user_write(1)
+        with patch("app.db.database.time.monotonic", return_value=100.0 + database.settings.DATABASE_READ_YOUR_WRITES_SECONDS + 1):
+            assert await database.should_read_from_primary(1) is False
+    assert 1 not in database._recent_writes
+
+
+@pytest.mark.asyncio
+async def test_writes_stick_reads_to_primary_on_other_instances(redis_server):
+    """Test that a write marked by one instance pins the user's reads on another that shares the cache."""
+    _, url = redis_server
+    writer, reader = RedisCache(url), RedisCache(url)
+    
+    with patch("app.db.database.cache", writer):
+        await database.mark_user_writes([1, 2])
+    # The other instance has no local record of the writes
+    database._recent_writes.clear()
+    with patch("app.db.database.cache", reader):
+        assert await database.should_read_from_primary(1) is True
+        assert await database.should_read_from_primary(3) is False
+        assert await database.users_reading_from_primary([1, 2, 3]) == {1, 2}
+    
+    ttl_ms = database.settings.DATABASE_READ_YOUR_WRITES_SECONDS * 1000
+    keys = await writer.client.keys()
+    assert len(keys) == 2
+    for key in keys:
+        assert ttl_ms - 1000 < await writer.client.pttl(key) <= ttl_ms
+    await writer.close()
+    await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_get_read_db_routes_by_path_user():
+    """Test that get_read_db picks the primary only for users who just wrote."""
+    replica_session = MagicMock(name="replica")
+    primary_session = MagicMock(name="primary")
+    
+    def factory(session):
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=session)
+        context.__aexit__ = AsyncMock(return_value=False)
+        return MagicMock(return_value=context)
+    
+    with patch("app.db.database.ReadSessionLocal", factory(replica_session)), \
+         patch("app.db.database.SessionLocal", factory(primary_session)):
+        request = MagicMock()
+        request.path_params = {"auth_user_id": "1"}
+        
+        assert await database.get_read_db(request).__anext__() is replica_session
+        
+        await database.mark_user_write(1)
+        assert await database.get_read_db(request).__anext__() is primary_session
@@ -0,0 +1,203 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.db import sharding
+from app.db.resharding import ReshardConflict, aligned_id, check_id_ranges, copy_to_owners, delete_from_non_owners, find_overlapping_ranges
+from app.db.sharding import ConsistentHashRing, ShardKeyRequired, ShardRouter, ShardRoutingSession, shard_key
+from app.crud import badge, learning_goal
+from app.models.auth_user_reference import AuthUserReference
+from app.models.learning_goal import LearningGoal
+from app.models.user import User
+from app.schemas.badge import BadgeAward
+from app.schemas.learning_goal import LearningGoalCreate
+
+USER_IDS = range(1, 41)
+
+
+@pytest_asyncio.fixture
+async def cluster(make_sqlite_engine):
+    """A primary plus two shards, each its own SQLite file, with the router installed."""
+    primary = await make_sqlite_engine("primary")
+    router = ShardRouter({name: await make_sqlite_engine(name) for name in ("a", "b")})
+    sharding.configure(router)
+    session_factory = sessionmaker(bind=primary, class_=AsyncSession, sync_session_class=ShardRoutingSession, expire_on_commit=False)
+    yield primary, router, session_factory, make_sqlite_engine
+    sharding.configure(None)
+
+
+async def seed_users(session_factory):
+    """Create the auth reference and one learning goal per user, with goal IDs unique across shards."""
+    async with session_factory() as db:
+        for user_id in USER_IDS:
+            with shard_key(user_id):
+                db.add(AuthUserReference(id=user_id))
+                db.add(LearningGoal(id=1000 + user_id, title=f"Goal {user_id}", status="in_progress", streak_count=0, user_id=user_id))
+                await db.commit()
+
+
+async def user_ids_on(engine, table="learning_goals", column="user_id"):
+    async with engine.connect() as conn:
+        return set((await conn.execute(text(f"SELECT {column} FROM {table}"))).scalars().all())
+
+
+def test_ring_is_stable_and_balanced():
+    """Test that keys map deterministically and spread over all nodes."""
+    ring = ConsistentHashRing(["a", "b", "c"])
+    owners = [ring.node_for(user_id) for user_id in range(10000)]
+    
+    reordered = ConsistentHashRing(["c", "b", "a"])
+    assert owners == [reordered.node_for(user_id) for user_id in range(10000)]
+    for node in "abc":
+        assert 2000 < owners.count(node) < 4700
+
+
+def test_adding_a_node_moves_about_one_nth():
+    """Test that growing from 3 to 4 shards only moves keys onto the new shard."""
+    before = ConsistentHashRing(["a", "b", "c"])
+    after = ConsistentHashRing(["a", "b", "c", "d"])
+    moved = [user_id for user_id in range(10000) if before.node_for(user_id) != after.node_for(user_id)]
+    
+    assert all(after.node_for(user_id) == "d" for user_id in moved)
+    assert 1500 < len(moved) < 3500
+
+
+@pytest.mark.asyncio
+async def test_crud_routes_user_data_to_its_shard(cluster):
+    """Test that routed CRUD functions write each user's rows to the owning shard only."""
+    primary, router, session_factory, _ = cluster
+    await seed_users(session_factory)
+    async with session_factory() as db:
+        for user_id in USER_IDS:
+            await learning_goal.create_user_learning_goal(db, LearningGoalCreate(title=f"Second goal {user_id}", status="in_progress"), user_id=user_id)
+    
+    for name, engine in router.engines.items():
+        assert await user_ids_on(engine) == {user_id for user_id in USER_IDS if router.shard_for(user_id) == name}
+        assert await user_ids_on(engine, "user_stats") == {user_id for user_id in USER_IDS if router.shard_for(user_id) == name}
+    assert await user_ids_on(primary) == set()
+    
+    async with session_factory() as db:
+        goals = await learning_goal.get_learning_goals_by_user(db, user_id=7)
+        assert [goal.title for goal in goals] == ["Second goal 7", "Goal 7"]
+
+
+@pytest.mark.asyncio
+async def test_unsharded_tables_stay_on_primary(cluster):
+    """Test that global tables like users are not routed."""
+    primary, router, session_factory, _ = cluster
+    async with session_factory() as db:
+        db.add(User(id=1, username="alice"))
+        await db.commit()
+    
+    assert await user_ids_on(primary, "users", "id") == {1}
+
+
+@pytest.mark.asyncio
+async def test_sharded_query_without_key_is_refused(cluster):
+    """Test that a query on a sharded table with no user to route by fails loudly."""
+    _, _, session_factory, _ = cluster
+    async with session_factory() as db:
+        with pytest.raises(ShardKeyRequired):
+            await db.execute(select(func.count(LearningGoal.id)))
+
+
+@pytest.mark.asyncio
+async def test_bulk_awards_are_split_per_shard(cluster):
+    """Test that bulk awards spanning shards land on each user's shard, results in request order."""
+    _, router, session_factory, _ = cluster
+    await seed_users(session_factory)
+    awards = [BadgeAward(user_id=user_id, name="Streak", description="d", icon_url="http://example.com/b.png") for user_id in (3, 1, 2, 99)]
+    
+    async with session_factory() as db:
+        results = await badge.create_badges_bulk(db, awards, max_badges=10)
+    
+    assert [result["user_id"] for result in results] == [3, 1, 2, 99]
+    assert [result["status"] for result in results] == ["created", "created", "created", "rejected"]
+    for user_id in (1, 2, 3):
+        assert user_id in await user_ids_on(router.engine_for(user_id), "badges")
+
+
+@pytest.mark.asyncio
+async def test_bulk_awards_report_a_failed_shard_per_item(cluster):
+    """Test that a failing shard marks its own awards failed while the other shards' awards stay saved."""
+    _, router, session_factory, _ = cluster
+    await seed_users(session_factory)
+    async with router.engines["b"].begin() as conn:
+        await conn.execute(text("DROP TABLE badges"))
+    user_ids = list(USER_IDS)
+    awards = [BadgeAward(user_id=user_id, name="Streak", description="d", icon_url="http://example.com/b.png") for user_id in user_ids]
+    
+    async with session_factory() as db:
+        results = await badge.create_badges_bulk(db, awards, max_badges=10)
+    
+    expected = ["failed" if router.shard_for(user_id) == "b" else "created" for user_id in user_ids]
+    assert [result["status"] for result in results] == expected
+    assert await user_ids_on(router.engines["a"], "badges") == {user_id for user_id in user_ids if router.shard_for(user_id) == "a"}
+
+
+@pytest.mark.asyncio
+async def test_reshard_to_three_shards(cluster):
+    """Test that copy then cleanup leaves every user's rows on exactly its new owner."""
+    _, router, session_factory, make_sqlite_engine = cluster
+    await seed_users(session_factory)
+    new_router = ShardRouter({**router.engines, "c": await make_sqlite_engine("c")})
+    
+    copied = await copy_to_owners(router.engines, new_router, batch_size=7)
+    moved = {user_id for user_id in USER_IDS if new_router.shard_for(user_id) != router.shard_for(user_id)}
+    assert copied["users_moved"] == len(moved) > 0
+    assert await user_ids_on(new_router.engines["c"]) == moved
+    
+    removed = await delete_from_non_owners(router.engines, new_router, batch_size=7)
+    assert removed["users_removed"] == len(moved)
+    for name, engine in new_router.engines.items():
+        owned = {user_id for user_id in USER_IDS if new_router.shard_for(user_id) == name}
+        assert await user_ids_on(engine) == owned
+        assert await user_ids_on(engine, "auth_users", "id") == owned
+    
+    # Running the copy again changes nothing
+    again = await copy_to_owners(new_router.engines, new_router)
+    assert again["users_moved"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reshard_refuses_to_overwrite_another_users_row(cluster):
+    """Test that a goal ID already used by another user on the target stops the copy."""
+    _, router, session_factory, make_sqlite_engine = cluster
+    await seed_users(session_factory)
+    target = await make_sqlite_engine("c")
+    async with target.begin() as conn:
+        await conn.execute(text("INSERT INTO auth_users (id) VALUES (999)"))
+        await conn.execute(text("INSERT INTO learning_goals (id, title, status, streak_count, version, user_id) VALUES (1001, 'x', 'in_progress', 0, 1, 999)"))
+    
+    with pytest.raises(ReshardConflict):
+        await copy_to_owners(router.engines, ShardRouter({"c": target}))
+
+
+def test_aligned_ids_stay_in_the_shards_range():
+    """Test that sequences resume at the first ID of the shard's range past the highest ID."""
+    assert aligned_id(1, 3, 64) == 3
+    assert aligned_id(100, 3, 64) == 131
+    assert aligned_id(131, 3, 64) == 131
+    assert aligned_id(130, 0, 64) == 192
+
+
+def test_overlapping_id_ranges_are_reported():
+    """Test that shards sharing an offset, or stepping by different strides, are flagged."""
+    disjoint = {"a": {"badges": (1, 64), "learning_goals": (1, 64)}, "b": {"badges": (2, 64), "learning_goals": (2, 64)}}
+    assert find_overlapping_ranges(disjoint) == []
+
+    defaults = {"a": {"badges": (0, 1), "learning_goals": (0, 1)}, "b": {"badges": (0, 1), "learning_goals": (0, 1)}}
+    problems = find_overlapping_ranges(defaults)
+    assert "badges IDs on shards a, b share offset 0" in problems
+    assert any("fewer than the 2 shards" in problem for problem in problems)
+
+    mixed = {"a": {"badges": (1, 64), "learning_goals": (1, 64)}, "b": {"badges": (2, 32), "learning_goals": (2, 64)}}
+    assert find_overlapping_ranges(mixed) == ["badges IDs use different strides [32, 64]"]
+
+
+@pytest.mark.asyncio
+async def test_id_range_check_skips_databases_without_sequences(cluster):
+    """Test that SQLite shards, used for development, pass the startup check."""
+    _, router, _, _ = cluster
+    await check_id_ranges(router.engines)
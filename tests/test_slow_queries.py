@@ -0,0 +1,59 @@
+import logging
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import badge
+from app.db.slow_queries import SlowQueryLog, redact
+
+
+def test_redact_keeps_structure_but_not_values():
+    """Test that parameter values are replaced with their type names."""
+    assert redact({"user_id": 42, "name": "secret"}) == {"user_id": "int", "name": "str"}
+    assert redact((42, "secret", None)) == ["int", "str", "NoneType"]
+    assert redact([{"user_id": 1}, (2,)]) == [{"user_id": "int"}, ["int"]]
+
+
+@pytest.mark.asyncio
+async def test_slow_statements_are_logged_with_their_crud_origin(sqlite_engine, caplog):
+    """Test that a slow statement is logged with redacted parameters and the CRUD function that ran it."""
+    SlowQueryLog(sqlite_engine, threshold_seconds=0).attach()
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_queries"):
+        async with AsyncSession(sqlite_engine) as db:
+            await badge.get_badges_by_user(db, auth_user_id=987654)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 1
+    assert "from app.crud.badge.get_badges_by_user:" in messages[0]
+    assert "FROM badges" in messages[0]
+    assert "987654" not in messages[0]
+    assert messages[0].endswith("parameters=['int', 'int', 'int']")
+
+
+@pytest.mark.asyncio
+async def test_fast_statements_are_not_logged(sqlite_engine, caplog):
+    """Test that statements under the threshold are not logged."""
+    SlowQueryLog(sqlite_engine, threshold_seconds=60).attach()
+
+    with caplog.at_level(logging.WARNING, logger="app.db.slow_queries"):
+        async with sqlite_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    assert caplog.records == []
+
+
+def test_explain_is_sampled_only_on_postgresql():
+    """Test that plans are only captured on PostgreSQL, at the sample rate, one at a time."""
+    conn = MagicMock()
+    log = SlowQueryLog(MagicMock(), threshold_seconds=0, explain_sample_rate=1.0)
+
+    conn.dialect.name = "sqlite"
+    assert not log._should_explain(conn)
+
+    conn.dialect.name = "postgresql"
+    assert log._should_explain(conn)
+    log._explaining = MagicMock()
+    assert not log._should_explain(conn)
+
+    assert not SlowQueryLog(MagicMock(), threshold_seconds=0, explain_sample_rate=0.0)._should_explain(conn)
@@ -8,6 +8,9 @@ from app.schemas.badge import BadgeCreate
 from app.schemas.learning_goal import LearningGoalCreate, LearningGoalUpdate
 from app.models.badge import Badge
 from app.models.learning_goal import LearningGoal
+from app.models.user_stats import UserStats
+from app.crud.user_stats import CounterLimitReached
+from app.crud.learning_goal import InvalidStatusTransition, LearningGoalNotDeletable, StaleLearningGoal
 from app.services.auth_service import auth_service_client
 from tests.test_utils import SAMPLE_USER_ID, SAMPLE_USER_DATA, SAMPLE_BADGE_DATA, SAMPLE_LEARNING_GOAL_DATA
 import asyncio
@@ -33,27 +36,33 @@ async def test_get_user_profile(user_service):
                 "email": "test@example.com"
             }
             
-            # Mock the badge CRUD functions
-            with patch('app.services.user.crud.badge.get_badges_by_user') as mock_get_badges:
-                mock_get_badges.return_value = [
-                    Badge(id=1, name="Test Badge", description="Test Description", icon_url="http://example.com/icon.png", auth_user_id=1)
-                ]
+            # Mock the single-round-trip profile loader
+            with patch('app.services.user.crud.profile.get_profile_data') as mock_get_profile_data:
+                mock_get_profile_data.return_value = {
+                    "reference_exists": True,
+                    "badges": [
+                        {"id": 1, "name": "Test Badge", "description": "Test Description", "icon_url": "http://example.com/icon.png", "date_achieved": "2024-01-01T00:00:00", "user_id": 1}
+                    ],
+                    "learning_goals": [
+                        {"id": 1, "title": "Test Goal", "description": "Test Description", "status": "in-progress", "streak_count": 5, "user_id": 1}
+                    ],
+                    "total_badges": 1,
+                    "total_goals": 1,
+                }
                 
-                # Mock the learning goal CRUD functions
-                with patch('app.services.user.crud.learning_goal.get_learning_goals_by_user') as mock_get_goals:
-                    mock_get_goals.return_value = [
-                        LearningGoal(id=1, title="Test Goal", description="Test Description", status="in-progress", streak_count=5, auth_user_id=1)
-                    ]
-                    
-                    # Call the function
-                    result = await user_service.get_user_profile(1)
-                    
-                    # Verify the results
-                    assert result["id"] == 1
-                    assert result["username"] == "testuser"
-                    assert result["email"] == "test@example.com"
-                    assert len(result["badges"]) == 1
-                    assert len(result["learning_goals"]) == 1
+                # Call the function
+                result = await user_service.get_user_profile(1)
+                
+                # Verify the results
+                assert result["id"] == 1
+                assert result["username"] == "testuser"
+                assert result["email"] == "test@example.com"
+                assert len(result["badges"]) == 1
+                assert len(result["learning_goals"]) == 1
+                assert result["statistics"]["total_badges"] == 1
+                
+                # Badges and goals come from one loader call
+                mock_get_profile_data.assert_called_once_with(user_service.db, user_id=1)
 
 
 @pytest.mark.asyncio
@@ -80,27 +89,18 @@ async def test_get_my_profile(user_service):
     # Mock the current user data
     current_user = SAMPLE_USER_DATA
     
-    # Mock the badge CRUD functions
-    with patch('app.services.user.crud.badge.get_badges_by_user') as mock_get_badges:
-        mock_get_badges.return_value = [
-            Badge(id=1, name="Test Badge", description="Test Description", icon_url="http://example.com/icon.png", auth_user_id=1),
-            Badge(id=2, name="Another Badge", description="Another Description", icon_url="http://example.com/icon2.png", auth_user_id=1)
-        ]
+    # Mock the user stats CRUD function
+    with patch('app.services.user.crud.user_stats.get_user_stats') as mock_get_stats:
+        mock_get_stats.return_value = UserStats(user_id=1, badge_count=6, goal_count=2)
         
-        # Mock the learning goal CRUD functions
-        with patch('app.services.user.crud.learning_goal.get_learning_goals_by_user') as mock_get_goals:
-            mock_get_goals.return_value = [
-                LearningGoal(id=1, title="Test Goal", description="Test Description", status="in-progress", streak_count=5, auth_user_id=1),
-                LearningGoal(id=2, title="Another Goal", description="Another Description", status="completed", streak_count=10, auth_user_id=1)
-            ]
-            
-            # Call the function
-            result = await user_service.get_my_profile(current_user)
-            
-            # Verify the results
-            assert "statistics" in result
-            assert result["id"] == current_user["id"]
-            assert result["username"] == current_user["username"]
+        # Call the function
+        result = await user_service.get_my_profile(current_user)
+        
+        # Verify the results
+        assert "statistics" in result
+        assert result["id"] == current_user["id"]
+        assert result["username"] == current_user["username"]
+        assert result["statistics"] == {"total_badges": 6, "total_goals": 2, "level": 2}
 
 
 @pytest.mark.asyncio
@@ -111,12 +111,13 @@ async def test_get_user_badges(user_service):
         with patch.object(auth_service_client, 'get_user') as mock_get_user:
             mock_get_user.return_value = {"id": 1, "username": "testuser"}
             
-            with patch.object(auth_service_client, 'ensure_auth_user_reference_exists') as mock_ensure:
+            with patch('app.services.user.crud.profile.auth_user_reference_exists', new_callable=AsyncMock, return_value=False), \
+                 patch.object(UserService, '_backfill_auth_user_references', new_callable=AsyncMock) as mock_backfill:
                 # Mock the badge CRUD functions
                 mock_get_badges = AsyncMock()
                 mock_get_badges.return_value = [
-                    Badge(id=1, name="Test Badge", description="Test Description", icon_url="http://example.com/icon.png", auth_user_id=1),
-                    Badge(id=2, name="Another Badge", description="Another Description", icon_url="http://example.com/icon2.png", auth_user_id=1)
+                    Badge(id=1, name="Test Badge", description="Test Description", icon_url="http://example.com/icon.png", user_id=1),
+                    Badge(id=2, name="Another Badge", description="Another Description", icon_url="http://example.com/icon2.png", user_id=1)
                 ]
                 with patch('app.services.user.crud.badge.get_badges_by_user', mock_get_badges):
                     
@@ -125,12 +126,12 @@ async def test_get_user_badges(user_service):
                     
                     # Verify the results
                     assert len(result) == 2
-                    # Badges are sorted by ID in descending order, so ID 2 comes first
-                    assert result[0].name == "Another Badge"
-                    assert result[1].name == "Test Badge"
+                    # Badges are returned in the order the keyset query produced them
+                    assert result[0].name == "Test Badge"
+                    assert result[1].name == "Another Badge"
                     
-                    # Verify that ensure_auth_user_reference_exists was called
-                    mock_ensure.assert_called_once_with(1, user_service.db)
+                    # Verify that the missing auth user reference was backfilled
+                    mock_backfill.assert_awaited_once_with([1])
 
 
 @pytest.mark.asyncio
@@ -170,6 +171,27 @@ async def test_create_badge_authorized(user_service):
                     assert result.auth_user_id == 1
 
 
+@pytest.mark.asyncio
+async def test_create_badge_limit_reached(user_service):
+    """Test creating a badge when the user's badge counter is at the limit."""
+    current_user = {"id": 1, "username": "testuser"}
+    
+    with patch('app.services.user.auth_service_client', auth_service_client):
+        with patch.object(auth_service_client, 'get_user') as mock_get_user, \
+             patch('app.services.user.crud.profile.ensure_auth_user_references', new_callable=AsyncMock):
+            mock_get_user.return_value = {"id": 1, "username": "testuser"}
+            
+            with patch('app.services.user.crud.badge.create_user_badge') as mock_create_badge:
+                mock_create_badge.side_effect = CounterLimitReached(1, "badge_count", 100)
+                
+                with pytest.raises(HTTPException) as exc_info:
+                    await user_service.create_badge(1, BadgeCreate(**SAMPLE_BADGE_DATA), current_user)
+                
+                assert exc_info.value.status_code == 400
+                assert exc_info.value.detail == "Maximum number of badges (100) reached"
+                assert mock_create_badge.call_args.kwargs["max_badges"] == 100
+
+
 @pytest.mark.asyncio
 async def test_create_badge_unauthorized(user_service):
     """Test creating a badge when the user is not authorized."""
@@ -196,12 +218,13 @@ async def test_get_user_learning_goals(user_service):
         with patch.object(auth_service_client, 'get_user') as mock_get_user:
             mock_get_user.return_value = {"id": 1, "username": "testuser"}
             
-            with patch.object(auth_service_client, 'ensure_auth_user_reference_exists') as mock_ensure:
+            with patch('app.services.user.crud.profile.auth_user_reference_exists', new_callable=AsyncMock, return_value=False), \
+                 patch.object(UserService, '_backfill_auth_user_references', new_callable=AsyncMock) as mock_backfill:
                 # Mock the learning goal CRUD functions
                 mock_get_goals = AsyncMock()
                 mock_get_goals.return_value = [
-                    LearningGoal(id=1, title="Test Goal", description="Test Description", status="in-progress", streak_count=5, auth_user_id=1),
-                    LearningGoal(id=2, title="Another Goal", description="Another Description", status="completed", streak_count=10, auth_user_id=1)
+                    LearningGoal(id=1, title="Test Goal", description="Test Description", status="in-progress", streak_count=5, user_id=1),
+                    LearningGoal(id=2, title="Another Goal", description="Another Description", status="completed", streak_count=10, user_id=1)
                 ]
                 with patch('app.services.user.crud.learning_goal.get_learning_goals_by_user', mock_get_goals):
                     
@@ -210,12 +233,24 @@ async def test_get_user_learning_goals(user_service):
                     
                     # Verify the results
                     assert len(result) == 2
-                    # Goals are sorted by ID in descending order, so ID 2 comes first
-                    assert result[0].title == "Another Goal"
-                    assert result[1].title == "Test Goal"
+                    # Goals are returned in the order the keyset query produced them
+                    assert result[0].title == "Test Goal"
+                    assert result[1].title == "Another Goal"
                     
-                    # Verify that ensure_auth_user_reference_exists was called
-                    mock_ensure.assert_called_once_with(1, user_service.db)
+                    # Verify that the missing auth user reference was backfilled
+                    mock_backfill.assert_awaited_once_with([1])
+
+
+@pytest.mark.asyncio
+async def test_get_learning_goal_skips_backfill_for_known_user(user_service):
+    """Test that reading a goal of a user whose reference exists writes nothing through the primary."""
+    goal = LearningGoal(id=1, title="Test Goal", status="in_progress", streak_count=0, user_id=1)
+    with patch('app.services.user.crud.profile.auth_user_reference_exists', new_callable=AsyncMock, return_value=True), \
+         patch('app.services.user.crud.learning_goal.get_learning_goal', new_callable=AsyncMock, return_value=goal), \
+         patch.object(UserService, '_backfill_auth_user_references', new_callable=AsyncMock) as mock_backfill:
+        assert await user_service.get_learning_goal(1, 1) is goal
+
+    mock_backfill.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -353,12 +388,13 @@ async def test_update_learning_goal_not_found(user_service):
     
     # Mock the auth service client
     with patch('app.services.user.auth_service_client', auth_service_client):
-        with patch.object(auth_service_client, 'get_user') as mock_get_user:
+        with patch.object(auth_service_client, 'get_user') as mock_get_user, \
+             patch('app.services.user.crud.profile.ensure_auth_user_references', new_callable=AsyncMock):
             mock_get_user.return_value = {"id": 1, "username": "testuser"}
             
-            # Mock the get_learning_goal method to return None
-            with patch.object(user_service, 'get_learning_goal') as mock_get_learning_goal:
-                mock_get_learning_goal.return_value = None
+            # Mock the conditional update to match no goal
+            with patch('app.services.user.crud.learning_goal.update_learning_goal', new_callable=AsyncMock) as mock_update_goal:
+                mock_update_goal.return_value = None
                 
                 # Mock the learning goal update schema
                 learning_goal_update = LearningGoalUpdate(
@@ -375,6 +411,28 @@ async def test_update_learning_goal_not_found(user_service):
                 assert exc_info.value.detail == "Learning goal not found"
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error, status_code", [
+    (InvalidStatusTransition(1, "completed", "in_progress"), 400),
+    (StaleLearningGoal(1, 1, 2), 409),
+])
+async def test_update_learning_goal_refused(user_service, error, status_code):
+    """Test that refused compare-and-set updates map to 400 and 409."""
+    current_user = {"id": 1, "username": "testuser"}
+    
+    with patch('app.services.user.auth_service_client', auth_service_client):
+        with patch.object(auth_service_client, 'get_user') as mock_get_user, \
+             patch('app.services.user.crud.profile.ensure_auth_user_references', new_callable=AsyncMock):
+            mock_get_user.return_value = {"id": 1, "username": "testuser"}
+            with patch('app.services.user.crud.learning_goal.update_learning_goal', new_callable=AsyncMock) as mock_update_goal:
+                mock_update_goal.side_effect = error
+                
+                with pytest.raises(HTTPException) as exc_info:
+                    await user_service.update_learning_goal(1, 1, LearningGoalUpdate(status="in_progress", version=1), current_user)
+                
+                assert exc_info.value.status_code == status_code
+
+
 @pytest.mark.asyncio
 async def test_delete_learning_goal_authorized(user_service):
     """Test deleting a learning goal when the user is authorized."""
@@ -431,6 +489,26 @@ async def test_delete_learning_goal_unauthorized(user_service):
     assert exc_info.value.detail == "Not authorized to delete this learning goal"
 
 
+@pytest.mark.asyncio
+async def test_delete_completed_learning_goal(user_service):
+    """Test that deleting a completed learning goal is refused with 400."""
+    current_user = {"id": 1, "username": "testuser"}
+    
+    with patch('app.services.user.auth_service_client', auth_service_client):
+        with patch.object(auth_service_client, 'get_user') as mock_get_user, \
+             patch('app.services.user.crud.profile.ensure_auth_user_references', new_callable=AsyncMock):
+            mock_get_user.return_value = {"id": 1, "username": "testuser"}
+            with patch('app.services.user.crud.learning_goal.delete_learning_goal', new_callable=AsyncMock) as mock_delete_goal:
+                mock_delete_goal.side_effect = LearningGoalNotDeletable(1, "completed")
+                
+                with pytest.raises(HTTPException) as exc_info:
+                    await user_service.delete_learning_goal(1, 1, current_user)
+                
+                assert exc_info.value.status_code == 400
+                assert exc_info.value.detail == "Cannot delete completed learning goals. Please archive them instead."
+                mock_delete_goal.assert_called_once_with(user_service.db, goal_id=1, user_id=1)
+
+
 @pytest.mark.asyncio
 async def test_delete_learning_goal_not_found(user_service):
     """Test deleting a learning goal when the goal is not found."""
@@ -0,0 +1,53 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.crud import user_stats
+from app.crud.user_stats import CounterLimitReached
+
+
+@pytest_asyncio.fixture
+async def db(sqlite_engine, seed_users):
+    """A SQLite session with one known user."""
+    await seed_users(sqlite_engine, {1: None})
+    session_factory = sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_increment_counter_creates_row(db):
+    """Test that the first increment creates the counters row."""
+    await user_stats.increment_counter(db, 1, "badge_count", limit=100)
+    await db.commit()
+    
+    stats = await user_stats.get_user_stats(db, 1)
+    assert stats.badge_count == 1
+    assert stats.goal_count == 0
+
+
+@pytest.mark.asyncio
+async def test_increment_counter_enforces_limit(db):
+    """Test that the conditional increment refuses to pass the limit."""
+    for _ in range(2):
+        await user_stats.increment_counter(db, 1, "goal_count", limit=2)
+    await db.commit()
+    
+    with pytest.raises(CounterLimitReached):
+        await user_stats.increment_counter(db, 1, "goal_count", limit=2)
+    await db.rollback()
+    
+    stats = await user_stats.get_user_stats(db, 1)
+    assert stats.goal_count == 2
+
+
+@pytest.mark.asyncio
+async def test_decrement_counter_stops_at_zero(db):
+    """Test that decrementing never makes a counter negative."""
+    await user_stats.increment_counter(db, 1, "goal_count")
+    await user_stats.decrement_counter(db, 1, "goal_count")
+    await user_stats.decrement_counter(db, 1, "goal_count")
+    await db.commit()
+    
+    stats = await user_stats.get_user_stats(db, 1)
+    assert stats.goal_count == 0